@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Script to collect the log files of several drones in parallel.
+
+The drones are processed at the same time by a bounded pool of workers, so that the collection takes
+as long as the slowest drone. Each drone reuses a single SSH connection (ControlMaster) for the UAV
+name, the listing of its log directory and the rsync transfer. The logs already fetched are recorded
+in a local index, by name, size and SHA-256 digest, and only the new or grown files are transferred.
+
+A drone is either `user@ip`, reached over SSH, or `dir:<path>`, a local directory standing in for the
+log directory of a drone, used for testing. The UAV name of a stand-in is read from a `UAV_NAME` file
+in its directory, or defaults to the directory name.
+
+Usage:
+    python collect_logs.py "user1@ip1,user2@ip2,..." [--jobs N] [--output-dir DIR] [--verify]
+    or
+    python collect_logs.py "dir:/tmp/drone1,dir:/tmp/drone2" --output-dir /tmp/logs
+
+Options:
+    --jobs: Maximum number of drones processed at the same time.
+    --output-dir: Directory receiving one log directory per UAV name.
+    --remote-dir: Log directory on the drones.
+    --verify: Hash the local copies again and fetch the files that do not match the index.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from os.path import abspath, dirname
+from typing import Dict, List, Optional, Sequence
+
+REMOTE_LOG_DIR = '~/uav_ws/log'
+LOCAL_BASE_DIR = dirname(abspath(__file__))
+# Index of the fetched files, kept in each local UAV log directory
+INDEX_FILE = '.log_index.json'
+STANDIN_PREFIX = 'dir:'
+DEFAULT_JOBS = 16
+SSH_TIMEOUT = 10
+# Lifetime of an idle shared SSH connection, in seconds
+CONTROL_PERSIST = 60
+
+
+@dataclass
+class CollectionResult:
+    """
+    Outcome of the collection of a drone.
+
+    :param drone: The drone, as given on the command line.
+    :param uav_name: The UAV name of the drone, empty if it could not be retrieved.
+    :param fetched: Relative paths of the transferred files.
+    :param fetched_bytes: Size of the transferred files.
+    :param skipped: Number of files already in the index.
+    :param duration: Time spent on the drone, in seconds.
+    :param error: The error that stopped the collection, None on success.
+    """
+    drone: str
+    uav_name: str = ''
+    fetched: Sequence[str] = ()
+    fetched_bytes: int = 0
+    skipped: int = 0
+    duration: float = 0.0
+    error: Optional[str] = None
+
+
+class SshTransport:
+    """
+    Drone reached over SSH, all the commands sharing one master connection.
+
+    :param destination: The drone, in `user@ip` format.
+    :param remote_dir: The log directory on the drone.
+    :param control_dir: Directory of the SSH control sockets.
+    """
+
+    def __init__(self, destination: str, remote_dir: str, control_dir: str):
+        self.destination = destination
+        self.remote_dir = remote_dir.rstrip('/')
+        self.ssh_options = [
+            '-o', 'BatchMode=yes',
+            '-o', f'ConnectTimeout={SSH_TIMEOUT}',
+            '-o', 'ControlMaster=auto',
+            '-o', f'ControlPath={os.path.join(control_dir, "%C")}',
+            '-o', f'ControlPersist={CONTROL_PERSIST}',
+        ]
+
+    def _run(self, command: str) -> str:
+        result = subprocess.run(['ssh'] + self.ssh_options + [self.destination, command],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise OSError(result.stderr.strip() or f"ssh exited with status {result.returncode}")
+        return result.stdout
+
+    def uav_name(self) -> str:
+        return self._run('bash -c "source ~/.bashrc_offboard; echo \\$UAV_NAME"').strip()
+
+    def list_files(self) -> Dict[str, int]:
+        """
+        List the files of the remote log directory.
+
+        :return: The size of each file, by path relative to the log directory.
+        :rtype: dict[str, int]
+        """
+        # The directory is left unquoted for the remote shell to expand the home directory
+        output = self._run(f"find {self.remote_dir} -type f -printf '%P\\t%s\\n'")
+        return parse_listing(output)
+
+    def fetch(self, paths: Sequence[str], local_dir: str) -> None:
+        """
+        Transfer files of the remote log directory, in a single rsync run.
+
+        :param paths: Paths relative to the log directory.
+        :type paths: Sequence[str]
+        :param local_dir: The local log directory.
+        :type local_dir: str
+        """
+        ssh = ' '.join(['ssh'] + self.ssh_options)
+        result = subprocess.run(
+            ['rsync', '-az', '--files-from=-', '-e', ssh, f"{self.destination}:{self.remote_dir}/", f"{local_dir}/"],
+            input='\n'.join(paths), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise OSError(result.stderr.strip() or f"rsync exited with status {result.returncode}")
+
+    def close(self) -> None:
+        subprocess.run(['ssh'] + self.ssh_options + ['-O', 'exit', self.destination],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+class DirectoryTransport:
+    """
+    Local directory standing in for the log directory of a drone.
+
+    :param directory: The stand-in log directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def uav_name(self) -> str:
+        try:
+            with open(os.path.join(self.directory, 'UAV_NAME'), 'r', encoding='utf-8') as file:
+                return file.read().strip()
+        except OSError:
+            return os.path.basename(os.path.normpath(self.directory))
+
+    def list_files(self) -> Dict[str, int]:
+        if not os.path.isdir(self.directory):
+            raise OSError(f"{self.directory} is not a directory")
+        files = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.directory)
+                if relative != 'UAV_NAME':
+                    files[relative] = os.path.getsize(path)
+        return files
+
+    def fetch(self, paths: Sequence[str], local_dir: str) -> None:
+        for path in paths:
+            target = os.path.join(local_dir, path)
+            os.makedirs(dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(self.directory, path), target)
+
+    def close(self) -> None:
+        pass
+
+
+def parse_listing(output: str) -> Dict[str, int]:
+    """
+    Parse the `path<TAB>size` lines of a remote listing.
+
+    :param output: The listing.
+    :type output: str
+    :return: The size of each file, by relative path.
+    :rtype: dict[str, int]
+    """
+    files = {}
+    for line in output.splitlines():
+        path, _, size = line.rpartition('\t')
+        if path:
+            files[path] = int(size)
+    return files
+
+
+def file_digest(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+
+    :param path: Path to the file.
+    :type path: str
+    :return: The hexadecimal digest.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_index(local_dir: str) -> Dict[str, Dict[str, object]]:
+    """
+    Read the index of the files fetched in a local log directory.
+
+    :param local_dir: The local log directory.
+    :type local_dir: str
+    :return: The size and digest of each file, by relative path, empty if the index is missing.
+    :rtype: dict
+    """
+    try:
+        with open(os.path.join(local_dir, INDEX_FILE), 'r', encoding='utf-8') as file:
+            return json.load(file)['files']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def write_index(local_dir: str, files: Dict[str, Dict[str, object]]) -> None:
+    """
+    Atomically replace the index of a local log directory.
+
+    :param local_dir: The local log directory.
+    :type local_dir: str
+    :param files: The size and digest of each file, by relative path.
+    :type files: dict
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=local_dir, prefix='.tmp_')
+    with os.fdopen(fd, 'w', encoding='utf-8') as file:
+        json.dump({'files': files}, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(local_dir, INDEX_FILE))
+
+
+def pending_files(remote: Dict[str, int], index: Dict[str, Dict[str, object]], local_dir: str,
+                  verify: bool = False) -> List[str]:
+    """
+    Select the remote files that are not fetched yet.
+
+    :param remote: The size of each remote file, by relative path.
+    :type remote: dict[str, int]
+    :param index: The index of the local log directory.
+    :type index: dict
+    :param local_dir: The local log directory.
+    :type local_dir: str
+    :param verify: Hash the local copies and select the ones that do not match the index.
+    :type verify: bool
+    :return: The relative paths to transfer.
+    :rtype: list[str]
+    """
+    pending = []
+    for path, size in sorted(remote.items()):
+        entry = index.get(path)
+        local_path = os.path.join(local_dir, path)
+        # A file still being written on the drone grows, and is fetched again
+        if entry is None or entry['size'] != size or not os.path.isfile(local_path) \
+                or os.path.getsize(local_path) != size \
+                or (verify and file_digest(local_path) != entry['sha256']):
+            pending.append(path)
+    return pending
+
+
+def make_transport(drone: str, remote_dir: str, control_dir: str):
+    """
+    Create the transport of a drone.
+
+    :param drone: The drone, `user@ip` or `dir:<path>`.
+    :type drone: str
+    :param remote_dir: The log directory on the SSH drones.
+    :type remote_dir: str
+    :param control_dir: Directory of the SSH control sockets.
+    :type control_dir: str
+    :return: The transport.
+    :rtype: SshTransport or DirectoryTransport
+    :raises ValueError: If the drone is not in one of the expected formats.
+    """
+    if drone.startswith(STANDIN_PREFIX):
+        return DirectoryTransport(drone[len(STANDIN_PREFIX):])
+    user, _, host = drone.partition('@')
+    if not user or not host:
+        raise ValueError(f"Invalid drone format: {drone}. Expected format 'user@ip'.")
+    return SshTransport(drone, remote_dir, control_dir)
+
+
+def collect_drone(drone: str, output_dir: str, remote_dir: str, control_dir: str,
+                  verify: bool = False) -> CollectionResult:
+    """
+    Collect the new logs of a drone.
+
+    :param drone: The drone, `user@ip` or `dir:<path>`.
+    :type drone: str
+    :param output_dir: Directory receiving one log directory per UAV name.
+    :type output_dir: str
+    :param remote_dir: The log directory on the SSH drones.
+    :type remote_dir: str
+    :param control_dir: Directory of the SSH control sockets.
+    :type control_dir: str
+    :param verify: Hash the local copies and fetch the ones that do not match the index.
+    :type verify: bool
+    :return: The collection result.
+    :rtype: CollectionResult
+    """
+    start = time.monotonic()
+    result = CollectionResult(drone)
+    try:
+        transport = make_transport(drone, remote_dir, control_dir)
+    except ValueError as error:
+        result.error = str(error)
+        return result
+    try:
+        result.uav_name = transport.uav_name()
+        if not result.uav_name:
+            raise OSError("UAV_NAME is not set on the drone")
+        remote = transport.list_files()
+        local_dir = os.path.join(output_dir, result.uav_name)
+        os.makedirs(local_dir, exist_ok=True)
+        index = read_index(local_dir)
+        pending = pending_files(remote, index, local_dir, verify)
+        result.skipped = len(remote) - len(pending)
+        if pending:
+            transport.fetch(pending, local_dir)
+            for path in pending:
+                local_path = os.path.join(local_dir, path)
+                index[path] = {'size': os.path.getsize(local_path), 'sha256': file_digest(local_path)}
+            write_index(local_dir, index)
+        result.fetched = pending
+        result.fetched_bytes = sum(remote[path] for path in pending)
+    except OSError as error:
+        result.error = str(error)
+    finally:
+        transport.close()
+        result.duration = time.monotonic() - start
+    return result
+
+
+def collect_logs(drones: Sequence[str], output_dir: str = LOCAL_BASE_DIR, remote_dir: str = REMOTE_LOG_DIR,
+                 jobs: int = DEFAULT_JOBS, verify: bool = False) -> List[CollectionResult]:
+    """
+    Collect the new logs of several drones at the same time.
+
+    :param drones: The drones, `user@ip` or `dir:<path>`.
+    :type drones: Sequence[str]
+    :param output_dir: Directory receiving one log directory per UAV name.
+    :type output_dir: str
+    :param remote_dir: The log directory on the SSH drones.
+    :type remote_dir: str
+    :param jobs: Maximum number of drones processed at the same time.
+    :type jobs: int
+    :param verify: Hash the local copies and fetch the ones that do not match the index.
+    :type verify: bool
+    :return: The result of each drone, in the order of the drones.
+    :rtype: list[CollectionResult]
+    """
+    # Short socket paths, the control sockets are limited to about 100 characters
+    with tempfile.TemporaryDirectory(prefix='ssh_') as control_dir:
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(drones)))) as executor:
+            return list(executor.map(
+                lambda drone: collect_drone(drone, output_dir, remote_dir, control_dir, verify), drones))
+
+
+def print_result(result: CollectionResult) -> None:
+    """
+    Print the outcome of the collection of a drone.
+
+    :param result: The collection result.
+    :type result: CollectionResult
+    """
+    name = f"{result.uav_name} ({result.drone})" if result.uav_name else result.drone
+    if result.error is not None:
+        print(f"{name}: failed, {result.error}")
+    elif result.fetched:
+        print(f"{name}: fetched {len(result.fetched)} files ({result.fetched_bytes / 1e6:.1f} MB), "
+              f"{result.skipped} already collected, in {result.duration:.1f} s")
+    else:
+        print(f"{name}: up to date, {result.skipped} files already collected")
+
+
+def main(drone_list: str, output_dir: str = LOCAL_BASE_DIR, remote_dir: str = REMOTE_LOG_DIR,
+         jobs: int = DEFAULT_JOBS, verify: bool = False) -> None:
+    """
+    Main function to collect the logs of a comma-separated list of drones.
+
+    :param drone_list: Comma-separated list of drones, `user@ip` or `dir:<path>`.
+    :type drone_list: str
+    :param output_dir: Directory receiving one log directory per UAV name.
+    :type output_dir: str
+    :param remote_dir: The log directory on the SSH drones.
+    :type remote_dir: str
+    :param jobs: Maximum number of drones processed at the same time.
+    :type jobs: int
+    :param verify: Hash the local copies and fetch the ones that do not match the index.
+    :type verify: bool
+    :return: None
+    :rtype: None
+    """
+    drones = [drone.strip() for drone in drone_list.split(',') if drone.strip()]
+    if not drones:
+        print("Error: No drones specified in the list.")
+        raise SystemExit(1)
+    start = time.monotonic()
+    results = collect_logs(drones, output_dir, remote_dir, jobs, verify)
+    for result in results:
+        print_result(result)
+    failed = [result.drone for result in results if result.error is not None]
+    print(f"Collected {len(drones) - len(failed)}/{len(drones)} drones in {time.monotonic() - start:.1f} s")
+    if failed:
+        print(f"Failed drones: {', '.join(failed)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect the logs of several drones in parallel")
+    parser.add_argument('drones', help="Comma-separated list of drones, 'user@ip' or 'dir:<path>'")
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS,
+                        help="Maximum number of drones processed at the same time")
+    parser.add_argument('--output-dir', default=LOCAL_BASE_DIR,
+                        help="Directory receiving one log directory per UAV name")
+    parser.add_argument('--remote-dir', default=REMOTE_LOG_DIR, help="Log directory on the drones")
+    parser.add_argument('--verify', action='store_true',
+                        help="Hash the local copies again and fetch the files that do not match the index")
+    args = parser.parse_args()
+    main(args.drones, args.output_dir, args.remote_dir, args.jobs, args.verify)
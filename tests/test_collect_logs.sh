@@ -0,0 +1,93 @@
+#!/bin/bash
+
+# ==============================================================================
+# Copyright 2024 Damien Six (six.damien@robotsix.net)
+#
+# SPDX-License-Identifier: Apache-2.0
+# ==============================================================================
+
+# ==============================================================================
+# Test Script for collect_logs.py
+#
+# This script tests the log collection against local directories standing in
+# for the log directories of several drones. It checks that all the logs are
+# collected, that a second collection transfers nothing, and that only the new
+# or grown logs are transferred afterwards.
+#
+# Usage:
+#   ./test_collect_logs.sh
+# ==============================================================================
+
+echo "Running collect_logs.py test"
+
+# ------------------------------------------------------------------------------
+# Function to check a condition and exit if it failed
+# ------------------------------------------------------------------------------
+check_result() {
+    if [ $1 -ne 0 ]; then
+        echo "Error: $2 failed"
+        rm -rf "$WORK_DIR"
+        exit 1
+    fi
+}
+
+SCRIPT_DIR=$(readlink -f $(dirname "$0"))
+COLLECTOR="$SCRIPT_DIR/../log/collect_logs.py"
+WORK_DIR=$(mktemp -d)
+OUTPUT_DIR="$WORK_DIR/collected"
+
+# ------------------------------------------------------------------------------
+# Create the stand-in drones, each with a UAV name and a few logs
+# ------------------------------------------------------------------------------
+DRONES=""
+for i in 1 2 3; do
+    DRONE_DIR="$WORK_DIR/drone_$i"
+    mkdir -p "$DRONE_DIR/2024-01-01"
+    echo "uav$i" >"$DRONE_DIR/UAV_NAME"
+    head -c 100000 /dev/urandom >"$DRONE_DIR/2024-01-01/10_00_00.ulg"
+    head -c 50000 /dev/urandom >"$DRONE_DIR/2024-01-01/11_00_00.ulg"
+    DRONES="$DRONES${DRONES:+,}dir:$DRONE_DIR"
+done
+
+# ------------------------------------------------------------------------------
+# First collection: all the logs are fetched
+# ------------------------------------------------------------------------------
+python3 "$COLLECTOR" "$DRONES" --output-dir "$OUTPUT_DIR"
+check_result $? "First collection"
+for i in 1 2 3; do
+    diff -r -x UAV_NAME -x .log_index.json "$WORK_DIR/drone_$i" "$OUTPUT_DIR/uav$i" >/dev/null
+    check_result $? "Comparison of the logs of uav$i"
+done
+
+# ------------------------------------------------------------------------------
+# Second collection: nothing is fetched
+# ------------------------------------------------------------------------------
+OUTPUT=$(python3 "$COLLECTOR" "$DRONES" --output-dir "$OUTPUT_DIR")
+check_result $? "Second collection"
+[ $(echo "$OUTPUT" | grep -c "up to date") -eq 3 ]
+check_result $? "Skipping the collected logs"
+
+# ------------------------------------------------------------------------------
+# Third collection: only the new and the grown logs are fetched
+# ------------------------------------------------------------------------------
+head -c 1000 /dev/urandom >>"$WORK_DIR/drone_1/2024-01-01/11_00_00.ulg"
+head -c 1000 /dev/urandom >"$WORK_DIR/drone_2/2024-01-01/12_00_00.ulg"
+OUTPUT=$(python3 "$COLLECTOR" "$DRONES" --output-dir "$OUTPUT_DIR")
+check_result $? "Third collection"
+echo "$OUTPUT" | grep -q "uav1 .*fetched 1 files" && echo "$OUTPUT" | grep -q "uav2 .*fetched 1 files" \
+    && echo "$OUTPUT" | grep -q "uav3 .*up to date"
+check_result $? "Fetching only the new logs"
+for i in 1 2; do
+    diff -r -x UAV_NAME -x .log_index.json "$WORK_DIR/drone_$i" "$OUTPUT_DIR/uav$i" >/dev/null
+    check_result $? "Comparison of the updated logs of uav$i"
+done
+
+# ------------------------------------------------------------------------------
+# A missing drone makes the collection fail, after the other drones
+# ------------------------------------------------------------------------------
+python3 "$COLLECTOR" "$DRONES,dir:$WORK_DIR/missing" --output-dir "$OUTPUT_DIR" >/dev/null
+[ $? -ne 0 ]
+check_result $? "Reporting a missing drone"
+
+rm -rf "$WORK_DIR"
+echo "collect_logs.py test passed"
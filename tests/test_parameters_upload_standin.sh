@@ -0,0 +1,48 @@
+#!/bin/bash
+
+# ==============================================================================
+# Copyright 2024 Damien Six (six.damien@robotsix.net)
+#
+# SPDX-License-Identifier: Apache-2.0
+# ==============================================================================
+
+# ==============================================================================
+# Test Script for parameters_upload.py against the vehicle stand-in
+#
+# This script runs the parameters upload benchmark against the local MAVLink
+# vehicle stand-in, so that the upload modes and their retry logic are checked
+# over clean and lossy links without hardware. The benchmark exits with an
+# error if any upload fails or leaves the vehicle table inconsistent.
+#
+# Usage:
+#   ./test_parameters_upload_standin.sh
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# Print a message indicating the start of the test
+# ------------------------------------------------------------------------------
+echo "Running parameters_upload.py stand-in test"
+
+# ------------------------------------------------------------------------------
+# Get the directory of the script
+# ------------------------------------------------------------------------------
+SCRIPT_DIR=$(readlink -f $(dirname "$0"))
+TOOLS_DIR=$(readlink -f "$SCRIPT_DIR/../tools/scripts")
+
+# ------------------------------------------------------------------------------
+# Run the benchmark in the pymavlink Docker image
+# ------------------------------------------------------------------------------
+DOCKER_REPO=robotsix/pymavlink:main
+docker pull $DOCKER_REPO
+docker run --rm -w "$TOOLS_DIR" -v "$TOOLS_DIR:$TOOLS_DIR:ro" $DOCKER_REPO \
+    python3 parameters_upload_benchmark.py --sizes 20 100 --links usb lossy
+
+# ------------------------------------------------------------------------------
+# Check if the Docker command ran successfully
+# ------------------------------------------------------------------------------
+if [ $? -eq 0 ]; then
+    echo "parameters_upload.py stand-in test passed"
+else
+    echo "parameters_upload.py stand-in test failed"
+    exit 1
+fi
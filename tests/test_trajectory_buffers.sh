@@ -0,0 +1,90 @@
+#!/bin/bash
+
+# ==============================================================================
+# Copyright 2024 Damien Six (six.damien@robotsix.net)
+#
+# SPDX-License-Identifier: Apache-2.0
+# ==============================================================================
+
+# ==============================================================================
+# Test Script for trajectory_buffers.py
+#
+# This script interleaves appends to a ring buffer and pulls of its mirror past
+# the buffer capacity, and checks that the mirror gets every row still stored,
+# first from the same thread and then with the appends in another thread.
+#
+# Usage:
+#   ./test_trajectory_buffers.sh
+# ==============================================================================
+
+echo "Running trajectory_buffers.py test"
+
+# ------------------------------------------------------------------------------
+# Function to check a condition and exit if it failed
+# ------------------------------------------------------------------------------
+check_result() {
+    if [ $1 -ne 0 ]; then
+        echo "Error: $2 failed"
+        exit 1
+    fi
+}
+
+SCRIPT_DIR=$(readlink -f $(dirname "$0"))
+export PYTHONPATH="$SCRIPT_DIR/../tools/scripts"
+
+# ------------------------------------------------------------------------------
+# Appends and pulls in turn: each pull returns all the rows still stored
+# ------------------------------------------------------------------------------
+python3 - <<'EOF'
+import numpy as np
+
+from trajectory_buffers import RingBuffer
+
+source = RingBuffer(8, ("time", "value"))
+mirror = RingBuffer(8, source.columns)
+written = 0
+for count in [1, 3, 7, 8, 9, 2, 15, 16, 17, 5, 8, 1]:
+    for _ in range(count):
+        source.append((written, -written))
+        written += 1
+    rows, _ = mirror.pull(source)
+    expected = np.arange(written - min(count, source.capacity), written)
+    assert np.array_equal(rows[:, 0], expected), (count, rows)
+    assert np.array_equal(mirror.ordered(), source.ordered())
+EOF
+check_result $? "Interleaved appends and pulls"
+
+# ------------------------------------------------------------------------------
+# Appends in another thread: the mirror only holds complete, consecutive rows
+# ------------------------------------------------------------------------------
+python3 - <<'EOF'
+import threading
+
+import numpy as np
+
+from trajectory_buffers import RingBuffer
+
+source = RingBuffer(64, ("time", "value", "square"))
+mirror = RingBuffer(64, source.columns)
+
+
+def produce():
+    for k in range(200000):
+        source.append((k, -k, k * k))
+
+
+producer = threading.Thread(target=produce)
+producer.start()
+last = -1
+while producer.is_alive() or last < source.count - 1:
+    rows, _ = mirror.pull(source)
+    assert np.all(rows[:, 1] == -rows[:, 0]) and np.all(rows[:, 2] == rows[:, 0] ** 2), rows
+    assert np.all(np.diff(rows[:, 0]) == 1) and (not len(rows) or rows[0, 0] > last), rows
+    if len(rows):
+        last = rows[-1, 0]
+producer.join()
+assert np.array_equal(mirror.ordered(), source.ordered())
+EOF
+check_result $? "Appends in another thread"
+
+echo "trajectory_buffers.py test passed"
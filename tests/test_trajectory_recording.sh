@@ -0,0 +1,90 @@
+#!/bin/bash
+
+# ==============================================================================
+# Copyright 2024 Damien Six (six.damien@robotsix.net)
+#
+# SPDX-License-Identifier: Apache-2.0
+# ==============================================================================
+
+# ==============================================================================
+# Test Script for trajectory_recording.py
+#
+# This script records two sessions into the same recording directory and checks
+# that the replay returns the odometry and the desired trajectories of both
+# sessions, each Coordinate message pointing to its own rows, with all the
+# derivative orders it carries.
+#
+# Usage:
+#   ./test_trajectory_recording.sh
+# ==============================================================================
+
+echo "Running trajectory_recording.py test"
+
+# ------------------------------------------------------------------------------
+# Function to check a condition and exit if it failed
+# ------------------------------------------------------------------------------
+check_result() {
+    if [ $1 -ne 0 ]; then
+        echo "Error: $2 failed"
+        rm -rf "$WORK_DIR"
+        exit 1
+    fi
+}
+
+SCRIPT_DIR=$(readlink -f $(dirname "$0"))
+WORK_DIR=$(mktemp -d)
+RECORDING_DIR="$WORK_DIR/recording"
+
+# ------------------------------------------------------------------------------
+# Record one session, the Coordinate messages carrying three derivative orders
+# ------------------------------------------------------------------------------
+record_session() {
+    PYTHONPATH="$SCRIPT_DIR/../tools/scripts" python3 - "$RECORDING_DIR" "$1" <<'EOF'
+import sys
+
+import numpy as np
+
+from trajectory_buffers import ACTUAL_COLUMNS
+from trajectory_recording import TrajectoryRecorder
+
+directory, session = sys.argv[1], int(sys.argv[2])
+recorder = TrajectoryRecorder(directory, chunk_rows=7)
+for k in range(10):
+    receive_time = 100.0 * session + k
+    recorder.record_odometry([receive_time, 1e6 * receive_time] + [float(session)] * (len(ACTUAL_COLUMNS) - 1))
+    derivatives = [np.full(10, 10.0 * session + order) for order in range(3)]
+    recorder.record_coordinates(receive_time, "x", np.linspace(0.0, 0.9, 10), derivatives)
+recorder.close()
+EOF
+}
+
+record_session 1
+check_result $? "First session"
+record_session 2
+check_result $? "Second session"
+
+# ------------------------------------------------------------------------------
+# Both sessions are replayed with their own values
+# ------------------------------------------------------------------------------
+PYTHONPATH="$SCRIPT_DIR/../tools/scripts" python3 - "$RECORDING_DIR" <<'EOF'
+import sys
+
+import numpy as np
+
+from trajectory_recording import Recording
+
+recording = Recording(sys.argv[1])
+assert len(recording.stream("odometry")) == 20
+assert len(recording.stream("coordinates")) == 2 * 10 * 10 * 4
+for session in (1, 2):
+    start, end = 100.0 * session, 100.0 * session + 10
+    odometry = recording.odometry(start, end)
+    assert len(odometry) == 10 and np.all(odometry[:, 2:] == session)
+    desired = recording.desired(start, end)["x"]
+    values = desired[~np.isnan(desired[:, 0]), 1:]
+    assert values.shape == (100, 2) and np.all(values == [10 * session, 10 * session + 1]), values
+EOF
+check_result $? "Replay of both sessions"
+
+rm -rf "$WORK_DIR"
+echo "trajectory_recording.py test passed"
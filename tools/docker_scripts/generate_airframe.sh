@@ -25,24 +25,32 @@
 # max_motor_thrust: 10.0
 # first_motor_cw: true  # Optional, defaults to True
 #
+# A file can also hold a list of configurations or a parameter sweep, see
+# docs/simulation.md.
+#
 # Usage:
 #   ./generate_airframe.sh <path_to_yaml_file>
 #
 # Options:
 #   -h       Show help message and exit
-#   -f       Specify the configuration file to use
+#   -f       Specify the configuration file to use, can be repeated
+#   -j       Number of models generated in parallel (default: number of CPUs)
+#   -F       Render all the models, even the ones whose manifest is up to date
 #
 # Example:
 #   ./generate_airframe.sh -f params.yaml
+#   ./generate_airframe.sh -f quad.yaml -f hexa.yaml -j 4
 # ==============================================================================
 
 # ------------------------------------------------------------------------------
 # Function to display the help message
 # ------------------------------------------------------------------------------
 show_help() {
-    echo -e "Usage: $0 [-h] -f parameter_file"
+    echo -e "Usage: $0 [-h] [-F] [-j jobs] -f parameter_file [-f parameter_file ...]"
     echo -e "  -h   Display this help message."
-    echo -e "  -f   Specify the configuration file to use."
+    echo -e "  -f   Specify the configuration file to use, can be repeated."
+    echo -e "  -j   Number of models generated in parallel (default: number of CPUs)."
+    echo -e "  -F   Render all the models, even the ones whose manifest is up to date."
 }
 
 # ------------------------------------------------------------------------------
@@ -54,14 +62,22 @@ NC='\033[0m' # No Color
 # ------------------------------------------------------------------------------
 # Parse command-line options
 # ------------------------------------------------------------------------------
-while getopts "hf:" opt; do
+config_files=()
+generate_options=""
+while getopts "hf:j:F" opt; do
     case ${opt} in
     h)
         show_help
         exit 0
         ;;
     f)
-        config_file=${OPTARG}
+        config_files+=("${OPTARG}")
+        ;;
+    j)
+        generate_options="$generate_options --jobs ${OPTARG}"
+        ;;
+    F)
+        generate_options="$generate_options --force"
         ;;
     \?)
         echo -e "${RED}Invalid option: -$OPTARG${NC}" >&2
@@ -73,19 +89,21 @@ done
 # ------------------------------------------------------------------------------
 # Check if configuration file is provided
 # ------------------------------------------------------------------------------
-if [ -z "${config_file}" ]; then
+if [ ${#config_files[@]} -eq 0 ]; then
     echo -e "${RED}Configuration file not specified. Use -f option to provide the file.${NC}"
     show_help
     exit 1
 fi
 
 # ------------------------------------------------------------------------------
-# Check if configuration file exists
+# Check if the configuration files exist
 # ------------------------------------------------------------------------------
-if [ ! -f "${config_file}" ]; then
-    echo -e "${RED}Configuration file not found: ${config_file}${NC}"
-    exit 1
-fi
+for config_file in "${config_files[@]}"; do
+    if [ ! -f "${config_file}" ]; then
+        echo -e "${RED}Configuration file not found: ${config_file}${NC}"
+        exit 1
+    fi
+done
 
 # ------------------------------------------------------------------------------
 # Ensure required commands are available
@@ -96,23 +114,36 @@ command -v docker >/dev/null 2>&1 || {
 }
 
 # ------------------------------------------------------------------------------
-# Set up paths for the configuration file and script directory
+# Set up paths for the configuration files and script directory, each
+# configuration directory is mounted in the container
 # ------------------------------------------------------------------------------
-CONFIG_DIR=$(readlink -f $(dirname "$config_file"))
-CONFIG_FILE=$(basename "$config_file")
 SCRIPT_DIR=$(readlink -f $(dirname "$0"))
+CONFIG_MOUNTS=()
+CONFIG_PATHS=()
+for index in "${!config_files[@]}"; do
+    config_file=${config_files[$index]}
+    CONFIG_MOUNTS+=(-v "$(readlink -f $(dirname "$config_file")):/CONFIG_DIR_$index:ro")
+    CONFIG_PATHS+=("/CONFIG_DIR_$index/$(basename "$config_file")")
+done
 
 # ------------------------------------------------------------------------------
 # Docker repository
 # ------------------------------------------------------------------------------
 DOCKER_REPO=robotsix/generate_airframe:main
 
+# ------------------------------------------------------------------------------
+# Keep the compiled templates on the host, so that cold containers reuse them
+# ------------------------------------------------------------------------------
+CACHE_DIR=${XDG_CACHE_HOME:-$HOME/.cache}/generate_airframe
+mkdir -p "$CACHE_DIR"
+
 # ------------------------------------------------------------------------------
 # Pull the Docker image and run the command to generate the airframe
 # ------------------------------------------------------------------------------
 docker pull $DOCKER_REPO
 docker run --rm -w "$SCRIPT_DIR" \
     -v "$SCRIPT_DIR/../scripts:$SCRIPT_DIR:ro" \
-    -v "$CONFIG_DIR:/CONFIG_DIR:ro" \
+    "${CONFIG_MOUNTS[@]}" \
     -v "$SCRIPT_DIR/../../gz_sim:$SCRIPT_DIR/../../gz_sim:rw" \
-    $DOCKER_REPO python3 generate_airframe.py /CONFIG_DIR/$CONFIG_FILE
+    -v "$CACHE_DIR:/template_cache:rw" \
+    $DOCKER_REPO python3 generate_airframe.py "${CONFIG_PATHS[@]}" --cache-dir /template_cache $generate_options
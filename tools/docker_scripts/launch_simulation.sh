@@ -138,10 +138,24 @@ if [ $? -ne 0 ]; then
 fi
 
 # ------------------------------------------------------------------------------
-# Copy custom airframe files and update CMakeLists.txt
+# Validate the custom airframes, in milliseconds, before the slow simulation start
 # ------------------------------------------------------------------------------
 PX4_DIR=$SCRIPT_DIR/../../PX4-Autopilot
 AIRFRAMES_DIR=$SCRIPT_DIR/../../gz_sim/custom_airframes
+if command -v python3 >/dev/null 2>&1; then
+    python3 $SCRIPT_DIR/../scripts/validate_airframe.py $AIRFRAMES_DIR --models-dir $AIRFRAMES_DIR \
+        --models-dir $PX4_DIR/Tools/simulation/gz/models
+    if [ $? -ne 0 ]; then
+        echo -e "${RED}Invalid custom airframes. Aborting.${NC}"
+        exit 1
+    fi
+else
+    echo -e "${RED}python3 not found, skipping the airframe validation.${NC}"
+fi
+
+# ------------------------------------------------------------------------------
+# Copy custom airframe files and update CMakeLists.txt
+# ------------------------------------------------------------------------------
 FILE="$PX4_DIR/ROMFS/px4fmu_common/init.d-posix/airframes/CMakeLists.txt"
 TEMP_FILE="CMakeLists.tmp"
 index=1
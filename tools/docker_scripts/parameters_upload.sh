@@ -19,18 +19,29 @@
 # Options:
 #   -h       Show help message and exit
 #   -f       Specify the parameter file defining the parameters to upload
+#   -w       Use the pipelined upload with the given number of outstanding requests
+#   -s       Send only the parameters that differ from the vehicle, skip the reboot if none does
+#   -p       Probe all serial ports and baud rates concurrently and cache the detected link
+#   -b       Load the whole parameter file at once through MAVLink FTP
 #
 # Example:
 #   ./parameters_upload.sh -f params.txt
+#   ./parameters_upload.sh -f params.txt -w 16
+#   ./parameters_upload.sh -f params.txt -s
+#   ./parameters_upload.sh -f params.txt -b
 # ==============================================================================
 
 # ------------------------------------------------------------------------------
 # Function to display the help message
 # ------------------------------------------------------------------------------
 show_help() {
-    echo -e "Usage: $0 [-h] -f parameter_file"
+    echo -e "Usage: $0 [-h] -f parameter_file [-w window] [-s] [-p] [-b]"
     echo -e "  -h   Display this help message."
     echo -e "  -f   Specify the parameter file defining the parameters to upload."
+    echo -e "  -w   Use the pipelined upload with the given number of outstanding requests."
+    echo -e "  -s   Send only the parameters that differ from the vehicle, skip the reboot if none does."
+    echo -e "  -p   Probe all serial ports and baud rates concurrently and cache the detected link."
+    echo -e "  -b   Load the whole parameter file at once through MAVLink FTP."
 }
 
 # ------------------------------------------------------------------------------
@@ -42,7 +53,8 @@ NC='\033[0m' # No Color
 # ------------------------------------------------------------------------------
 # Parse command-line options
 # ------------------------------------------------------------------------------
-while getopts "hf:" opt; do
+upload_options=""
+while getopts "hf:w:spb" opt; do
     case ${opt} in
     h)
         show_help
@@ -51,6 +63,18 @@ while getopts "hf:" opt; do
     f)
         param_file=${OPTARG}
         ;;
+    w)
+        upload_options="$upload_options --pipeline --window ${OPTARG}"
+        ;;
+    s)
+        upload_options="$upload_options --sync"
+        ;;
+    p)
+        upload_options="$upload_options --fast-probe"
+        ;;
+    b)
+        upload_options="$upload_options --ftp"
+        ;;
     \?)
         echo -e "${RED}Invalid option: -$OPTARG${NC}" >&2
         exit 1
@@ -91,8 +115,12 @@ PARAM_FILE=$(basename "$param_file")
 SCRIPT_DIR=$(readlink -f $(dirname "$0"))
 DOCKER_REPO=robotsix/pymavlink:main
 
+# Keep the parameter table and link caches on the host between runs
+CACHE_DIR=${XDG_CACHE_HOME:-$HOME/.cache}/px4_parameters
+mkdir -p "$CACHE_DIR"
+
 # ------------------------------------------------------------------------------
 # Pull the Docker image and run the command to upload parameters
 # ------------------------------------------------------------------------------
 docker pull $DOCKER_REPO
-docker run --rm -w "$SCRIPT_DIR" -v "$SCRIPT_DIR/../scripts:$SCRIPT_DIR:ro" -v "$PARAM_DIR:/param_dir:ro" --privileged -v /dev:/dev:rw $DOCKER_REPO python3 parameters_upload.py --file /param_dir/$PARAM_FILE
+docker run --rm -w "$SCRIPT_DIR" -v "$SCRIPT_DIR/../scripts:$SCRIPT_DIR:ro" -v "$PARAM_DIR:/param_dir:ro" -v "$CACHE_DIR:/param_cache:rw" --privileged -v /dev:/dev:rw $DOCKER_REPO python3 parameters_upload.py --file /param_dir/$PARAM_FILE --cache-dir /param_cache $upload_options
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Vectorized multirotor geometry and control allocation for the airframe generator.
+
+The rotor positions, thrust axes and spin directions are built in one pass for planar, coaxial and
+tilted layouts. The control-allocation effectiveness matrix follows the PX4 convention
+(ActuatorEffectivenessRotors, FRD body frame, normalized commands):
+
+    thrust = ct * axis
+    moment = ct * position x axis - ct * km * axis
+
+The analysis functions accept geometries stacked along leading batch dimensions, so that thousands
+of candidate geometries with the same number of rotors are evaluated with a few array operations.
+
+Usage:
+    geometry = rotor_geometry(num_motors=6, arm_length=0.3, angle_offset=30, max_motor_thrust=8.0)
+    metrics = analyze(geometry, mass=1.5)
+"""
+
+from dataclasses import dataclass
+from typing import Sequence, Union
+
+import numpy as np
+
+G = 9.81
+# Moment coefficient of the rotors, the ratio between the rotor drag torque and the thrust
+DEFAULT_KM = 0.01
+# Flip between the model frame (x forward, y left, z up) and the PX4 body frame (FRD)
+FLU_TO_FRD = np.array([1.0, -1.0, -1.0])
+
+
+@dataclass
+class RotorGeometry:
+    """
+    Rotor layout of a multirotor, in the model frame (x forward, y left, z up).
+
+    All the per-rotor arrays may have leading batch dimensions.
+
+    :param positions: Rotor positions in meters, shape (..., n, 3).
+    :param axes: Unit thrust axes, shape (..., n, 3).
+    :param directions: Spin directions seen from above, +1 counterclockwise and -1 clockwise, shape (..., n).
+    :param max_thrust: Maximum thrust of each rotor in N, shape (..., n).
+    :param km: Moment coefficient of each rotor, shape (..., n).
+    :param arm_angles: Yaw angles of the arms in radians, shape (..., number of arms).
+    """
+    positions: np.ndarray
+    axes: np.ndarray
+    directions: np.ndarray
+    max_thrust: np.ndarray
+    km: np.ndarray
+    arm_angles: np.ndarray
+
+    @property
+    def num_rotors(self) -> int:
+        return self.positions.shape[-2]
+
+    @property
+    def positions_frd(self) -> np.ndarray:
+        # Adding 0.0 turns the -0.0 of the flipped zeros into 0.0
+        return self.positions * FLU_TO_FRD + 0.0
+
+    @property
+    def axes_frd(self) -> np.ndarray:
+        return self.axes * FLU_TO_FRD + 0.0
+
+    @property
+    def tilted(self) -> bool:
+        """
+        True if a thrust axis is not vertical.
+        """
+        return bool(np.any(self.axes[..., :2] != 0.0))
+
+    @property
+    def rotor_rpy(self) -> np.ndarray:
+        """
+        Roll and pitch of the rotor frames bringing their z axis onto the thrust axis, zero yaw.
+
+        :return: The SDF roll, pitch and yaw angles in radians, shape (..., n, 3).
+        :rtype: np.ndarray
+        """
+        roll = -np.arcsin(np.clip(self.axes[..., 1], -1.0, 1.0))
+        pitch = np.arctan2(self.axes[..., 0], self.axes[..., 2])
+        return np.stack((roll, pitch, np.zeros_like(roll)), axis=-1) + 0.0
+
+
+@dataclass
+class GeometryMetrics:
+    """
+    Hover and controllability metrics of geometries, with the batch shape of the geometries.
+
+    :param hover_thrust: Collective normalized command to hover, as MPC_THR_HOVER.
+    :param hover_commands: Least-norm normalized rotor commands to hover, shape (..., n).
+    :param thrust_margin: Command left to the most loaded rotor at hover, negative if it cannot hover.
+    :param thrust_to_weight: Vertical thrust at full commands over the weight.
+    :param min_singular_value: Smallest singular value of the roll, pitch, yaw and vertical thrust rows.
+    :param controllable: True if roll, pitch, yaw and vertical thrust are independently controllable.
+    """
+    hover_thrust: np.ndarray
+    hover_commands: np.ndarray
+    thrust_margin: np.ndarray
+    thrust_to_weight: np.ndarray
+    min_singular_value: np.ndarray
+    controllable: np.ndarray
+
+
+def rotor_geometry(num_motors: int, arm_length: Union[float, np.ndarray], angle_offset: float,
+                   max_motor_thrust: Union[float, np.ndarray], first_motor_cw: bool = True,
+                   coaxial: bool = False, coaxial_spacing: float = 0.0, tilt: float = 0.0,
+                   km: float = DEFAULT_KM) -> RotorGeometry:
+    """
+    Builds the rotor geometry of a multirotor.
+
+    The rotors are evenly spread around the center, the first one at `angle_offset` degrees from
+    the x axis, and spin alternately clockwise and counterclockwise. With `coaxial`, the rotors are
+    paired on `num_motors / 2` arms, the top and bottom rotors of an arm spinning in opposite
+    directions. With `tilt`, each thrust axis is tilted about its arm, toward the tangent, so that
+    the thrust yaw moment adds to the rotor drag moment.
+
+    `arm_length` and `max_motor_thrust` may be arrays, of shape (batch,), to build a batch of
+    geometries at once.
+
+    :param num_motors: Number of rotors.
+    :type num_motors: int
+    :param arm_length: Distance of the rotors from the center in meters.
+    :type arm_length: float or np.ndarray
+    :param angle_offset: Angle of the first arm from the x axis in degrees.
+    :type angle_offset: float
+    :param max_motor_thrust: Maximum thrust of each rotor in N.
+    :type max_motor_thrust: float or np.ndarray
+    :param first_motor_cw: The first rotor spins clockwise.
+    :type first_motor_cw: bool
+    :param coaxial: Pair the rotors on coaxial arms.
+    :type coaxial: bool
+    :param coaxial_spacing: Vertical distance between the rotors of a coaxial pair in meters.
+    :type coaxial_spacing: float
+    :param tilt: Tilt of the thrust axes in degrees.
+    :type tilt: float
+    :param km: Moment coefficient of the rotors.
+    :type km: float
+    :return: The rotor geometry.
+    :rtype: RotorGeometry
+    """
+    index = np.arange(num_motors)
+    num_arms = num_motors // 2 if coaxial else num_motors
+    arm = index // 2 if coaxial else index
+    arm_angles = np.radians((angle_offset + np.arange(num_arms) * 360 / num_arms) % 360)
+    angles = arm_angles[arm]
+
+    # Clockwise seen from above is a negative rotation about z
+    directions = np.where((index % 2 == 0) == first_motor_cw, -1.0, 1.0)
+    heights = np.zeros(num_motors)
+    if coaxial:
+        heights = np.where(index % 2 == 0, coaxial_spacing / 2, -coaxial_spacing / 2)
+
+    arm_length = np.asarray(arm_length, dtype=float)[..., None]
+    positions = np.stack(np.broadcast_arrays(arm_length * np.cos(angles), arm_length * np.sin(angles),
+                                             heights), axis=-1)
+
+    axes = np.tile(np.array([0.0, 0.0, 1.0]), (num_motors, 1))
+    if tilt:
+        tilt_angle = np.radians(tilt) * -directions
+        tangents = np.stack((-np.sin(angles), np.cos(angles), np.zeros(num_motors)), axis=-1)
+        axes = np.cos(tilt_angle)[:, None] * axes + np.sin(tilt_angle)[:, None] * tangents
+
+    batch = positions.shape[:-2]
+    max_thrust = np.broadcast_to(np.asarray(max_motor_thrust, dtype=float)[..., None], batch + (num_motors,))
+    return RotorGeometry(
+        positions=positions,
+        axes=np.broadcast_to(axes, positions.shape),
+        directions=np.broadcast_to(directions, batch + (num_motors,)),
+        max_thrust=max_thrust,
+        km=np.broadcast_to(km * directions, batch + (num_motors,)),
+        arm_angles=np.broadcast_to(arm_angles, batch + (num_arms,)),
+    )
+
+
+def stack(geometries: Sequence[RotorGeometry]) -> RotorGeometry:
+    """
+    Stacks geometries with the same number of rotors along a new batch dimension.
+
+    :param geometries: The geometries.
+    :type geometries: Sequence[RotorGeometry]
+    :return: The batched geometry.
+    :rtype: RotorGeometry
+    """
+    return RotorGeometry(**{
+        field: np.stack([getattr(geometry, field) for geometry in geometries])
+        for field in RotorGeometry.__dataclass_fields__
+    })
+
+
+def effectiveness_matrix(geometry: RotorGeometry) -> np.ndarray:
+    """
+    Computes the control-allocation effectiveness matrix, in the PX4 body frame (FRD).
+
+    :param geometry: The rotor geometry, possibly batched.
+    :type geometry: RotorGeometry
+    :return: The matrix mapping normalized rotor commands to the roll, pitch and yaw moments and
+        the x, y and z thrusts, shape (..., 6, n).
+    :rtype: np.ndarray
+    """
+    positions = geometry.positions_frd
+    axes = geometry.axes_frd
+    ct = geometry.max_thrust[..., None]
+    # PX4 defines km positive for counterclockwise rotors seen from above
+    moment = ct * np.cross(positions, axes) - ct * geometry.km[..., None] * axes
+    thrust = ct * axes
+    return np.swapaxes(np.concatenate((moment, thrust), axis=-1), -1, -2)
+
+
+def hover_thrust(geometry: RotorGeometry, mass: Union[float, np.ndarray]) -> np.ndarray:
+    """
+    Computes the collective normalized command to hover, as MPC_THR_HOVER.
+
+    :param geometry: The rotor geometry, possibly batched.
+    :type geometry: RotorGeometry
+    :param mass: Mass of the vehicle in kg.
+    :type mass: float or np.ndarray
+    :return: The hover command, with the batch shape of the geometry.
+    :rtype: np.ndarray
+    """
+    vertical_thrust = np.mean(geometry.max_thrust * geometry.axes[..., 2], axis=-1)
+    return np.asarray(mass) * G / geometry.num_rotors / vertical_thrust
+
+
+def analyze(geometry: RotorGeometry, mass: Union[float, np.ndarray]) -> GeometryMetrics:
+    """
+    Computes the hover and controllability metrics of geometries.
+
+    :param geometry: The rotor geometry, possibly batched.
+    :type geometry: RotorGeometry
+    :param mass: Mass of the vehicle in kg, broadcast against the batch shape.
+    :type mass: float or np.ndarray
+    :return: The metrics.
+    :rtype: GeometryMetrics
+    """
+    matrix = effectiveness_matrix(geometry)
+    mass = np.asarray(mass, dtype=float)
+    weight = mass * G
+
+    # Least-norm commands producing the weight along -z (FRD) and no moment
+    wrench = np.zeros(np.broadcast_shapes(matrix.shape[:-2], mass.shape) + (6,))
+    wrench[..., 5] = -weight
+    hover_commands = (np.linalg.pinv(matrix) @ wrench[..., None])[..., 0]
+
+    # Roll, pitch, yaw and vertical thrust, the axes a multirotor has to control
+    controlled = matrix[..., [0, 1, 2, 5], :]
+    singular_values = np.linalg.svd(controlled, compute_uv=False)
+    # Fewer than four rotors cannot control the four axes independently
+    min_singular_value = singular_values[..., -1] if geometry.num_rotors >= 4 else np.zeros(matrix.shape[:-2])
+    controllable = min_singular_value > 1e-9 * singular_values[..., 0]
+
+    return GeometryMetrics(
+        hover_thrust=hover_thrust(geometry, mass),
+        hover_commands=hover_commands,
+        thrust_margin=1.0 - hover_commands.max(axis=-1),
+        thrust_to_weight=-matrix[..., 5, :].sum(axis=-1) / weight,
+        min_singular_value=min_singular_value,
+        controllable=controllable,
+    )
@@ -8,7 +8,12 @@ Script to generate model files for a multirotor vehicle using configurations fro
 The script utilizes Jinja2 templates to create the necessary files and directories for simulation.
 
 Usage:
-    python script.py <path_to_yaml_file>
+    python generate_airframe.py <path_to_yaml_file> [<path_to_yaml_file> ...] [--jobs N] [--force]
+                                [--output-dir DIR] [--cache-dir DIR]
+
+Several configuration files, or a single file holding a list of configurations or a parameter sweep,
+are generated in one run: the templates are compiled once and the models are rendered across a
+process pool.
 
 YAML Configuration File Structure:
     model_name: "model_name"
@@ -21,29 +26,236 @@ YAML Configuration File Structure:
     Izz: 0.03
     max_motor_thrust: 10.0
     first_motor_cw: true  # Optional, defaults to True
+    coaxial: false  # Optional, pairs the motors on num_motors / 2 coaxial arms
+    coaxial_spacing: 0.1  # Optional, vertical distance between coaxial motors
+    rotor_tilt: 0  # Optional, tilt of the rotors about their arm in degrees
+
+A file can also hold a list of such configurations, or a base configuration with a `sweep` entry
+mapping parameters to lists of values. The sweep generates one model per combination of values and
+`model_name` is then formatted with the swept values:
+    model_name: "quad_{arm_length}_{num_motors}"
+    ...
+    sweep:
+      arm_length: [0.2, 0.25, 0.3]
+      num_motors: [4, 6]
 
 Steps Performed:
 1. Read the configuration from the provided YAML file.
 2. Validate the number of motors.
-3. Calculate motor positions based on the provided arm length and angle offset.
-4. Render the Jinja2 templates with the configuration data.
-5. Save the generated content to the appropriate files.
-6. Copy mesh files from the templates directory to the model directory.
+3. Compute the rotor geometry, spin directions and hover thrust (airframe_geometry.py).
+4. Render the Jinja2 templates with the configuration data and the precomputed geometry.
+5. Atomically replace the generated files whose content changed.
+6. Hard link the mesh files to the shared mesh store.
+7. Validate the model SDF and its physics (validate_airframe.py).
+
+Each model directory keeps a manifest of the configuration, the sources and the generated files, so
+that an unchanged model is skipped without rendering anything.
+
+The generator does not change the working directory and only imports Jinja2, PyYAML and the
+process pool when needed, so it can be called as a library and starts quickly in cold containers.
+The compiled templates are kept in a persistent Jinja2 bytecode cache.
 """
 
-import numpy as np
+import argparse
+import functools
+import hashlib
+import itertools
+import json
 import os
+import tempfile
 from os.path import abspath, dirname
-from jinja2 import Environment, FileSystemLoader
-import yaml
-from typing import List, Tuple
-import sys
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+# Jinja2, PyYAML, NumPy and the process pool are imported when first needed, so that an up to date model
+# is checked without paying for their import
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+TEMPLATE_NAMES = ('model.config', 'model.sdf', 'px4_init_file')
+SWEEP_KEY = 'sweep'
+TEMPLATES_DIR = os.path.join(dirname(abspath(__file__)), 'templates')
+# Modules computing or checking the generated files, a change to them makes the models out of date
+SOURCE_MODULES = ('generate_airframe.py', 'airframe_geometry.py', 'validate_airframe.py')
+AIRFRAMES_DIR = os.path.join(dirname(abspath(__file__)), '..', '..', 'gz_sim', 'custom_airframes')
+DEFAULT_COAXIAL_SPACING = 0.1
+# Manifest of the generated files, kept in each model directory
+MANIFEST_FILE = '.manifest.json'
+# Content-addressed mesh files, hard linked into the model directories of the output directory
+MESH_STORE = '.meshes'
+# Persistent Jinja2 bytecode cache, so that cold runs do not compile the templates again
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')),
+                                 'generate_airframe')
+
+# Compiled templates of this process, inherited by the forked pool workers
+_templates: Dict[str, 'Template'] = {}
+
+def load_templates(cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> Dict[str, 'Template']:
+    """
+    Load the Jinja2 templates once per process, from the bytecode cache when it is up to date.
+
+    :param cache_dir: Directory of the bytecode cache, None to compile without cache.
+    :type cache_dir: str, optional
+    :return: The compiled templates by name.
+    :rtype: dict[str, Template]
+    """
+    if not _templates:
+        from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+        bytecode_cache = None
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(cache_dir)
+            except OSError:
+                print(f"Cannot use the template cache directory {cache_dir}, compiling without cache.")
+        env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), bytecode_cache=bytecode_cache,
+                          trim_blocks=True, lstrip_blocks=True)
+        _templates.update((name, env.get_template(name)) for name in TEMPLATE_NAMES)
+    return _templates
+
+def file_digest(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file.
+
+    :param path: Path to the file.
+    :type path: str
+    :return: The hexadecimal digest.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def source_digests() -> Dict[str, str]:
+    """
+    Compute, once per process, the digests of the sources the generated files depend on: this
+    script, the geometry and validation modules, the templates and the meshes.
+
+    :return: The digests by path, relative to the templates directory for the templates and meshes.
+    :rtype: dict[str, str]
+    """
+    digests = {name: file_digest(os.path.join(dirname(abspath(__file__)), name)) for name in SOURCE_MODULES}
+    for root, _, files in os.walk(TEMPLATES_DIR):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digests[os.path.relpath(path, TEMPLATES_DIR)] = file_digest(path)
+    return digests
+
+def read_manifest(target_dir: str) -> Dict[str, Any]:
+    """
+    Read the manifest of a model directory.
+
+    :param target_dir: The model directory.
+    :type target_dir: str
+    :return: The manifest, empty if it is missing or unreadable.
+    :rtype: dict
+    """
+    try:
+        with open(os.path.join(target_dir, MANIFEST_FILE), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def write_atomically(path: str, content: bytes) -> None:
+    """
+    Write a file through a temporary file in the same directory, so that readers never see a
+    partially written file.
+
+    :param path: Path to the file.
+    :type path: str
+    :param content: The file content.
+    :type content: bytes
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=dirname(path), prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def link_mesh(source: str, digest: str, path: str, store_dir: str) -> None:
+    """
+    Place a mesh file in a model directory as a hard link to the mesh store, so that all the models
+    share a single copy. Falls back to a copy when the store is on another file system.
+
+    :param source: Path to the mesh in the templates directory.
+    :type source: str
+    :param digest: SHA-256 digest of the mesh.
+    :type digest: str
+    :param path: Path of the mesh in the model directory.
+    :type path: str
+    :param store_dir: The mesh store directory.
+    :type store_dir: str
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    stored = os.path.join(store_dir, digest + os.path.splitext(source)[1])
+    # A mesh edited in a model directory also modified the store through the hard link
+    if not os.path.exists(stored) or file_digest(stored) != digest:
+        with open(source, 'rb') as file:
+            write_atomically(stored, file.read())
+    tmp_path = os.path.join(dirname(path), f".tmp_{os.path.basename(path)}")
+    try:
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        os.link(stored, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        with open(stored, 'rb') as file:
+            write_atomically(path, file.read())
+
+def model_inputs(parameters: Dict[str, Any]) -> str:
+    """
+    Compute the digest of the model parameters together with the sources.
+
+    :param parameters: The arguments of generate_model_files describing the model.
+    :type parameters: dict
+    :return: The hexadecimal digest.
+    :rtype: str
+    """
+    return hashlib.sha256(json.dumps([parameters, source_digests()], sort_keys=True).encode()).hexdigest()
+
+def is_up_to_date(target_dir: str, manifest: Dict[str, Any], inputs: str) -> bool:
+    """
+    Check that a model directory was generated from the same inputs and was not modified since.
+
+    :param target_dir: The model directory.
+    :type target_dir: str
+    :param manifest: The manifest of the model directory.
+    :type manifest: dict
+    :param inputs: Digest of the configuration and of the sources.
+    :type inputs: str
+    :return: True if no file has to be written.
+    :rtype: bool
+    """
+    if manifest.get('inputs') != inputs:
+        return False
+    for name, entry in manifest.get('files', {}).items():
+        try:
+            stat = os.stat(os.path.join(target_dir, name))
+        except OSError:
+            return False
+        if stat.st_size != entry['size'] or stat.st_mtime_ns != entry['mtime_ns']:
+            return False
+    return True
+
 
 def generate_model_files(arm_length: float, num_motors: int, angle_offset: float, model_name: str, weight: float,
-                         Ixx: float, Iyy: float, Izz: float, max_motor_thrust: float, first_motor_cw: bool = True) -> None:
+                         Ixx: float, Iyy: float, Izz: float, max_motor_thrust: float, first_motor_cw: bool = True,
+                         coaxial: bool = False, coaxial_spacing: float = DEFAULT_COAXIAL_SPACING,
+                         rotor_tilt: float = 0.0, force: bool = False, output_dir: str = AIRFRAMES_DIR) -> bool:
     """
     Generate model files for a multirotor vehicle.
 
+    The generation is incremental: the model directory is skipped when its manifest records the
+    same configuration and sources, and otherwise only the files whose content changed are
+    replaced, atomically. Meshes are hard linked to a shared store instead of being copied.
+
     :param arm_length: Length of the arms of the multirotor.
     :type arm_length: float
     :param num_motors: Number of motors on the multirotor.
@@ -64,84 +276,190 @@ def generate_model_files(arm_length: float, num_motors: int, angle_offset: float
     :type max_motor_thrust: float
     :param first_motor_cw: Direction of the first motor (clockwise if True).
     :type first_motor_cw: bool, optional
-    :return: None
-    :rtype: None
+    :param coaxial: Pair the motors on coaxial arms, the top and bottom motors spinning in opposite directions.
+    :type coaxial: bool, optional
+    :param coaxial_spacing: Vertical distance between the motors of a coaxial pair.
+    :type coaxial_spacing: float, optional
+    :param rotor_tilt: Tilt of the rotors about their arm, in degrees, to increase the yaw authority.
+    :type rotor_tilt: float, optional
+    :param force: Render and compare all the files, even if the manifest is up to date.
+    :type force: bool, optional
+    :param output_dir: Directory holding the model directories.
+    :type output_dir: str, optional
+    :return: True if the model files were generated.
+    :rtype: bool
     """
-    os.chdir(dirname(abspath(__file__)))
-    env = Environment(loader=FileSystemLoader('templates'),
-                      trim_blocks=True, lstrip_blocks=True)
-    model_config_template = env.get_template('model.config')
-    model_sdf_template = env.get_template('model.sdf')
-    shell_script_template = env.get_template('px4_init_file')
-
-    target_dir = os.path.join('..', '..', 'gz_sim',
-                              'custom_airframes', model_name)
-    try:
-        os.makedirs(target_dir, exist_ok=False)
-    except FileExistsError:
-        print("Model directory already exists. Files will be overwritten.")
-
     if num_motors < 2:
         print("Number of motors should be at least 2. Exiting...")
-        return
+        return False
     if num_motors % 2 != 0:
         print("Number of motors should be even. Exiting...")
-        return
+        return False
+
+    target_dir = os.path.join(output_dir, model_name)
+    os.makedirs(target_dir, exist_ok=True)
+    inputs = model_inputs(dict(arm_length=arm_length, num_motors=num_motors, angle_offset=angle_offset,
+                               model_name=model_name, weight=weight, Ixx=Ixx, Iyy=Iyy, Izz=Izz,
+                               max_motor_thrust=max_motor_thrust, first_motor_cw=first_motor_cw,
+                               coaxial=coaxial, coaxial_spacing=coaxial_spacing, rotor_tilt=rotor_tilt))
+    manifest = read_manifest(target_dir)
+    if not force and is_up_to_date(target_dir, manifest, inputs):
+        print(f"Model {model_name} is up to date.")
+        return True
+
+    templates = load_templates()
+    model_config_template = templates['model.config']
+    model_sdf_template = templates['model.sdf']
+    shell_script_template = templates['px4_init_file']
+
+    # The geometry is computed in one vectorized pass, the templates only format it
+    from airframe_geometry import hover_thrust, rotor_geometry
 
-    angles = [(angle_offset + i * 360 / num_motors) %
-              360 for i in range(num_motors)]
-    angles = np.radians(angles)
-    motor_positions: List[Tuple[float, float, float]] = [
-        (arm_length * np.cos(angle), arm_length * np.sin(angle), 0) for angle in angles]
+    geometry = rotor_geometry(num_motors, arm_length, angle_offset, max_motor_thrust, first_motor_cw,
+                              coaxial, coaxial_spacing, rotor_tilt)
+    rotors = [
+        dict(position=position, position_frd=position_frd, axis_frd=axis_frd, rpy=rpy, km=km, ct=ct,
+             direction='cw' if direction < 0 else 'ccw')
+        for position, position_frd, axis_frd, rpy, km, ct, direction in zip(
+            geometry.positions.tolist(), geometry.positions_frd.tolist(), geometry.axes_frd.tolist(),
+            geometry.rotor_rpy.tolist(), geometry.km.tolist(), geometry.max_thrust.tolist(),
+            geometry.directions.tolist())
+    ]
+    # Each arm visual spans two opposite arms
+    num_arms = len(geometry.arm_angles)
+    arm_angles = geometry.arm_angles[:num_arms // 2] if num_arms % 2 == 0 else geometry.arm_angles
 
     model_config_content = model_config_template.render(model_name=model_name)
     model_sdf_content = model_sdf_template.render(
         model_name=model_name,
-        num_motors=num_motors,
         arm_length=arm_length,
-        motor_positions=motor_positions,
-        arm_angles=angles[:num_motors // 2],
+        rotors=rotors,
+        arm_angles=arm_angles.tolist(),
         weight=weight,
+        num_motors=num_motors,
         Ixx=Ixx,
         Iyy=Iyy,
         Izz=Izz,
-        max_motor_thrust=max_motor_thrust,
-        first_motor_cw=first_motor_cw
+        max_motor_thrust=max_motor_thrust
     )
 
     px4_init_file = shell_script_template.render(
         model_name=model_name,
-        motor_positions=motor_positions,
-        weight=weight,
-        max_motor_thrust=max_motor_thrust,
-        num_motors=num_motors,
-        first_motor_cw=first_motor_cw
+        rotors=rotors,
+        tilted=geometry.tilted,
+        hover_thrust=float(hover_thrust(geometry, weight))
     )
 
-    with open(os.path.join(target_dir, 'model.config'), 'w', encoding='utf-8') as file:
-        file.write(model_config_content)
+    contents = {
+        'model.config': model_config_content,
+        'model.sdf': model_sdf_content,
+        model_name: px4_init_file,
+    }
+    old_files = manifest.get('files', {})
+    files = {}
+    updated = []
+    for name, content in contents.items():
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(target_dir, name)
+        if not os.path.isfile(path) or old_files.get(name, {}).get('sha256') != digest \
+                or file_digest(path) != digest:
+            write_atomically(path, data)
+            updated.append(name)
+        files[name] = {'sha256': digest}
 
-    with open(os.path.join(target_dir, 'model.sdf'), 'w', encoding='utf-8') as file:
-        file.write(model_sdf_content)
+    for name, digest in source_digests().items():
+        if not name.startswith('meshes' + os.sep):
+            continue
+        path = os.path.join(target_dir, name)
+        os.makedirs(dirname(path), exist_ok=True)
+        if not os.path.isfile(path) or file_digest(path) != digest:
+            link_mesh(os.path.join(TEMPLATES_DIR, name), digest, path, os.path.join(output_dir, MESH_STORE))
+            updated.append(name)
+        files[name] = {'sha256': digest}
 
-    with open(os.path.join(target_dir, model_name), 'w', encoding='utf-8') as file:
-        file.write(px4_init_file)
+    # An invalid model gets no manifest, so that it is rendered again once the configuration is fixed
+    from validate_airframe import print_report, validate_sdf
 
-    os.system(f"cp -r templates/meshes {target_dir}")
+    report = validate_sdf(os.path.join(target_dir, 'model.sdf'), [output_dir])
+    if report.errors or report.warnings:
+        print_report(report, model_name)
+    if not report.ok:
+        print(f"Model {model_name} is invalid, check its configuration.")
+        return False
 
-def load_config_and_generate_model(yaml_file: str) -> None:
+    for name, entry in files.items():
+        stat = os.stat(os.path.join(target_dir, name))
+        entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    write_atomically(os.path.join(target_dir, MANIFEST_FILE),
+                     json.dumps({'inputs': inputs, 'files': files}, indent=2, sort_keys=True).encode('utf-8'))
+    if updated:
+        print(f"Model {model_name}: updated {', '.join(updated)}")
+    else:
+        print(f"Model {model_name} is up to date.")
+    return True
+
+def expand_configs(document: Any) -> List[Dict[str, Any]]:
     """
-    Load configuration from a YAML file and generate model files.
+    Expand the content of a YAML file into model configurations.
 
-    :param yaml_file: Path to the YAML configuration file.
-    :type yaml_file: str
-    :return: None
-    :rtype: None
+    :param document: A configuration, a list of configurations, or a configuration with a sweep.
+    :type document: Any
+    :return: The model configurations.
+    :rtype: list[dict]
+    """
+    if isinstance(document, list):
+        return [config for item in document for config in expand_configs(item)]
+    if SWEEP_KEY not in document:
+        return [document]
+
+    base = {key: value for key, value in document.items() if key != SWEEP_KEY}
+    sweep = document[SWEEP_KEY]
+    names = list(sweep)
+    configs = []
+    for index, values in enumerate(itertools.product(*(sweep[name] for name in names))):
+        config = dict(base, **dict(zip(names, values)))
+        if '{' in base['model_name']:
+            config['model_name'] = base['model_name'].format(**config)
+        else:
+            config['model_name'] = f"{base['model_name']}_{index}"
+        configs.append(config)
+    return configs
+
+def read_configs(yaml_files: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Read and expand the model configurations of several YAML files.
+
+    :param yaml_files: Paths to the YAML configuration files.
+    :type yaml_files: Sequence[str]
+    :return: The model configurations.
+    :rtype: list[dict]
+    :raises ValueError: If two configurations share a model name.
     """
-    with open(yaml_file, 'r', encoding='utf-8') as file:
-        config = yaml.safe_load(file)
+    import yaml
+
+    # The LibYAML loader is much faster to load large sweeps, when available
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    configs = []
+    for yaml_file in yaml_files:
+        with open(yaml_file, 'r', encoding='utf-8') as file:
+            configs.extend(expand_configs(yaml.load(file, Loader=loader)))
+    names = [config['model_name'] for config in configs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Several configurations generate the models: {', '.join(duplicates)}")
+    return configs
 
-    generate_model_files(
+def model_parameters(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Select the arguments of generate_model_files describing the model from a configuration.
+
+    :param config: The model configuration.
+    :type config: dict
+    :return: The model parameters, with the defaults applied.
+    :rtype: dict
+    """
+    return dict(
         arm_length=config['arm_length'],
         num_motors=config['num_motors'],
         angle_offset=config['angle_offset'],
@@ -151,24 +469,123 @@ def load_config_and_generate_model(yaml_file: str) -> None:
         Iyy=config['Iyy'],
         Izz=config['Izz'],
         max_motor_thrust=config['max_motor_thrust'],
-        first_motor_cw=config.get('first_motor_cw', True)
+        first_motor_cw=config.get('first_motor_cw', True),
+        coaxial=config.get('coaxial', False),
+        coaxial_spacing=config.get('coaxial_spacing', DEFAULT_COAXIAL_SPACING),
+        rotor_tilt=config.get('rotor_tilt', 0.0)
     )
 
-def main(yaml_file: str) -> None:
+def generate_from_config(config: Dict[str, Any], force: bool = False, output_dir: str = AIRFRAMES_DIR) -> bool:
+    """
+    Generate the model files of a configuration.
+
+    :param config: The model configuration.
+    :type config: dict
+    :param force: Render and compare all the files, even if the manifest is up to date.
+    :type force: bool
+    :param output_dir: Directory holding the model directories.
+    :type output_dir: str
+    :return: True if the model files were generated.
+    :rtype: bool
+    """
+    return generate_model_files(**model_parameters(config), force=force, output_dir=output_dir)
+
+def generate_batch(configs: Sequence[Dict[str, Any]], jobs: Optional[int] = None, force: bool = False,
+                   output_dir: str = AIRFRAMES_DIR, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> List[bool]:
     """
-    Main function to load the YAML configuration and generate model files.
+    Generate the model files of several configurations across a process pool.
+
+    The up to date models are skipped before the templates are loaded or the pool is started.
+
+    :param configs: The model configurations.
+    :type configs: Sequence[dict]
+    :param jobs: Number of worker processes, defaults to the number of CPUs.
+    :type jobs: int, optional
+    :param force: Render and compare all the files, even if the manifests are up to date.
+    :type force: bool
+    :param output_dir: Directory holding the model directories.
+    :type output_dir: str
+    :param cache_dir: Directory of the template bytecode cache, None to compile without cache.
+    :type cache_dir: str, optional
+    :return: For each configuration, True if the model files were generated.
+    :rtype: list[bool]
+    """
+    results = [True] * len(configs)
+    pending = []
+    for index, config in enumerate(configs):
+        parameters = model_parameters(config)
+        target_dir = os.path.join(output_dir, parameters['model_name'])
+        if not force and is_up_to_date(target_dir, read_manifest(target_dir), model_inputs(parameters)):
+            print(f"Model {parameters['model_name']} is up to date.")
+        else:
+            pending.append(index)
+    if not pending:
+        return results
+
+    # Loaded before the pool is created, so that forked workers do not load them again
+    load_templates(cache_dir)
+    generate = functools.partial(generate_from_config, force=force, output_dir=output_dir)
+    if len(pending) == 1 or jobs == 1:
+        generated = [generate(configs[index]) for index in pending]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs, initializer=load_templates, initargs=(cache_dir,)) as executor:
+            generated = list(executor.map(generate, [configs[index] for index in pending]))
+    for index, success in zip(pending, generated):
+        results[index] = success
+    return results
+
+def load_config_and_generate_model(yaml_file: str) -> None:
+    """
+    Load configuration from a YAML file and generate model files.
 
     :param yaml_file: Path to the YAML configuration file.
     :type yaml_file: str
     :return: None
     :rtype: None
     """
-    load_config_and_generate_model(yaml_file)
+    generate_batch(read_configs([yaml_file]))
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python script.py <path_to_yaml_file>")
-        sys.exit(1)
+def main(yaml_files: Sequence[str], jobs: Optional[int] = None, force: bool = False,
+         output_dir: str = AIRFRAMES_DIR, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> None:
+    """
+    Main function to load the YAML configurations and generate model files.
 
-    yaml_file_path = sys.argv[1]
-    main(yaml_file_path)
+    :param yaml_files: Paths to the YAML configuration files.
+    :type yaml_files: Sequence[str]
+    :param jobs: Number of worker processes, defaults to the number of CPUs.
+    :type jobs: int, optional
+    :param force: Render and compare all the files, even if the manifests are up to date.
+    :type force: bool, optional
+    :param output_dir: Directory holding the model directories.
+    :type output_dir: str, optional
+    :param cache_dir: Directory of the template bytecode cache, None to compile without cache.
+    :type cache_dir: str, optional
+    :return: None
+    :rtype: None
+    """
+    try:
+        configs = read_configs(yaml_files)
+    except ValueError as error:
+        print(f"Error: {error}")
+        raise SystemExit(1)
+    results = generate_batch(configs, jobs, force, output_dir, cache_dir)
+    if len(configs) > 1:
+        print(f"Generated {sum(results)}/{len(configs)} models")
+    failed = [config['model_name'] for config, success in zip(configs, results) if not success]
+    if failed:
+        print(f"Failed models: {', '.join(failed)}")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate multirotor airframe models from YAML configurations")
+    parser.add_argument('yaml_files', nargs='+', help="Paths to the YAML configuration files")
+    parser.add_argument('--jobs', type=int, help="Number of worker processes, defaults to the number of CPUs")
+    parser.add_argument('--force', action='store_true',
+                        help="Render and compare all the files, even if the manifests are up to date")
+    parser.add_argument('--output-dir', default=AIRFRAMES_DIR, help="Directory holding the model directories")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Directory of the template bytecode cache, empty to disable it")
+    args = parser.parse_args()
+    main(args.yaml_files, args.jobs, args.force, args.output_dir, args.cache_dir or None)
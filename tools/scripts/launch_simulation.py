@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Script to launch a PX4 simulation with Tmuxinator, from a simulation configuration YAML file.
+
+The gz plugins of the plugins directory are built in parallel. A plugin whose source tree did not
+change since its last successful build is not built again: it is only installed again if the
+container lost its installed files. The configuration is then read in a single pass and handed to
+Tmuxinator.
+
+Usage:
+    python launch_simulation.py <configuration_file> [--plugins-dir DIR] [--jobs N] [--rebuild]
+
+YAML Configuration File Structure:
+    headless: false  # Optional, defaults to False
+    world: default  # Optional, defaults to default
+    models:
+      - name: gz_x500
+        pose: [0, 0, 0, 0, 0, 0]
+    fleets:  # Optional, see spawn_planner.py
+      - name: gz_x500
+        layout: grid
+        count: 20
+    spawn_interval: 2.0  # Optional, in seconds between two spawn batches
+
+Steps Performed:
+1. Read and check the configuration file, and plan the spawn poses of the fleets.
+2. Build and install the changed gz plugins, in parallel.
+3. Start the Tmuxinator session with the models, poses, world and headless mode.
+"""
+
+import argparse
+import hashlib
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from os.path import abspath, dirname
+from typing import Any, Dict, List, Optional, Tuple
+
+from generate_airframe import file_digest, write_atomically
+from spawn_planner import DEFAULT_MIN_SEPARATION, plan_spawns, spawn_delays
+
+SCRIPT_DIR = dirname(abspath(__file__))
+PX4_DIR = os.path.join(SCRIPT_DIR, '..', '..', 'PX4-Autopilot')
+PLUGINS_DIR = '/gz_plugins'
+BUILD_DIR = 'build'
+# Digest of the sources of the last successful build, kept in the build directory
+SOURCE_HASH_FILE = '.source_hash'
+# Files installed by the last `cmake --install`, written by CMake
+INSTALL_MANIFEST = 'install_manifest.txt'
+
+
+@dataclass
+class SimulationConfig:
+    """
+    Simulation configuration.
+
+    :param headless: Run Gazebo without its GUI.
+    :param world: Name of the Gazebo world.
+    :param models: Name and pose [x, y, z, roll, pitch, yaw] of each model to spawn.
+    :param spawn_delays: Start delay of each model in seconds.
+    """
+    headless: bool
+    world: str
+    models: List[Tuple[str, List[Any]]]
+    spawn_delays: List[float]
+
+    def tmuxinator_settings(self) -> Dict[str, str]:
+        """
+        Format the configuration as the settings of the Tmuxinator project.
+
+        :return: The MODEL_LIST, MODEL_POSITIONS, SPAWN_DELAYS, GZ_WORLD and HEADLESS settings.
+        :rtype: dict[str, str]
+        """
+        return {
+            'MODEL_LIST': ':'.join(name for name, _ in self.models),
+            'MODEL_POSITIONS': ':'.join(','.join(str(value) for value in pose) for _, pose in self.models),
+            'SPAWN_DELAYS': ':'.join(f"{delay:g}" for delay in self.spawn_delays),
+            'GZ_WORLD': self.world,
+            'HEADLESS': str(self.headless).lower(),
+        }
+
+
+def read_config(path: str) -> SimulationConfig:
+    """
+    Read a simulation configuration file, expanding its fleets into models (spawn_planner.py).
+
+    :param path: Path to the YAML configuration file.
+    :type path: str
+    :return: The configuration.
+    :rtype: SimulationConfig
+    :raises ValueError: If the configuration has no model, a malformed pose or a malformed fleet, or if
+        two models are closer than the minimum separation.
+    """
+    import yaml
+
+    with open(path, 'r', encoding='utf-8') as file:
+        document = yaml.safe_load(file) or {}
+    models = []
+    for index, model in enumerate(document.get('models') or []):
+        name, pose = model.get('name'), model.get('pose', [0] * 6)
+        if not name:
+            raise ValueError(f"Model {index} of {path} has no name")
+        if len(pose) != 6 or not all(isinstance(value, (int, float)) for value in pose):
+            raise ValueError(f"Model {name} of {path} needs a pose [x, y, z, roll, pitch, yaw]")
+        models.append((str(name), pose))
+    models = plan_spawns(models, document.get('fleets') or [],
+                         document.get('min_separation', DEFAULT_MIN_SEPARATION))
+    if not models:
+        raise ValueError(f"{path} does not list any model")
+    delays = spawn_delays(len(models), document.get('spawn_interval', 0.0), document.get('spawn_batch', 1))
+    return SimulationConfig(headless=bool(document.get('headless', False)),
+                            world=str(document.get('world', 'default')), models=models, spawn_delays=delays)
+
+
+def source_digest(plugin_dir: str) -> str:
+    """
+    Compute the digest of the source tree of a plugin, its build directory excluded.
+
+    :param plugin_dir: The plugin directory.
+    :type plugin_dir: str
+    :return: The hexadecimal digest.
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(plugin_dir):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.')
+                         and not (root == plugin_dir and name == BUILD_DIR))
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(f"{os.path.relpath(path, plugin_dir)}\0{file_digest(path)}\0".encode())
+    return digest.hexdigest()
+
+
+def is_installed(build_dir: str) -> bool:
+    """
+    Check that the files of the last install of a plugin are still in place.
+
+    :param build_dir: The plugin build directory.
+    :type build_dir: str
+    :return: True if all the installed files exist.
+    :rtype: bool
+    """
+    try:
+        with open(os.path.join(build_dir, INSTALL_MANIFEST), 'r', encoding='utf-8') as file:
+            return all(os.path.exists(line.strip()) for line in file if line.strip())
+    except OSError:
+        return False
+
+
+def build_plugin(plugin_dir: str, jobs: int, rebuild: bool = False) -> Tuple[str, Optional[str]]:
+    """
+    Build and install a plugin, unless its sources did not change since its last successful build.
+
+    :param plugin_dir: The plugin directory, holding a CMakeLists.txt file.
+    :type plugin_dir: str
+    :param jobs: Number of parallel compilation jobs.
+    :type jobs: int
+    :param rebuild: Build the plugin even if its sources did not change.
+    :type rebuild: bool
+    :return: What was done (up to date, installed or built), and the build output if it failed.
+    :rtype: tuple[str, str or None]
+    """
+    build_dir = os.path.join(plugin_dir, BUILD_DIR)
+    hash_file = os.path.join(build_dir, SOURCE_HASH_FILE)
+    digest = source_digest(plugin_dir)
+    try:
+        with open(hash_file, 'r', encoding='utf-8') as file:
+            current = file.read().strip() == digest and not rebuild
+    except OSError:
+        current = False
+    if current and is_installed(build_dir):
+        return 'up to date', None
+
+    commands = [['cmake', '--install', build_dir]]
+    if not current:
+        commands.insert(0, ['cmake', '--build', build_dir, '--parallel', str(jobs)])
+        if not os.path.isfile(os.path.join(build_dir, 'CMakeCache.txt')):
+            commands.insert(0, ['cmake', '-S', plugin_dir, '-B', build_dir])
+    output = []
+    for command in commands:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        output.append(result.stdout)
+        if result.returncode != 0:
+            return 'failed', ''.join(output)
+    if not current:
+        write_atomically(hash_file, digest.encode('utf-8'))
+    return ('installed' if current else 'built'), None
+
+
+def build_plugins(plugins_dir: str, jobs: Optional[int] = None, rebuild: bool = False) -> bool:
+    """
+    Build the plugins of a directory in parallel.
+
+    :param plugins_dir: Directory holding one directory per plugin.
+    :type plugins_dir: str
+    :param jobs: Total number of compilation jobs, defaults to the number of CPUs.
+    :type jobs: int, optional
+    :param rebuild: Build all the plugins even if their sources did not change.
+    :type rebuild: bool
+    :return: True if all the plugins are built and installed.
+    :rtype: bool
+    """
+    if not os.path.isdir(plugins_dir):
+        return True
+    plugins = sorted(os.path.join(plugins_dir, name) for name in os.listdir(plugins_dir)
+                     if os.path.isfile(os.path.join(plugins_dir, name, 'CMakeLists.txt')))
+    if not plugins:
+        return True
+    # The compilation jobs are shared between the plugins built at the same time
+    plugin_jobs = max(1, (jobs or os.cpu_count() or 1) // len(plugins))
+    with ThreadPoolExecutor(max_workers=len(plugins)) as executor:
+        results = list(executor.map(lambda plugin: build_plugin(plugin, plugin_jobs, rebuild), plugins))
+    success = True
+    for plugin, (status, output) in zip(plugins, results):
+        if output is not None:
+            print(output)
+            success = False
+        print(f"Plugin {os.path.basename(plugin)}: {status}")
+    return success
+
+
+def main(config_file: str, plugins_dir: str = PLUGINS_DIR, jobs: Optional[int] = None,
+         rebuild: bool = False) -> None:
+    """
+    Main function to build the plugins and start the simulation.
+
+    :param config_file: Path to the YAML configuration file.
+    :type config_file: str
+    :param plugins_dir: Directory holding the gz plugins.
+    :type plugins_dir: str
+    :param jobs: Total number of compilation jobs, defaults to the number of CPUs.
+    :type jobs: int, optional
+    :param rebuild: Build all the plugins even if their sources did not change.
+    :type rebuild: bool
+    :return: None
+    :rtype: None
+    """
+    try:
+        config = read_config(config_file)
+    except (OSError, ValueError) as error:
+        print(f"Invalid configuration: {error}")
+        raise SystemExit(1)
+    if not build_plugins(plugins_dir, jobs, rebuild):
+        print("Plugin build failed. Exiting...")
+        raise SystemExit(1)
+
+    settings = dict(PX4_DIR=PX4_DIR, **config.tmuxinator_settings())
+    command = ['tmuxinator', 'start', 'px4_sitl', '-p', os.path.join(SCRIPT_DIR, 'simulation_tmux.yaml')]
+    command += [f"{key}={value}" for key, value in settings.items()]
+    # The panes run the helper scripts relative to the project root
+    raise SystemExit(subprocess.run(command, cwd=SCRIPT_DIR).returncode)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the gz plugins and launch a PX4 simulation")
+    parser.add_argument('config_file', help="Path to the simulation configuration YAML file")
+    parser.add_argument('--plugins-dir', default=PLUGINS_DIR, help="Directory holding the gz plugins")
+    parser.add_argument('--jobs', type=int, help="Number of compilation jobs, defaults to the number of CPUs")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Build all the plugins, even the ones whose sources did not change")
+    args = parser.parse_args()
+    main(args.config_file, args.plugins_dir, args.jobs, args.rebuild)
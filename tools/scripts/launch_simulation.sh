@@ -11,7 +11,8 @@
 #
 # This script is used to launch a PX4 simulation using the Tmuxinator tool.
 # It requires a configuration YAML file as an argument, which specifies the
-# simulation world and models to be used.
+# simulation world and models to be used. The work is done by
+# launch_simulation.py, which only rebuilds the gz plugins whose sources changed.
 #
 # Usage:
 #   ./launch_simulation.sh <configuration_file>
@@ -30,48 +31,8 @@ if [ "$#" -ne 1 ]; then
 fi
 
 # ------------------------------------------------------------------------------
-# Set up paths based on the script's directory
+# Build the changed gz plugins in parallel, read the configuration and start
+# Tmuxinator with the Python launcher
 # ------------------------------------------------------------------------------
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" &>/dev/null && pwd)"
-PX4_DIR="$SCRIPT_DIR/../../PX4-Autopilot"
-AIRFRAMES_DIR="$PX4_DIR/ROMFS/px4fmu_common/init.d-posix/airframes"
-
-# ------------------------------------------------------------------------------
-# Build gz plugins, if any. Exit if the build fails.
-# ------------------------------------------------------------------------------
-PLUGINS_DIR=/gz_plugins
-if [ -d "$PLUGINS_DIR" ]; then
-    for dir in $PLUGINS_DIR/*; do
-        if [ -d "$dir" ]; then
-            if [ -f "$dir/CMakeLists.txt" ]; then
-                PLUGIN_NAME=$(basename $dir)
-                PLUGIN_BUILD_DIR="$dir/build"
-                mkdir -p $PLUGIN_BUILD_DIR
-                cd $PLUGIN_BUILD_DIR
-                cmake ..
-                make -j4 || exit 1
-                make install || exit 1
-            fi
-        fi
-    done
-fi
-cd $SCRIPT_DIR
-
-# ------------------------------------------------------------------------------
-# Read the configuration file and extract required parameters
-# ------------------------------------------------------------------------------
-FILE_PATH=$1
-HEADLESS=$(yq e '.headless // false' $FILE_PATH)
-WORLD=$(yq e '.world' $FILE_PATH)
-MODEL_LIST=$(yq e '.models[].name' $FILE_PATH | paste -sd ':' -)
-POSES=$(yq e '.models[].pose | join(",")' $FILE_PATH | paste -sd ':' -)
-
-# ------------------------------------------------------------------------------
-# Launch the simulation using Tmuxinator with the extracted parameters
-# ------------------------------------------------------------------------------
-tmuxinator start px4_sitl -p $SCRIPT_DIR/simulation_tmux.yaml \
-    PX4_DIR=$PX4_DIR \
-    MODEL_LIST=$MODEL_LIST \
-    MODEL_POSITIONS=$POSES \
-    GZ_WORLD=$WORLD \
-    HEADLESS=$HEADLESS
+exec python3 "$SCRIPT_DIR/launch_simulation.py" "$1"
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Sweep and fit of the lift and drag coefficients of the gz_lift_drag_plugin.
+
+The force model of lift_drag_system.cpp is evaluated with NumPy on whole arrays of velocities and
+coefficients instead of one simulation run per candidate. The plugin applies, on the canonical link,
+a drag force opposed to the velocity and a lift force perpendicular to it in the vertical plane:
+
+    drag = -dragCoefficient * |v| * v
+    lift = liftCoefficient * (|v|^2 * z - v_z * v)
+
+where v is the world linear velocity of the link. The plugin uses the ground velocity, which is the
+zero wind case here; a wind, such as the one of a world file, makes the forces depend on the
+velocity relative to the air instead.
+
+The forces are linear in the coefficients, so a fit is a linear least squares problem. The thrust of
+a multirotor is along its body z axis, with an unknown magnitude: only the components of the
+measured force orthogonal to the thrust axis are fitted, from the velocity, acceleration and
+attitude estimates of ULog flight logs. The normal equations of all the samples are reduced to a
+2x2 matrix per wind hypothesis, so the fits of all the hypotheses are solved as one batch, and a
+grid of thousands of candidate coefficients is screened from the same matrices without going
+through the samples again.
+
+Usage:
+    python lift_drag_fit.py [--model NAME] sweep [--lift CL ...] [--drag CD ...] [--speeds MIN MAX STEP]
+    or
+    python lift_drag_fit.py [--model NAME] [--world NAME] fit <flight_or_log> [...] [--write]
+
+Options:
+    --model: Airframe of gz_sim/custom_airframes, for its mass and its model.sdf, defaults to quad_lift_drag.
+    --world: World of gz_sim/custom_worlds whose wind is evaluated, in addition to no wind.
+    --wind: Wind velocity (x y z, m/s, ENU), instead of the wind of a world.
+    --lift, --drag: Coefficients evaluated by the sweep, default to the ones of the model.
+    --speeds: Ground speeds of the sweep, in m/s.
+    --heading: Direction of the flight of the sweep, in degrees from the x axis.
+    --store: Directory of the ULog store holding the fitted flights.
+    --start, --end: Fitted window of each flight, in seconds from its start.
+    --min-speed: Samples slower than this speed relative to the air are not fitted.
+    --lift-range, --drag-range: Bounds of the screened coefficients.
+    --grid: Number of screened values of each coefficient.
+    --top: Number of screened candidates printed.
+    --write: Write the best coefficients to the model.sdf file of the model.
+"""
+
+import argparse
+import os
+import re
+from dataclasses import dataclass
+from os.path import abspath, dirname
+from typing import List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+import numpy as np
+
+from generate_airframe import file_digest, write_atomically
+from validate_airframe import AIRFRAMES_DIR, DEFAULT_MASS, scan_sdf
+
+WORLDS_DIR = os.path.join(dirname(abspath(__file__)), "..", "..", "gz_sim", "custom_worlds")
+DEFAULT_MODEL = "quad_lift_drag"
+PLUGIN_NAME = "lift_drag_system::LiftDragSystem"
+GRAVITY = 9.80665
+# Upward axis of the gz world, along which the plugin orients the lift
+UP = np.array([0.0, 0.0, 1.0])
+# Topics and fields of the ULog store used by the fit, the estimates being in NED
+POSITION_TOPIC = "vehicle_local_position"
+ATTITUDE_TOPIC = "vehicle_attitude"
+POSITION_FIELDS = ("vx", "vy", "vz", "ax", "ay", "az")
+ATTITUDE_FIELDS = ("q[0]", "q[1]", "q[2]", "q[3]")
+
+
+@dataclass
+class FlightSamples:
+    """
+    Samples of a flight used by the fit, in the ENU frame of the gz world.
+
+    :param velocity: The ground velocities (N x 3, m/s).
+    :param acceleration: The accelerations (N x 3, m/s^2).
+    :param thrust_axis: The body z axes, along which the rotors push (N x 3).
+    """
+    velocity: np.ndarray
+    acceleration: np.ndarray
+    thrust_axis: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.velocity)
+
+
+@dataclass
+class FitResult:
+    """
+    Least squares coefficients under a wind hypothesis.
+
+    :param wind: The wind velocity (m/s, ENU).
+    :param lift_coefficient: The fitted liftCoefficient.
+    :param drag_coefficient: The fitted dragCoefficient.
+    :param rms: Root mean square of the unexplained force per sample, in N.
+    :param samples: Number of fitted samples.
+    """
+    wind: Tuple[float, float, float]
+    lift_coefficient: float
+    drag_coefficient: float
+    rms: float
+    samples: int
+
+
+def force_basis(velocity: np.ndarray, wind: np.ndarray = np.zeros(3)) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the lift and drag forces of unit coefficients, which the coefficients scale.
+
+    The arrays broadcast: a batch of velocities (..., 3) with a batch of winds gives a batch of forces.
+
+    :param velocity: The ground velocities (..., 3, m/s).
+    :type velocity: np.ndarray
+    :param wind: The wind velocities (..., 3, m/s), the plugin assuming no wind.
+    :type wind: np.ndarray
+    :return: The lift and the drag forces (..., 3, N).
+    :rtype: tuple[np.ndarray, np.ndarray]
+    """
+    air = np.asarray(velocity, dtype=np.float64) - wind
+    squared_speed = np.einsum("...i,...i->...", air, air)[..., None]
+    # v x (-(v/|v|) x z) |v| expands to |v|^2 z - v_z v, without the normalization of the plugin
+    lift = squared_speed * UP - air[..., 2:3] * air
+    drag = -np.sqrt(squared_speed) * air
+    return lift, drag
+
+
+def lift_drag_forces(velocity: np.ndarray, lift_coefficient, drag_coefficient,
+                     wind: np.ndarray = np.zeros(3)) -> np.ndarray:
+    """
+    Returns the total force applied by the plugin.
+
+    :param velocity: The ground velocities (..., 3, m/s).
+    :type velocity: np.ndarray
+    :param lift_coefficient: The liftCoefficient, a scalar or an array broadcasting with the velocities.
+    :type lift_coefficient: float or np.ndarray
+    :param drag_coefficient: The dragCoefficient, a scalar or an array broadcasting with the velocities.
+    :type drag_coefficient: float or np.ndarray
+    :param wind: The wind velocities (..., 3, m/s).
+    :type wind: np.ndarray
+    :return: The forces (..., 3, N).
+    :rtype: np.ndarray
+    """
+    lift, drag = force_basis(velocity, wind)
+    return np.asarray(lift_coefficient)[..., None] * lift + np.asarray(drag_coefficient)[..., None] * drag
+
+
+def model_sdf(model: str) -> str:
+    """
+    Returns the SDF file of a custom airframe, or the given path if it is a file.
+
+    :param model: The airframe name or the path to its SDF file.
+    :type model: str
+    :return: The path to the SDF file.
+    :rtype: str
+    """
+    return model if os.path.isfile(model) else os.path.join(AIRFRAMES_DIR, model, "model.sdf")
+
+
+def model_mass(path: str) -> float:
+    """
+    Returns the total mass of the links of a model, on which the forces act.
+
+    :param path: Path to the SDF file.
+    :type path: str
+    :return: The mass in kg.
+    :rtype: float
+    """
+    links = scan_sdf(path).links.values()
+    return sum(float(link.mass) if link.mass is not None else DEFAULT_MASS for link in links)
+
+
+def read_coefficients(path: str) -> Tuple[float, float]:
+    """
+    Reads the coefficients of the lift/drag plugin of a model.
+
+    :param path: Path to the SDF file.
+    :type path: str
+    :return: The liftCoefficient and dragCoefficient, 0 when missing as in the plugin.
+    :rtype: tuple[float, float]
+    :raises ValueError: If the model has no lift/drag plugin.
+    """
+    for plugin in ElementTree.parse(path).getroot().iter("plugin"):
+        if plugin.get("name") == PLUGIN_NAME:
+            return tuple(float(plugin.findtext(name, "0")) for name in ("liftCoefficient", "dragCoefficient"))
+    raise ValueError(f"{path} has no {PLUGIN_NAME} plugin")
+
+
+def write_coefficients(path: str, lift_coefficient: float, drag_coefficient: float) -> None:
+    """
+    Replaces the coefficients of the lift/drag plugin of a model, leaving the rest of the file as is.
+
+    :param path: Path to the SDF file.
+    :type path: str
+    :param lift_coefficient: The new liftCoefficient.
+    :type lift_coefficient: float
+    :param drag_coefficient: The new dragCoefficient.
+    :type drag_coefficient: float
+    :raises ValueError: If the model has no lift/drag plugin with both coefficients.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        content = file.read()
+    plugin = re.search(r"<plugin\b[^>]*name=[\"']" + re.escape(PLUGIN_NAME) + r"[\"'][^>]*>.*?</plugin>",
+                       content, re.DOTALL)
+    if plugin is None:
+        raise ValueError(f"{path} has no {PLUGIN_NAME} plugin")
+    block = plugin.group(0)
+    for name, value in (("liftCoefficient", lift_coefficient), ("dragCoefficient", drag_coefficient)):
+        block, count = re.subn(rf"(<{name}>)[^<]*(</{name}>)", rf"\g<1>{value:.6g}\g<2>", block)
+        if not count:
+            raise ValueError(f"The {PLUGIN_NAME} plugin of {path} has no {name}")
+    write_atomically(path, (content[:plugin.start()] + block + content[plugin.end():]).encode("utf-8"))
+
+
+def world_wind(world: str) -> np.ndarray:
+    """
+    Reads the wind of a world.
+
+    :param world: The world name in gz_sim/custom_worlds, or the path to its SDF file.
+    :type world: str
+    :return: The wind velocity (m/s, ENU), zero if the world has no wind.
+    :rtype: np.ndarray
+    """
+    path = world if os.path.isfile(world) else os.path.join(WORLDS_DIR, f"{world}.sdf")
+    text = ElementTree.parse(path).getroot().findtext("world/wind/linear_velocity")
+    return np.array([float(value) for value in text.split()]) if text else np.zeros(3)
+
+
+def sweep(lift_coefficients: Sequence[float], drag_coefficients: Sequence[float], speeds: np.ndarray,
+          mass: float, heading: float = 0.0, wind: np.ndarray = np.zeros(3)) -> np.ndarray:
+    """
+    Evaluates the forces of every pair of coefficients at every ground speed of a level flight.
+
+    The tilt is the one of a thrust balancing the weight and the aerodynamic force, so that the ground
+    speed is held, which can be compared with the attitude of real flights.
+
+    :param lift_coefficients: The liftCoefficient values.
+    :type lift_coefficients: Sequence[float]
+    :param drag_coefficients: The dragCoefficient values.
+    :type drag_coefficients: Sequence[float]
+    :param speeds: The ground speeds, in m/s.
+    :type speeds: np.ndarray
+    :param mass: The mass of the vehicle, in kg.
+    :type mass: float
+    :param heading: Direction of the flight, in radians from the x axis.
+    :type heading: float
+    :param wind: The wind velocity (m/s, ENU).
+    :type wind: np.ndarray
+    :return: Rows of liftCoefficient, dragCoefficient, speed, horizontal force (N), vertical force (N),
+        tilt (deg) and thrust over weight, for every combination.
+    :rtype: np.ndarray
+    """
+    lift, drag, speed = np.meshgrid(lift_coefficients, drag_coefficients, speeds, indexing="ij")
+    velocity = speed[..., None] * np.array([np.cos(heading), np.sin(heading), 0.0])
+    force = lift_drag_forces(velocity, lift, drag, wind)
+    # The thrust makes up for the weight and the aerodynamic force
+    thrust = mass * GRAVITY * UP - force
+    horizontal = np.hypot(force[..., 0], force[..., 1])
+    tilt = np.degrees(np.arctan2(np.hypot(thrust[..., 0], thrust[..., 1]), thrust[..., 2]))
+    ratio = np.linalg.norm(thrust, axis=-1) / (mass * GRAVITY)
+    return np.column_stack([values.ravel() for values in (lift, drag, speed, horizontal, force[..., 2], tilt, ratio)])
+
+
+def load_flight(store, flight: str, start: Optional[float] = None, end: Optional[float] = None) -> FlightSamples:
+    """
+    Reads the velocity, acceleration and attitude estimates of a flight of the ULog store.
+
+    The attitude is interpolated at the timestamps of the local position.
+
+    :param store: The ULog store.
+    :type store: ulog_store.UlogStore
+    :param flight: The flight identifier or a unique prefix.
+    :type flight: str
+    :param start: Start of the window, in seconds from the start of the flight.
+    :type start: float, optional
+    :param end: End of the window, in seconds from the start of the flight.
+    :type end: float, optional
+    :return: The samples, in the ENU frame.
+    :rtype: FlightSamples
+    :raises KeyError: If the flight or its estimates are not in the store.
+    """
+    position = store.query(flight, POSITION_TOPIC, start, end, POSITION_FIELDS)
+    attitude = store.query(flight, ATTITUDE_TOPIC, start, end, ATTITUDE_FIELDS)
+    time = position["timestamp"].astype(np.float64)
+    w, x, y, z = (np.interp(time, attitude["timestamp"].astype(np.float64), attitude[name]) for name in ATTITUDE_FIELDS)
+    norm = np.sqrt(w * w + x * x + y * y + z * z)
+    w, x, y, z = w / norm, x / norm, y / norm, z / norm
+    # Third column of the FRD to NED rotation, the body z axis in NED
+    axis_ned = np.column_stack((2 * (x * z + w * y), 2 * (y * z - w * x), 1 - 2 * (x * x + y * y)))
+
+    def to_enu(north: np.ndarray, east: np.ndarray, down: np.ndarray) -> np.ndarray:
+        return np.column_stack((east, north, -down)).astype(np.float64)
+
+    samples = FlightSamples(to_enu(position["vx"], position["vy"], position["vz"]),
+                            to_enu(position["ax"], position["ay"], position["az"]),
+                            to_enu(axis_ned[:, 0], axis_ned[:, 1], axis_ned[:, 2]))
+    valid = np.all(np.isfinite(np.hstack((samples.velocity, samples.acceleration, samples.thrust_axis))), axis=1)
+    return FlightSamples(samples.velocity[valid], samples.acceleration[valid], samples.thrust_axis[valid])
+
+
+def normal_equations(samples: FlightSamples, mass: float, winds: np.ndarray,
+                     min_speed: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reduces the samples to the normal equations of the fit under each wind hypothesis.
+
+    The measured aerodynamic force is the mass times the acceleration minus the weight, and both the
+    measured and the modelled forces are projected orthogonally to the thrust axis.
+
+    :param samples: The flight samples.
+    :type samples: FlightSamples
+    :param mass: The mass of the vehicle, in kg.
+    :type mass: float
+    :param winds: The wind hypotheses (W x 3, m/s).
+    :type winds: np.ndarray
+    :param min_speed: Samples slower than this speed relative to the air are left out.
+    :type min_speed: float
+    :return: The Gram matrices (W x 2 x 2), the right-hand sides (W x 2), the squared norms of the
+        measured forces (W) and the numbers of fitted samples (W).
+    :rtype: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    """
+    measured = mass * (samples.acceleration + GRAVITY * UP)
+    axis = samples.thrust_axis
+    lift, drag = force_basis(samples.velocity[None], winds[:, None])
+    # Columns of the model, lift then drag, for every wind and sample (W x N x 3 x 2)
+    basis = np.stack((lift, drag), axis=-1)
+    basis -= axis[None, :, :, None] * np.einsum("nk,wnkc->wnc", axis, basis)[:, :, None, :]
+    target = measured - axis * np.einsum("nk,nk->n", axis, measured)[:, None]
+    air = samples.velocity[None] - winds[:, None]
+    weights = (np.einsum("wnk,wnk->wn", air, air) >= min_speed ** 2).astype(np.float64)
+    gram = np.einsum("wn,wnkc,wnkd->wcd", weights, basis, basis)
+    rhs = np.einsum("wn,wnkc,nk->wc", weights, basis, target)
+    norm = weights @ np.einsum("nk,nk->n", target, target)
+    return gram, rhs, norm, weights.sum(axis=1)
+
+
+def fit(samples: Sequence[FlightSamples], mass: float, winds: np.ndarray,
+        min_speed: float = 1.0) -> Tuple[List[FitResult], Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Fits the coefficients to flights, under each wind hypothesis, as one batched least squares solve.
+
+    :param samples: The samples of each flight.
+    :type samples: Sequence[FlightSamples]
+    :param mass: The mass of the vehicle, in kg.
+    :type mass: float
+    :param winds: The wind hypotheses (W x 3, m/s).
+    :type winds: np.ndarray
+    :param min_speed: Samples slower than this speed relative to the air are left out.
+    :type min_speed: float
+    :return: The fit of each wind, and the summed normal equations for screening candidates.
+    :rtype: tuple[list[FitResult], tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]
+    :raises ValueError: If a wind leaves no sample to fit.
+    """
+    equations = [normal_equations(flight, mass, winds, min_speed) for flight in samples]
+    gram, rhs, norm, count = (sum(terms) for terms in zip(*equations))
+    if np.any(count == 0):
+        raise ValueError(f"No sample is faster than {min_speed} m/s relative to the air")
+    # A tiny ridge keeps the batch solvable when the flights do not excite the lift, e.g. level flight
+    ridge = 1e-12 * np.trace(gram, axis1=1, axis2=2)[:, None, None] * np.eye(2)
+    solution = np.linalg.solve(gram + ridge, rhs[..., None])[..., 0]
+    results = [FitResult(tuple(float(value) for value in wind), float(lift), float(drag),
+                         float(np.sqrt(max(residual, 0.0) / samples_count)), int(samples_count))
+               for wind, (lift, drag), residual, samples_count
+               in zip(winds, solution, screen(gram, rhs, norm, solution[:, None])[:, 0], count)]
+    return results, (gram, rhs, norm, count)
+
+
+def screen(gram: np.ndarray, rhs: np.ndarray, norm: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """
+    Returns the sum of the squared residuals of candidate coefficients, from the normal equations.
+
+    :param gram: The Gram matrices (W x 2 x 2).
+    :type gram: np.ndarray
+    :param rhs: The right-hand sides (W x 2).
+    :type rhs: np.ndarray
+    :param norm: The squared norms of the measured forces (W).
+    :type norm: np.ndarray
+    :param candidates: The liftCoefficient and dragCoefficient of each candidate (W x K x 2, or K x 2).
+    :type candidates: np.ndarray
+    :return: The sums of squared residuals, in N^2 (W x K).
+    :rtype: np.ndarray
+    """
+    candidates = np.broadcast_to(candidates, (len(gram),) + np.shape(candidates)[-2:])
+    return (norm[:, None] - 2 * np.einsum("wkc,wc->wk", candidates, rhs)
+            + np.einsum("wkc,wcd,wkd->wk", candidates, gram, candidates))
+
+
+def parse_vector(values: Sequence[str]) -> np.ndarray:
+    return np.array([float(value) for value in values])
+
+
+def main() -> None:
+    """
+    Main function to parse arguments and run a sweep or a fit.
+    """
+    parser = argparse.ArgumentParser(description="Sweep and fit the coefficients of the gz lift/drag plugin")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Custom airframe name or path to its model.sdf")
+    wind = parser.add_mutually_exclusive_group()
+    wind.add_argument("--world", help="Custom world whose wind is evaluated, in addition to no wind")
+    wind.add_argument("--wind", nargs=3, metavar=("X", "Y", "Z"), help="Wind velocity (m/s, ENU)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sweeping = commands.add_parser("sweep", help="Tabulate the forces of coefficients over ground speeds")
+    sweeping.add_argument("--lift", type=float, nargs="+", help="liftCoefficient values, default to the model's")
+    sweeping.add_argument("--drag", type=float, nargs="+", help="dragCoefficient values, default to the model's")
+    sweeping.add_argument("--speeds", type=float, nargs=3, default=(0.0, 15.0, 2.5), metavar=("MIN", "MAX", "STEP"),
+                          help="Ground speeds, in m/s")
+    sweeping.add_argument("--heading", type=float, default=0.0, help="Flight direction, in degrees from the x axis")
+
+    fitting = commands.add_parser("fit", help="Fit the coefficients to flights of the ULog store")
+    fitting.add_argument("flights", nargs="+", help="Flight identifiers or unique prefixes, or .ulg files to ingest")
+    fitting.add_argument("--store", help="Directory of the ULog store, defaults to log/.ulog_store")
+    fitting.add_argument("--start", type=float, help="Start of the window, in seconds from the flight start")
+    fitting.add_argument("--end", type=float, help="End of the window, in seconds from the flight start")
+    fitting.add_argument("--min-speed", type=float, default=1.0, help="Minimum speed relative to the air, in m/s")
+    fitting.add_argument("--lift-range", type=float, nargs=2, default=(0.0, 0.5), metavar=("MIN", "MAX"),
+                         help="Bounds of the screened liftCoefficient")
+    fitting.add_argument("--drag-range", type=float, nargs=2, default=(0.0, 2.0), metavar=("MIN", "MAX"),
+                         help="Bounds of the screened dragCoefficient")
+    fitting.add_argument("--grid", type=int, default=200, help="Number of screened values of each coefficient")
+    fitting.add_argument("--top", type=int, default=5, help="Number of screened candidates printed")
+    fitting.add_argument("--write", action="store_true", help="Write the best coefficients to the model.sdf file")
+    args = parser.parse_args()
+
+    path = model_sdf(args.model)
+    mass = model_mass(path)
+    winds = [np.zeros(3)]
+    if args.world:
+        winds.append(world_wind(args.world))
+    elif args.wind:
+        winds.append(parse_vector(args.wind))
+    winds = np.unique(np.array(winds), axis=0)
+
+    if args.command == "sweep":
+        try:
+            model_lift, model_drag = read_coefficients(path) if not (args.lift and args.drag) else (0.0, 0.0)
+        except ValueError as error:
+            print(f"Error: {error.args[0]}, give the coefficients with --lift and --drag")
+            raise SystemExit(1)
+        speeds = np.arange(args.speeds[0], args.speeds[1] + args.speeds[2] / 2, args.speeds[2])
+        print(f"{'wind':>16} {'lift':>8} {'drag':>8} {'speed':>7} {'F_horiz':>9} {'F_vert':>9} {'tilt':>7} {'T/W':>6}")
+        for wind_velocity in winds:
+            rows = sweep(args.lift or [model_lift], args.drag or [model_drag], speeds, mass,
+                         np.radians(args.heading), wind_velocity)
+            label = " ".join(f"{value:g}" for value in wind_velocity)
+            for lift, drag, speed, horizontal, vertical, tilt, ratio in rows:
+                print(f"{label:>16} {lift:8.4g} {drag:8.4g} {speed:7.2f} {horizontal:9.3f} {vertical:9.3f} "
+                      f"{tilt:7.2f} {ratio:6.3f}")
+        return
+
+    from ulog_store import FLIGHT_ID_DIGITS, STORE_DIR, UlogStore
+    store = UlogStore(args.store or STORE_DIR)
+    try:
+        flights = []
+        for reference in args.flights:
+            if reference.endswith(".ulg"):
+                for log_path, status in store.ingest([reference]):
+                    if status.startswith("failed"):
+                        raise KeyError(f"{log_path}: {status}")
+                # A copy of an ingested log is not ingested again, its digest still identifies the flight
+                reference = file_digest(reference)[:FLIGHT_ID_DIGITS]
+            flights.append(load_flight(store, reference, args.start, args.end))
+        results, (gram, rhs, norm, count) = fit(flights, mass, winds, args.min_speed)
+    except (KeyError, ValueError) as error:
+        print(f"Error: {error.args[0]}")
+        raise SystemExit(1)
+
+    print(f"Mass {mass:.3f} kg, {sum(len(flight) for flight in flights)} samples")
+    for result in results:
+        print(f"wind {' '.join(f'{value:g}' for value in result.wind):>12}: lift {result.lift_coefficient:.5g}, "
+              f"drag {result.drag_coefficient:.5g}, rms {result.rms:.4f} N over {result.samples} samples")
+
+    # Screening of the candidate grid under every wind at once
+    lift, drag = np.meshgrid(np.linspace(*args.lift_range, args.grid), np.linspace(*args.drag_range, args.grid),
+                             indexing="ij")
+    candidates = np.column_stack((lift.ravel(), drag.ravel()))
+    rms = np.sqrt(np.maximum(screen(gram, rhs, norm, candidates), 0.0) / count[:, None])
+    best_wind, best = np.unravel_index(np.argsort(rms, axis=None)[:args.top], rms.shape)
+    print(f"Best of {len(candidates)} candidates in the bounds:")
+    for wind_index, index in zip(best_wind, best):
+        print(f"  wind {' '.join(f'{value:g}' for value in winds[wind_index]):>12}: lift {candidates[index, 0]:.5g}, "
+              f"drag {candidates[index, 1]:.5g}, rms {rms[wind_index, index]:.4f} N")
+
+    # The least squares solution is kept when it is in the bounds, the best candidate otherwise
+    result = min(results, key=lambda fitted: fitted.rms)
+    if (args.lift_range[0] <= result.lift_coefficient <= args.lift_range[1]
+            and args.drag_range[0] <= result.drag_coefficient <= args.drag_range[1]):
+        coefficients = (result.lift_coefficient, result.drag_coefficient)
+    else:
+        coefficients = tuple(candidates[best[0]])
+    if args.write:
+        write_coefficients(path, *coefficients)
+        print(f"Wrote lift {coefficients[0]:.6g}, drag {coefficients[1]:.6g} to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Local MAVLink vehicle stand-in used to test and benchmark parameters_upload.py without hardware.
+
+The stand-in holds a parameter table and answers heartbeats, PARAM_SET, PARAM_REQUEST_LIST,
+PARAM_REQUEST_READ (including the PX4 _HASH_CHECK), AUTOPILOT_VERSION requests and reboot
+commands. It also keeps an in-memory file system behind the MAVLink FTP commands used to write
+files, and a shell whose `param import` command loads a PX4 parameter file (BSON). The link to the
+ground station can be degraded with latency, jitter, a limited baud rate, packet loss, reordering
+and duplicated messages.
+
+Usage:
+    python mavlink_vehicle_standin.py --udp 127.0.0.1:14560 --count 300
+    python parameters_upload.py --port udpout:127.0.0.1:14560 --file params.txt
+    or
+    python mavlink_vehicle_standin.py --pty --params params.txt --baud 57600 --loss 0.05
+    python parameters_upload.py --port <printed pty device> --file params.txt
+
+Options:
+    --udp: Local UDP address the stand-in listens on, the ground station connects with udpout.
+    --pty: Expose the stand-in on a pseudo-terminal instead, its device path is printed.
+    --params: Parameters file (one `name value` pair per line) used as the initial table.
+    --count: Number of generated parameters added to the table.
+    --latency, --jitter, --baud, --loss, --duplicate, --reorder: Link conditions.
+"""
+
+import argparse
+import heapq
+import os
+import random
+import select
+import socket
+import struct
+import threading
+import time
+import tty
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from pymavlink import mavutil
+
+HASH_CHECK_PARAM = "_HASH_CHECK"
+FIRMWARE_VERSION = 0x010F0000
+# MAVLink FTP payload: seq, session, opcode, size, req_opcode, burst_complete, padding, offset, data
+FTP_HEADER = struct.Struct("<HBBBBBBI")
+FTP_PAYLOAD_SIZE = 251
+FTP_TERMINATE_SESSION = 1
+FTP_RESET_SESSIONS = 2
+FTP_CREATE_FILE = 6
+FTP_WRITE_FILE = 7
+FTP_REMOVE_FILE = 8
+FTP_CALC_FILE_CRC32 = 14
+FTP_ACK = 128
+FTP_NAK = 129
+FTP_ERROR_FAIL = 1
+FTP_ERROR_INVALID_SESSION = 4
+FTP_ERROR_UNKNOWN_COMMAND = 7
+FTP_ERROR_FILE_NOT_FOUND = 10
+SHELL_PROMPT = "nsh> "
+SERIAL_CONTROL_DATA_SIZE = 70
+
+
+@dataclass
+class LinkConditions:
+    """
+    Impairments applied to both directions of the stand-in link.
+
+    :param latency: One-way latency in seconds.
+    :param jitter: Maximum random latency added to each message, in seconds.
+    :param baud: Serial baud rate used to compute the transmission time of each message, None for no limit.
+    :param loss: Probability of dropping a message.
+    :param duplicate: Probability of sending a message twice.
+    :param reorder: Probability of delaying a message by `reorder_delay` so that it arrives out of order.
+    :param reorder_delay: Extra delay in seconds of reordered messages.
+    :param seed: Seed of the random generator, for reproducible runs.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    baud: Optional[int] = None
+    loss: float = 0.0
+    duplicate: float = 0.0
+    reorder: float = 0.0
+    reorder_delay: float = 0.05
+    seed: Optional[int] = None
+
+
+@dataclass
+class StandInStats:
+    """
+    Counters of the messages seen by the stand-in.
+
+    :param received: Messages received from the ground station, dropped ones included.
+    :param sent: Messages sent to the ground station, dropped and duplicated ones included.
+    :param dropped: Messages dropped in either direction.
+    :param param_sets: PARAM_SET messages received, dropped ones included.
+    :param param_reads: PARAM_REQUEST_READ messages received, dropped ones included.
+    :param list_requests: PARAM_REQUEST_LIST messages received, dropped ones included.
+    :param reboots: Reboot commands handled.
+    :param ftp_requests: FILE_TRANSFER_PROTOCOL messages received, dropped ones included.
+    :param shell_commands: Shell command lines run.
+    """
+    received: int = 0
+    sent: int = 0
+    dropped: int = 0
+    param_sets: int = 0
+    param_reads: int = 0
+    list_requests: int = 0
+    reboots: int = 0
+    ftp_requests: int = 0
+    shell_commands: int = 0
+
+
+class UdpTransport:
+    """
+    UDP transport answering the last ground station address it received from.
+
+    :param host: Local address to bind.
+    :param port: Local port to bind, 0 for any free port.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 14560):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.peer: Optional[Tuple[str, int]] = None
+        self.device = "udpout:{}:{}".format(*self.socket.getsockname())
+
+    def read(self, timeout: float) -> bytes:
+        ready, _, _ = select.select([self.socket], [], [], timeout)
+        if not ready:
+            return b""
+        data, self.peer = self.socket.recvfrom(65535)
+        return data
+
+    def write(self, data: bytes) -> None:
+        if self.peer is not None:
+            self.socket.sendto(data, self.peer)
+
+    def close(self) -> None:
+        self.socket.close()
+
+
+class PtyTransport:
+    """
+    Pseudo-terminal transport, the ground station opens `device` as a serial port.
+    """
+
+    def __init__(self):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.device = os.ttyname(self.slave)
+        self.peer = True
+
+    def read(self, timeout: float) -> bytes:
+        ready, _, _ = select.select([self.master], [], [], timeout)
+        if not ready:
+            return b""
+        try:
+            return os.read(self.master, 4096)
+        except OSError:
+            return b""
+
+    def write(self, data: bytes) -> None:
+        os.write(self.master, data)
+
+    def close(self) -> None:
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class VehicleStandIn:
+    """
+    MAVLink vehicle holding a parameter table behind an impaired link.
+
+    :param transport: The UdpTransport or PtyTransport to serve on.
+    :param parameters: Initial parameter table, (value encoded as PARAM_VALUE float, MAV_PARAM_TYPE) by name.
+    :param conditions: Impairments of the link.
+    :param sysid: MAVLink system id of the vehicle.
+    :param compid: MAVLink component id of the vehicle.
+    """
+
+    def __init__(self, transport, parameters: Dict[str, Tuple[float, int]],
+                 conditions: Optional[LinkConditions] = None, sysid: int = 1, compid: int = 1):
+        self.transport = transport
+        self.parameters: Dict[str, Tuple[float, int]] = OrderedDict(parameters)
+        self.conditions = conditions or LinkConditions()
+        self.stats = StandInStats()
+        self.mav = mavutil.mavlink.MAVLink(None, srcSystem=sysid, srcComponent=compid)
+        self.mav.robust_parsing = True
+        self.random = random.Random(self.conditions.seed)
+        self._handlers: Dict[str, Callable] = {
+            "PARAM_SET": self._handle_param_set,
+            "PARAM_REQUEST_LIST": self._handle_param_request_list,
+            "PARAM_REQUEST_READ": self._handle_param_request_read,
+            "COMMAND_LONG": self._handle_command_long,
+            "FILE_TRANSFER_PROTOCOL": self._handle_ftp,
+            "SERIAL_CONTROL": self._handle_serial_control,
+        }
+        # In-memory file system of the FTP commands, open sessions and last answer for resent requests
+        self.files: Dict[str, bytearray] = {}
+        self._ftp_sessions: Dict[int, str] = {}
+        self._ftp_last: Optional[Tuple[int, bytes]] = None
+        self._shell_input = ""
+        self._events: List[Tuple[float, int, Callable]] = []
+        self._event_count = 0
+        self._condition = threading.Condition()
+        self._tx_free = 0.0
+        self._rx_free = 0.0
+        self._running = False
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def device(self) -> str:
+        """
+        Connection string the ground station should use.
+        """
+        return self.transport.device
+
+    def start(self) -> "VehicleStandIn":
+        """
+        Starts the receive and scheduler threads.
+        """
+        self._running = True
+        self._threads = [threading.Thread(target=self._receive_loop, daemon=True),
+                         threading.Thread(target=self._scheduler_loop, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        self._schedule(time.monotonic(), self._heartbeat)
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the threads and closes the transport.
+        """
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self.transport.close()
+
+    def __enter__(self) -> "VehicleStandIn":
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def parameter_hash(self) -> int:
+        """
+        Returns a CRC32 over the parameter names and values, standing for the PX4 parameter hash.
+        """
+        crc = 0
+        for name, (value, _) in self.parameters.items():
+            crc = zlib.crc32(name.encode("utf8"), crc)
+            crc = zlib.crc32(struct.pack("f", value), crc)
+        return crc
+
+    def send(self, msg) -> None:
+        """
+        Sends a message to the ground station through the impaired link.
+
+        :param msg: The MAVLink message to send.
+        """
+        with self._condition:
+            data = msg.pack(self.mav)
+            copies = 2 if self.random.random() < self.conditions.duplicate else 1
+            for _ in range(copies):
+                self.stats.sent += 1
+                if self.random.random() < self.conditions.loss:
+                    self.stats.dropped += 1
+                    continue
+                self._tx_free = self._transmission_end(self._tx_free, len(data))
+                self._schedule(self._tx_free + self._delay(), lambda: self.transport.write(data))
+
+    def _transmission_end(self, free: float, size: int) -> float:
+        start = max(time.monotonic(), free)
+        if self.conditions.baud:
+            # 8N1 serial framing, 10 bits per byte
+            return start + size * 10 / self.conditions.baud
+        return start
+
+    def _delay(self) -> float:
+        delay = self.conditions.latency + self.random.uniform(0.0, self.conditions.jitter)
+        if self.random.random() < self.conditions.reorder:
+            delay += self.conditions.reorder_delay
+        return delay
+
+    def _schedule(self, when: float, action: Callable) -> None:
+        with self._condition:
+            self._event_count += 1
+            heapq.heappush(self._events, (when, self._event_count, action))
+            self._condition.notify()
+
+    def _scheduler_loop(self) -> None:
+        while self._running:
+            with self._condition:
+                if not self._events:
+                    self._condition.wait(0.1)
+                    continue
+                when, _, action = self._events[0]
+                wait = when - time.monotonic()
+                if wait > 0:
+                    self._condition.wait(wait)
+                    continue
+                heapq.heappop(self._events)
+            action()
+
+    def _receive_loop(self) -> None:
+        while self._running:
+            data = self.transport.read(0.05)
+            if not data:
+                continue
+            for msg in self.mav.parse_buffer(data) or []:
+                self._receive(msg, len(msg.get_msgbuf()))
+
+    def _receive(self, msg, size: int) -> None:
+        msg_type = msg.get_type()
+        if msg_type == "BAD_DATA":
+            return
+        with self._condition:
+            self.stats.received += 1
+            if msg_type == "PARAM_SET":
+                self.stats.param_sets += 1
+            elif msg_type == "PARAM_REQUEST_READ":
+                self.stats.param_reads += 1
+            elif msg_type == "PARAM_REQUEST_LIST":
+                self.stats.list_requests += 1
+            elif msg_type == "FILE_TRANSFER_PROTOCOL":
+                self.stats.ftp_requests += 1
+            if self.random.random() < self.conditions.loss:
+                self.stats.dropped += 1
+                return
+            handler = self._handlers.get(msg_type)
+            if handler is None:
+                return
+            self._rx_free = self._transmission_end(self._rx_free, size)
+            self._schedule(self._rx_free + self._delay(), lambda: handler(msg))
+
+    def _heartbeat(self) -> None:
+        if not self._running:
+            return
+        if self.transport.peer is not None:
+            self.send(self.mav.heartbeat_encode(
+                mavutil.mavlink.MAV_TYPE_QUADROTOR, mavutil.mavlink.MAV_AUTOPILOT_PX4, 0, 0,
+                mavutil.mavlink.MAV_STATE_STANDBY))
+        self._schedule(time.monotonic() + (1.0 if self.transport.peer is not None else 0.05), self._heartbeat)
+
+    def _param_value(self, name: str, value: float, param_type: int, index: int):
+        return self.mav.param_value_encode(
+            name.encode("utf8"), value, param_type, len(self.parameters), index)
+
+    def _send_param(self, name: str) -> None:
+        value, param_type = self.parameters[name]
+        self.send(self._param_value(name, value, param_type, list(self.parameters).index(name)))
+
+    def _send_hash(self) -> None:
+        value = struct.unpack("f", struct.pack("I", self.parameter_hash()))[0]
+        self.send(self._param_value(HASH_CHECK_PARAM, value, mavutil.mavlink.MAV_PARAM_TYPE_UINT32, 65535))
+
+    def _handle_param_set(self, msg) -> None:
+        if msg.param_id not in self.parameters:
+            return
+        _, param_type = self.parameters[msg.param_id]
+        self.parameters[msg.param_id] = (msg.param_value, msg.param_type or param_type)
+        self._send_param(msg.param_id)
+
+    def _handle_param_request_list(self, _) -> None:
+        for index, (name, (value, param_type)) in enumerate(list(self.parameters.items())):
+            self.send(self._param_value(name, value, param_type, index))
+        self._send_hash()
+
+    def _handle_param_request_read(self, msg) -> None:
+        if msg.param_index >= 0:
+            if msg.param_index < len(self.parameters):
+                self._send_param(list(self.parameters)[msg.param_index])
+        elif msg.param_id == HASH_CHECK_PARAM:
+            self._send_hash()
+        elif msg.param_id in self.parameters:
+            self._send_param(msg.param_id)
+
+    def _handle_command_long(self, msg) -> None:
+        result = mavutil.mavlink.MAV_RESULT_ACCEPTED
+        if (msg.command == mavutil.mavlink.MAV_CMD_REQUEST_MESSAGE
+                and int(msg.param1) == mavutil.mavlink.MAVLINK_MSG_ID_AUTOPILOT_VERSION):
+            self.send(self.mav.autopilot_version_encode(
+                0, FIRMWARE_VERSION, 0, 0, 0, [0] * 8, [0] * 8, [0] * 8, 0, 0, 0))
+        elif msg.command == mavutil.mavlink.MAV_CMD_PREFLIGHT_REBOOT_SHUTDOWN:
+            self.stats.reboots += 1
+        else:
+            result = mavutil.mavlink.MAV_RESULT_UNSUPPORTED
+        self.send(self.mav.command_ack_encode(msg.command, result))
+
+    def _ftp_answer(self, seq: int, opcode: int, data: bytes = b"", nak: bool = False, session: int = 0) -> bytes:
+        header = FTP_HEADER.pack((seq + 1) & 0xFFFF, session, FTP_NAK if nak else FTP_ACK, len(data), opcode,
+                                 0, 0, 0)
+        return (header + data).ljust(FTP_PAYLOAD_SIZE, b"\0")
+
+    def _handle_ftp(self, msg) -> None:
+        payload = bytes(msg.payload)
+        seq, session, opcode, size, _, _, _, offset = FTP_HEADER.unpack_from(payload)
+        data = payload[FTP_HEADER.size:FTP_HEADER.size + size]
+        if self._ftp_last is not None and self._ftp_last[0] == seq:
+            # A resent request whose answer was lost is answered again without being run twice
+            answer = self._ftp_last[1]
+        else:
+            answer = self._run_ftp(seq, session, opcode, data, offset)
+            self._ftp_last = (seq, answer)
+        self.send(self.mav.file_transfer_protocol_encode(0, 0, 0, list(answer)))
+
+    def _run_ftp(self, seq: int, session: int, opcode: int, data: bytes, offset: int) -> bytes:
+        if opcode == FTP_RESET_SESSIONS:
+            self._ftp_sessions.clear()
+        elif opcode == FTP_CREATE_FILE:
+            path = data.decode("utf8")
+            self.files[path] = bytearray()
+            session = len(self._ftp_sessions)
+            self._ftp_sessions[session] = path
+            # As in PX4, the session is given in the header and the ACK carries no data
+            return self._ftp_answer(seq, opcode, session=session)
+        elif opcode == FTP_TERMINATE_SESSION:
+            self._ftp_sessions.pop(session, None)
+        elif opcode == FTP_WRITE_FILE:
+            if session not in self._ftp_sessions:
+                return self._ftp_answer(seq, opcode, bytes([FTP_ERROR_INVALID_SESSION]), nak=True)
+            content = self.files[self._ftp_sessions[session]]
+            if len(content) < offset:
+                content.extend(bytes(offset - len(content)))
+            content[offset:offset + len(data)] = data
+        elif opcode in (FTP_REMOVE_FILE, FTP_CALC_FILE_CRC32):
+            path = data.decode("utf8")
+            if path not in self.files:
+                return self._ftp_answer(seq, opcode, bytes([FTP_ERROR_FILE_NOT_FOUND]), nak=True)
+            if opcode == FTP_CALC_FILE_CRC32:
+                # CRC32 of PX4, without the initial and final inversions of zlib
+                crc = zlib.crc32(bytes(self.files[path]), 0xFFFFFFFF) ^ 0xFFFFFFFF
+                return self._ftp_answer(seq, opcode, struct.pack("<I", crc))
+            del self.files[path]
+        else:
+            return self._ftp_answer(seq, opcode, bytes([FTP_ERROR_UNKNOWN_COMMAND]), nak=True)
+        return self._ftp_answer(seq, opcode)
+
+    def _handle_serial_control(self, msg) -> None:
+        if msg.device != mavutil.mavlink.SERIAL_CONTROL_DEV_SHELL:
+            return
+        self._shell_input += bytes(msg.data[:msg.count]).decode("utf8", errors="replace")
+        while "\n" in self._shell_input:
+            line, self._shell_input = self._shell_input.split("\n", 1)
+            self.stats.shell_commands += 1
+            output = self._run_shell(line.strip())
+            # The shell echoes the command line, then prints its output and the next prompt
+            self._send_shell(f"{line}\r\n{output}{SHELL_PROMPT}")
+
+    def _send_shell(self, text: str) -> None:
+        data = text.encode("utf8")
+        for start in range(0, len(data), SERIAL_CONTROL_DATA_SIZE):
+            chunk = data[start:start + SERIAL_CONTROL_DATA_SIZE]
+            self.send(self.mav.serial_control_encode(
+                mavutil.mavlink.SERIAL_CONTROL_DEV_SHELL, mavutil.mavlink.SERIAL_CONTROL_FLAG_REPLY, 0, 0,
+                len(chunk), list(chunk.ljust(SERIAL_CONTROL_DATA_SIZE, b"\0"))))
+
+    def _run_shell(self, line: str) -> str:
+        words = line.split()
+        if not words:
+            return ""
+        if words[:2] != ["param", "import"] or len(words) != 3:
+            return f"nsh: {words[0]}: command not found\r\n"
+        if words[2] not in self.files:
+            return f"ERROR [param] open '{words[2]}' failed (2)\r\n"
+        # Unknown parameters are skipped, like PX4 does
+        for name, value, param_type in decode_parameter_file(bytes(self.files[words[2]])):
+            if name in self.parameters:
+                self.parameters[name] = (value, param_type)
+        return ""
+
+
+def decode_parameter_file(content: bytes) -> List[Tuple[str, float, int]]:
+    """
+    Decodes a PX4 parameter file, a BSON document of int32 and double elements.
+
+    :param content: The file content.
+    :type content: bytes
+    :return: The name, value encoded as PARAM_VALUE float and MAV_PARAM_TYPE of each parameter.
+    :rtype: list[tuple[str, float, int]]
+    """
+    parameters = []
+    position = 4
+    end = struct.unpack_from("<i", content)[0] - 1
+    while position < end:
+        element_type = content[position]
+        name_end = content.index(b"\0", position + 1)
+        name = content[position + 1:name_end].decode("utf8")
+        if element_type == 0x10:
+            value = struct.unpack("f", content[name_end + 1:name_end + 5])[0]
+            parameters.append((name, value, mavutil.mavlink.MAV_PARAM_TYPE_INT32))
+            position = name_end + 5
+        else:
+            value = struct.unpack("f", struct.pack("f", struct.unpack_from("<d", content, name_end + 1)[0]))[0]
+            parameters.append((name, value, mavutil.mavlink.MAV_PARAM_TYPE_REAL32))
+            position = name_end + 9
+    return parameters
+
+
+def encode_parameter(value_str: str) -> Tuple[float, int]:
+    """
+    Encodes a textual parameter value like parameters_upload.py does.
+
+    :param value_str: The parameter value, floats must contain a decimal point.
+    :type value_str: str
+    :return: The value encoded as PARAM_VALUE float and its MAV_PARAM_TYPE.
+    :rtype: tuple[float, int]
+    """
+    if '.' in value_str:
+        return struct.unpack("f", struct.pack("f", float(value_str)))[0], mavutil.mavlink.MAV_PARAM_TYPE_REAL32
+    return struct.unpack("f", struct.pack("i", int(value_str)))[0], mavutil.mavlink.MAV_PARAM_TYPE_INT32
+
+
+def generate_parameters(count: int, prefix: str = "SIM_P") -> Dict[str, Tuple[float, int]]:
+    """
+    Generates a parameter table alternating float and integer parameters.
+
+    :param count: Number of parameters.
+    :type count: int
+    :param prefix: Prefix of the parameter names.
+    :type prefix: str
+    :return: The parameter table.
+    :rtype: dict[str, tuple[float, int]]
+    """
+    return OrderedDict(
+        (f"{prefix}{index:04d}", encode_parameter(f"{index}.5" if index % 2 else str(index)))
+        for index in range(count))
+
+
+def load_parameters(filename: str) -> Dict[str, Tuple[float, int]]:
+    """
+    Loads a parameter table from a parameters file.
+
+    :param filename: The parameters file, one `name value` pair per line.
+    :type filename: str
+    :return: The parameter table.
+    :rtype: dict[str, tuple[float, int]]
+    """
+    parameters = OrderedDict()
+    with open(filename, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                name, value_str = line.split()
+                parameters[name] = encode_parameter(value_str)
+    return parameters
+
+
+def main() -> None:
+    """
+    Main function to parse arguments and serve the stand-in until interrupted.
+    """
+    parser = argparse.ArgumentParser(description="MAVLink vehicle stand-in for parameter protocol tests")
+    parser.add_argument("--udp", default="127.0.0.1:14560", help="Local UDP address to listen on")
+    parser.add_argument("--pty", action="store_true", help="Serve on a pseudo-terminal instead of UDP")
+    parser.add_argument("--params", help="Parameters file used as the initial table")
+    parser.add_argument("--count", type=int, default=0, help="Number of generated parameters")
+    parser.add_argument("--sysid", type=int, default=1, help="MAVLink system id")
+    parser.add_argument("--latency", type=float, default=0.0, help="One-way latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random extra latency in seconds")
+    parser.add_argument("--baud", type=int, help="Emulated serial baud rate")
+    parser.add_argument("--loss", type=float, default=0.0, help="Message loss probability")
+    parser.add_argument("--duplicate", type=float, default=0.0, help="Message duplication probability")
+    parser.add_argument("--reorder", type=float, default=0.0, help="Message reordering probability")
+    parser.add_argument("--seed", type=int, help="Random seed")
+    args = parser.parse_args()
+
+    parameters = load_parameters(args.params) if args.params else OrderedDict()
+    parameters.update(generate_parameters(args.count))
+    if args.pty:
+        transport = PtyTransport()
+    else:
+        host, port = args.udp.rsplit(":", 1)
+        transport = UdpTransport(host, int(port))
+    conditions = LinkConditions(args.latency, args.jitter, args.baud, args.loss,
+                                args.duplicate, args.reorder, seed=args.seed)
+
+    with VehicleStandIn(transport, parameters, conditions, sysid=args.sysid) as vehicle:
+        print(f"Vehicle stand-in with {len(parameters)} parameters, connect with {vehicle.device}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        print(vehicle.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,53 +8,192 @@ Usage:
     python script_name.py --port /dev/ttyUSB0 --file params.txt
     or
     python script_name.py --file params.txt (auto-detect port)
+    or
+    python script_name.py --file params.txt --pipeline --window 16 (pipelined upload)
+    or
+    python script_name.py --file params.txt --sync (send only the changed parameters)
+    or
+    python script_name.py --file params.txt --fleet /dev/ttyACM0 udpin:0.0.0.0:14550 (several vehicles)
+    or
+    python script_name.py --manifest fleet.txt (one `port params_file` pair per line)
+    or
+    python script_name.py --file params.txt --fast-probe (probe all ports and baud rates concurrently)
+    or
+    python script_name.py --file params.txt --ftp (load the whole file through MAVLink FTP)
 
 Options:
     --port: The serial port to connect to the PX4 device.
     --file: The file containing parameters to set.
+    --pipeline: Keep several PARAM_SET requests in flight instead of waiting for each echo.
+    --window: Maximum number of outstanding PARAM_SET requests in pipelined mode.
+    --timeout: Time in seconds to wait for a PARAM_VALUE echo before resending.
+    --retries: Maximum number of resends for a single parameter.
+    --sync: Read the parameter table first and send only the parameters that differ.
+    --cache-dir: Directory of the parameter table and link caches.
+    --fleet: Upload the parameters file to all the given ports or UDP endpoints concurrently.
+    --manifest: Upload to several vehicles concurrently, one `port params_file` pair per line.
+    --fast-probe: Probe all candidate ports concurrently with short timeouts and cache the detected link.
+    --ftp: Upload the parameters as a file through MAVLink FTP, load it with `param import` and verify
+        the parameter table with a single read-back.
+    --ftp-path: Path of the uploaded parameter file on the vehicle.
 """
 
 import argparse
+import json
+import os
 import struct
 import sys
-from typing import Optional
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
 from pymavlink import mavutil
 
 BAUD_RATES = [115200, 57600, 38400, 19200, 9600]
+PREFERRED_SERIAL_PORTS = [
+    "*FTDI*",
+    "*Arduino_Mega_2560*",
+    "*3D_Robotics*",
+    "*USB_to_UART*",
+    "*PX4*",
+    "*FMU*",
+    "*Gumstix*",
+]
+PROBE_TIMEOUT = 0.5
+LINK_CACHE_FILE = "links.json"
+DEFAULT_WINDOW = 8
+DEFAULT_TIMEOUT = 1.0
+DEFAULT_RETRIES = 10
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "px4_parameters")
+HASH_CHECK_PARAM = "_HASH_CHECK"
+DEFAULT_FTP_PATH = "/fs/microsd/params_upload.bson"
+# MAVLink FTP payload: seq, session, opcode, size, req_opcode, burst_complete, padding, offset, data
+FTP_HEADER = struct.Struct("<HBBBBBBI")
+FTP_PAYLOAD_SIZE = 251
+FTP_DATA_SIZE = FTP_PAYLOAD_SIZE - FTP_HEADER.size
+FTP_TERMINATE_SESSION = 1
+FTP_RESET_SESSIONS = 2
+FTP_CREATE_FILE = 6
+FTP_WRITE_FILE = 7
+FTP_REMOVE_FILE = 8
+FTP_CALC_FILE_CRC32 = 14
+FTP_ACK = 128
+FTP_NAK = 129
+SHELL_PROMPT = "nsh> "
+SHELL_TIMEOUT = 5.0
+# BSON element types of the PX4 parameter files
+BSON_DOUBLE = 0x01
+BSON_INT32 = 0x10
+
+
+@dataclass
+class Parameter:
+    """
+    A parameter read from a parameters file, ready to be sent with PARAM_SET.
+
+    :param name: The parameter name (param_id).
+    :param value: The value as written in the file.
+    :param param_type: The MAVLink parameter type.
+    :param value_f: The value encoded as the float carried by PARAM_SET/PARAM_VALUE.
+    """
+    name: str
+    value: Union[int, float]
+    param_type: int
+    value_f: float
+
+
+@dataclass
+class ParameterUploadStats:
+    """
+    Upload statistics of a single parameter.
+
+    :param name: The parameter name.
+    :param latency: Time in seconds between the first PARAM_SET and the matching echo, None if never confirmed.
+    :param retries: Number of times the PARAM_SET was resent.
+    """
+    name: str
+    latency: Optional[float] = None
+    retries: int = 0
+
+
+@dataclass
+class VehicleUploadResult:
+    """
+    Result of the parameters upload to a single vehicle.
 
+    :param port: The port or endpoint of the vehicle.
+    :param filename: The parameters file uploaded to the vehicle.
+    :param success: True if all parameters were set successfully.
+    :param sent: Number of parameters sent to the vehicle.
+    :param retries: Total number of resends.
+    :param rebooted: True if the reboot command was sent.
+    :param elapsed: Total time in seconds, connection included.
+    :param error: The error that interrupted the upload, if any.
+    """
+    port: str
+    filename: str
+    success: bool = False
+    sent: int = 0
+    retries: int = 0
+    rebooted: bool = False
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+_link_cache_lock = threading.Lock()
+# Prefix of the progress lines of the upload running in each thread, and lock writing them whole
+_output = threading.local()
+_output_lock = threading.Lock()
+
+
+def log(message: str) -> None:
+    """
+    Prints a progress message, each line prefixed with the vehicle of the upload of the thread.
 
-def detect_px4_connection(port: Optional[str] = None) -> mavutil.mavlink_connection:
+    :param message: The message, possibly of several lines.
+    :type message: str
+    """
+    prefix = getattr(_output, "prefix", None)
+    lines = str(message).split("\n")
+    text = "".join(f"[{prefix}] {line}\n" if prefix else f"{line}\n" for line in lines)
+    with _output_lock:
+        sys.stdout.write(text)
+
+
+def detect_px4_connection(port: Optional[str] = None, fast_probe: bool = False,
+                          cache_dir: str = DEFAULT_CACHE_DIR) -> mavutil.mavlink_connection:
     """
     Auto-detects the PX4 connection port if not provided and establishes a MAVLink connection.
 
     :param port: The serial port to connect to.
     :type port: str or None
+    :param fast_probe: Probe all candidate ports concurrently and cache the detected link.
+    :type fast_probe: bool
+    :param cache_dir: Directory of the link cache used by the fast probe.
+    :type cache_dir: str
     :return: A MAVLink connection object.
     :rtype: mavutil.mavlink_connection
     :raises Exception: If no serial connection is found or if connection fails.
     """
+    if fast_probe and (port is None or is_serial_port(port)):
+        return fast_probe_connection(port, cache_dir)
+
     if port is None:
-        serial_list = mavutil.auto_detect_serial(
-            preferred_list=[
-                "*FTDI*",
-                "*Arduino_Mega_2560*",
-                "*3D_Robotics*",
-                "*USB_to_UART*",
-                "*PX4*",
-                "*FMU*",
-                "*Gumstix*",
-            ]
-        )
+        serial_list = mavutil.auto_detect_serial(preferred_list=PREFERRED_SERIAL_PORTS)
 
         if len(serial_list) == 0:
             raise ValueError("Error: no serial connection found")
 
         if len(serial_list) > 1:
-            print("Auto-detected serial ports are:")
+            log("Auto-detected serial ports are:")
             for port_info in serial_list:
-                print(f" {port_info}")
+                log(f" {port_info}")
         port = serial_list[0].device
-        print(f"Using port {port}")
+        log(f"Using port {port}")
 
     for baud in BAUD_RATES:
         try:
@@ -63,14 +202,250 @@ def detect_px4_connection(port: Optional[str] = None) -> mavutil.mavlink_connect
             confirm_connection = connection.wait_heartbeat(timeout=5)
             if confirm_connection is None:
                 raise ConnectionError("Failed to connect to PX4")
-            print(f"Connected to PX4 on {port} with baud rate {baud}")
+            log(f"Connected to PX4 on {port} with baud rate {baud}")
             return connection
         except Exception as e:
-            print(f"Failed to connect on {port} with baud rate {baud}: {e}")
+            log(f"Failed to connect on {port} with baud rate {baud}: {e}")
 
     raise ConnectionError(f"Failed to connect on {port} with any baud rate")
 
 
+def is_serial_port(port: str) -> bool:
+    """
+    Tells whether a connection string is a serial device rather than a network endpoint.
+
+    :param port: The connection string.
+    :type port: str
+    :return: True for serial devices.
+    :rtype: bool
+    """
+    return not port.startswith(("udp", "tcp"))
+
+
+def usb_serial_number(device: str) -> Optional[str]:
+    """
+    Returns the USB serial number of a serial device.
+
+    :param device: The serial device path.
+    :type device: str
+    :return: The USB serial number, None if it is unknown or pyserial is not available.
+    :rtype: str or None
+    """
+    try:
+        from serial.tools import list_ports
+    except ImportError:
+        return None
+    real_device = os.path.realpath(device)
+    for info in list_ports.comports():
+        if os.path.realpath(info.device) == real_device:
+            return info.serial_number
+    return None
+
+
+def load_link_cache(cache_dir: str) -> Dict[str, int]:
+    """
+    Loads the baud rates of the previously detected links.
+
+    :param cache_dir: Directory of the link cache.
+    :type cache_dir: str
+    :return: The baud rate by USB serial number.
+    :rtype: dict[str, int]
+    """
+    try:
+        with open(os.path.join(cache_dir, LINK_CACHE_FILE), "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_link(cache_dir: str, serial_number: str, baud: int) -> None:
+    """
+    Stores the baud rate of a detected link in the link cache.
+
+    :param cache_dir: Directory of the link cache.
+    :type cache_dir: str
+    :param serial_number: The USB serial number of the device.
+    :type serial_number: str
+    :param baud: The detected baud rate.
+    :type baud: int
+    """
+    with _link_cache_lock:
+        cache = load_link_cache(cache_dir)
+        cache[serial_number] = baud
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(cache, file)
+        os.replace(tmp_path, os.path.join(cache_dir, LINK_CACHE_FILE))
+
+
+def probe_port(port: str, baud_rates: List[int], timeout: float = PROBE_TIMEOUT,
+               stop: Optional[threading.Event] = None) -> Optional[int]:
+    """
+    Listens on a serial port at each baud rate until a valid MAVLink frame is received.
+
+    A single heartbeat is sent at each baud rate so that PX4 starts streaming on links
+    where MAVLink is not running yet.
+
+    :param port: The serial port to probe.
+    :type port: str
+    :param baud_rates: The baud rates to try, in order.
+    :type baud_rates: list[int]
+    :param timeout: Time in seconds to listen at each baud rate.
+    :type timeout: float
+    :param stop: Event set when another port already won the probe.
+    :type stop: threading.Event or None
+    :return: The baud rate of the first valid frame, None if none was received.
+    :rtype: int or None
+    """
+    for baud in baud_rates:
+        if stop is not None and stop.is_set():
+            return None
+        try:
+            connection = mavutil.mavlink_connection(port, baud=baud)
+        except Exception as e:
+            log(f"Failed to open {port} with baud rate {baud}: {e}")
+            return None
+        try:
+            send_heartbeat(connection)
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline and not (stop is not None and stop.is_set()):
+                msg = connection.recv_msg()
+                if msg is None:
+                    time.sleep(0.005)
+                elif msg.get_type() != "BAD_DATA":
+                    return baud
+        finally:
+            connection.close()
+    return None
+
+
+def fast_probe_connection(port: Optional[str] = None,
+                          cache_dir: str = DEFAULT_CACHE_DIR) -> mavutil.mavlink_connection:
+    """
+    Probes all candidate serial ports concurrently and connects to the first valid MAVLink link.
+
+    Ports whose USB serial number is in the link cache are first tried at their cached baud rate
+    only, so later runs connect at once. The winning baud rate is stored in the cache.
+
+    :param port: The serial port to probe, all auto-detected ports if None.
+    :type port: str or None
+    :param cache_dir: Directory of the link cache.
+    :type cache_dir: str
+    :return: A MAVLink connection object.
+    :rtype: mavutil.mavlink_connection
+    :raises Exception: If no serial connection is found or if no port answers.
+    """
+    if port is None:
+        candidates = [serial_port.device for serial_port in
+                      mavutil.auto_detect_serial(preferred_list=PREFERRED_SERIAL_PORTS)]
+    else:
+        candidates = [port]
+    # The same device can be listed both as /dev/ttyACM* and /dev/serial/by-id/*
+    devices: Dict[str, str] = OrderedDict()
+    for device in candidates:
+        devices.setdefault(os.path.realpath(device), device)
+    candidates = list(devices.values())
+    if not candidates:
+        raise ValueError("Error: no serial connection found")
+
+    serial_numbers = {device: usb_serial_number(device) for device in candidates}
+    cache = load_link_cache(cache_dir)
+    prefix = getattr(_output, "prefix", None)
+
+    def probe(device: str, stop: threading.Event) -> Optional[int]:
+        # The probe threads print with the prefix of the upload
+        _output.prefix = prefix
+        cached_baud = cache.get(serial_numbers[device] or "")
+        if cached_baud is not None:
+            baud = probe_port(device, [cached_baud], stop=stop)
+            if baud is not None:
+                return baud
+        return probe_port(device, [baud for baud in BAUD_RATES if baud != cached_baud], stop=stop)
+
+    stop = threading.Event()
+    found = None
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        futures = {executor.submit(probe, device, stop): device for device in candidates}
+        for future in as_completed(futures):
+            baud = future.result()
+            if baud is not None and found is None:
+                found = (futures[future], baud)
+                stop.set()
+
+    if found is None:
+        raise ConnectionError(f"Failed to detect MAVLink on {', '.join(candidates)}")
+
+    device, baud = found
+    if serial_numbers[device]:
+        save_link(cache_dir, serial_numbers[device], baud)
+    connection = mavutil.mavlink_connection(device, baud=baud)
+    send_heartbeat(connection)
+    if connection.wait_heartbeat(timeout=5) is None:
+        connection.close()
+        raise ConnectionError(f"Failed to connect to PX4 on {device} with baud rate {baud}")
+    log(f"Connected to PX4 on {device} with baud rate {baud}")
+    return connection
+
+
+def parse_parameter(param: str, value_str: str) -> Parameter:
+    """
+    Infers the type of a parameter from its textual value and encodes it for PARAM_SET.
+
+    :param param: The parameter name.
+    :type param: str
+    :param value_str: The parameter value, floats must contain a decimal point.
+    :type value_str: str
+    :return: The encoded parameter.
+    :rtype: Parameter
+    """
+    if '.' in value_str:
+        value = float(value_str)
+        param_type = mavutil.mavlink.MAV_PARAM_TYPE_REAL32
+        packed = struct.pack("f", value)
+    else:
+        value = int(value_str)
+        param_type = mavutil.mavlink.MAV_PARAM_TYPE_INT32
+        packed = struct.pack("i", value)
+    value_f = struct.unpack("f", packed)[0]
+    return Parameter(param, value, param_type, value_f)
+
+
+def read_parameters_file(filename: str) -> List[Parameter]:
+    """
+    Reads a parameters file with one `name value` pair per line.
+
+    A parameter listed several times is set once, to its last value, as the uploads are keyed by name.
+
+    :param filename: The file containing parameters to set.
+    :type filename: str
+    :return: The parameters in the order of their first line.
+    :rtype: list[Parameter]
+    """
+    parameters: Dict[str, Parameter] = {}
+    with open(filename, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            param, value_str = line.strip().split()
+            parameters[param] = parse_parameter(param, value_str)
+    return list(parameters.values())
+
+
+def same_param_value(a: float, b: float) -> bool:
+    """
+    Compares two PARAM_VALUE floats bit for bit, so that integers whose encoding is a NaN still match.
+
+    :param a: First value.
+    :type a: float
+    :param b: Second value.
+    :type b: float
+    :return: True if both values have the same float32 encoding.
+    :rtype: bool
+    """
+    return struct.pack("f", a) == struct.pack("f", b)
+
+
 def set_parameters_from_file(connection: mavutil.mavlink_connection, filename: str) -> bool:
     """
     Sets parameters on the PX4 device from a specified file.
@@ -82,48 +457,650 @@ def set_parameters_from_file(connection: mavutil.mavlink_connection, filename: s
     :return: True if all parameters are set successfully, False otherwise.
     :rtype: bool
     """
-    with open(filename, "r", encoding="utf-8") as file:
-        success = True
-        for line in file:
-            param, value_str = line.strip().split()
-            if '.' in value_str:
-                value = float(value_str)
-                param_type = mavutil.mavlink.MAV_PARAM_TYPE_REAL32
-                packed = struct.pack("f", value)
-                value_f = struct.unpack("f", packed)[0]
-            else:
-                value = int(value_str)
-                param_type = mavutil.mavlink.MAV_PARAM_TYPE_INT32
-                packed = struct.pack("i", value)
-                value_f = struct.unpack("f", packed)[0]
-
-            print(f"Setting {param} to {value}")
-
-            param_success = False
-            retries = 0
-            while not param_success and retries < 10:
-                connection.param_set_send(
-                    param, value_f, param_type
-                )
-                ack = connection.recv_match(
-                    type="PARAM_VALUE", blocking=True, timeout=1)
-                if ack:
-                    ack = ack.to_dict()
-                    if ack and ack["param_id"] == param and ack["param_value"] == value_f:
-                        print(f"Successfully set {param} to {value}")
-                        param_success = True
-                    else:
-                        print(f"Failed to set {param}")
+    success = True
+    for parameter in read_parameters_file(filename):
+        param, value = parameter.name, parameter.value
+        value_f, param_type = parameter.value_f, parameter.param_type
+
+        log(f"Setting {param} to {value}")
+
+        param_success = False
+        retries = 0
+        while not param_success and retries < 10:
+            connection.param_set_send(
+                param, value_f, param_type
+            )
+            ack = connection.recv_match(
+                type="PARAM_VALUE", blocking=True, timeout=1)
+            if ack:
+                ack = ack.to_dict()
+                if ack and ack["param_id"] == param and ack["param_value"] == value_f:
+                    log(f"Successfully set {param} to {value}")
+                    param_success = True
                 else:
-                    print(f"No response from PX4 for {param}")
-                retries += 1
+                    log(f"Failed to set {param}")
+            else:
+                log(f"No response from PX4 for {param}")
+            retries += 1
 
-            if not param_success:
-                success = False
+        if not param_success:
+            success = False
 
     return success
 
 
+def set_parameters_pipelined(connection: mavutil.mavlink_connection, parameters: List[Parameter],
+                             window: int = DEFAULT_WINDOW, timeout: float = DEFAULT_TIMEOUT,
+                             max_retries: int = DEFAULT_RETRIES) -> Tuple[bool, List[ParameterUploadStats]]:
+    """
+    Sets parameters keeping up to `window` PARAM_SET requests in flight.
+
+    PARAM_VALUE echoes are matched back to the pending parameters by param_id, so unrelated
+    or reordered echoes do not stall the upload. Only the parameters whose echo did not arrive
+    within `timeout` are resent.
+
+    :param connection: The MAVLink connection object.
+    :type connection: mavutil.mavlink_connection
+    :param parameters: The parameters to set.
+    :type parameters: list[Parameter]
+    :param window: Maximum number of outstanding PARAM_SET requests.
+    :type window: int
+    :param timeout: Time in seconds to wait for an echo before resending.
+    :type timeout: float
+    :param max_retries: Maximum number of resends for a single parameter.
+    :type max_retries: int
+    :return: True if all parameters are set successfully, and the per-parameter statistics.
+    :rtype: tuple[bool, list[ParameterUploadStats]]
+    """
+    window = max(1, window)
+    queue = deque(parameters)
+    stats: Dict[str, ParameterUploadStats] = OrderedDict(
+        (param.name, ParameterUploadStats(param.name)) for param in parameters)
+    # param_id -> (parameter, time of the first send, time of the last send)
+    pending: Dict[str, Tuple[Parameter, float, float]] = OrderedDict()
+    success = True
+
+    while queue or pending:
+        while queue and len(pending) < window:
+            param = queue.popleft()
+            connection.param_set_send(param.name, param.value_f, param.param_type)
+            now = time.monotonic()
+            pending[param.name] = (param, now, now)
+
+        oldest_deadline = min(last_sent for _, _, last_sent in pending.values()) + timeout
+        wait = max(0.0, oldest_deadline - time.monotonic())
+        ack = connection.recv_match(type="PARAM_VALUE", blocking=True, timeout=wait)
+        now = time.monotonic()
+        if ack is not None and ack.param_id in pending:
+            param, first_sent, _ = pending[ack.param_id]
+            if same_param_value(ack.param_value, param.value_f):
+                stats[param.name].latency = now - first_sent
+                del pending[param.name]
+                log(f"Successfully set {param.name} to {param.value}")
+
+        for name, (param, first_sent, last_sent) in list(pending.items()):
+            if now - last_sent < timeout:
+                continue
+            if stats[name].retries >= max_retries:
+                log(f"No valid response from PX4 for {name}")
+                del pending[name]
+                success = False
+                continue
+            stats[name].retries += 1
+            connection.param_set_send(param.name, param.value_f, param.param_type)
+            pending[name] = (param, first_sent, now)
+
+    return success, list(stats.values())
+
+
+def print_upload_report(stats: List[ParameterUploadStats], elapsed: float) -> None:
+    """
+    Prints the per-parameter latency and retry counts of an upload.
+
+    :param stats: The per-parameter statistics.
+    :type stats: list[ParameterUploadStats]
+    :param elapsed: Total upload time in seconds.
+    :type elapsed: float
+    """
+    log(f"{'Parameter':<17} {'Latency (ms)':>12} {'Retries':>8}")
+    for stat in stats:
+        latency = "failed" if stat.latency is None else f"{stat.latency * 1000:.1f}"
+        log(f"{stat.name:<17} {latency:>12} {stat.retries:>8}")
+    latencies = [stat.latency for stat in stats if stat.latency is not None]
+    total_retries = sum(stat.retries for stat in stats)
+    log(f"Uploaded {len(latencies)}/{len(stats)} parameters in {elapsed:.2f} s "
+          f"with {total_retries} retries")
+    if latencies:
+        log(f"Latency: mean {sum(latencies) / len(latencies) * 1000:.1f} ms, "
+              f"max {max(latencies) * 1000:.1f} ms")
+
+
+def request_firmware_version(connection: mavutil.mavlink_connection, timeout: float = DEFAULT_TIMEOUT,
+                             max_retries: int = DEFAULT_RETRIES) -> int:
+    """
+    Requests the AUTOPILOT_VERSION message of the vehicle.
+
+    :param connection: The MAVLink connection object.
+    :type connection: mavutil.mavlink_connection
+    :param timeout: Time in seconds to wait for the answer to each request.
+    :type timeout: float
+    :param max_retries: Maximum number of requests.
+    :type max_retries: int
+    :return: The flight software version.
+    :rtype: int
+    :raises ConnectionError: If the vehicle does not answer any request.
+    """
+    for _ in range(max(1, max_retries)):
+        connection.mav.command_long_send(
+            connection.target_system, connection.target_component,
+            mavutil.mavlink.MAV_CMD_REQUEST_MESSAGE, 0,
+            mavutil.mavlink.MAVLINK_MSG_ID_AUTOPILOT_VERSION, 0, 0, 0, 0, 0, 0)
+        version = connection.recv_match(type="AUTOPILOT_VERSION", blocking=True, timeout=timeout)
+        if version is not None:
+            return version.flight_sw_version
+    raise ConnectionError("No response to the firmware version request")
+
+
+def request_parameter_hash(connection: mavutil.mavlink_connection, timeout: float = DEFAULT_TIMEOUT) -> Optional[int]:
+    """
+    Requests the hash PX4 computes over its whole parameter table.
+
+    :param connection: The MAVLink connection object.
+    :type connection: mavutil.mavlink_connection
+    :param timeout: Time in seconds to wait for the answer.
+    :type timeout: float
+    :return: The parameter table hash, None if the vehicle did not answer.
+    :rtype: int or None
+    """
+    connection.mav.param_request_read_send(
+        connection.target_system, connection.target_component, HASH_CHECK_PARAM.encode("utf8"), -1)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        msg = connection.recv_match(type="PARAM_VALUE", blocking=True,
+                                    timeout=max(0.0, deadline - time.monotonic()))
+        if msg is not None and msg.param_id == HASH_CHECK_PARAM:
+            return struct.unpack("I", struct.pack("f", msg.param_value))[0]
+    return None
+
+
+def fetch_parameter_table(connection: mavutil.mavlink_connection, window: int = DEFAULT_WINDOW,
+                          timeout: float = DEFAULT_TIMEOUT,
+                          max_retries: int = DEFAULT_RETRIES) -> Dict[str, float]:
+    """
+    Reads the whole parameter table with a single PARAM_REQUEST_LIST sweep.
+
+    The indices missing at the end of the sweep are requested again with PARAM_REQUEST_READ,
+    keeping up to `window` requests in flight.
+
+    :param connection: The MAVLink connection object.
+    :type connection: mavutil.mavlink_connection
+    :param window: Maximum number of outstanding PARAM_REQUEST_READ requests.
+    :type window: int
+    :param timeout: Time in seconds without PARAM_VALUE after which the sweep is considered over.
+    :type timeout: float
+    :param max_retries: Maximum number of list requests, and of requests for a single missing index.
+    :type max_retries: int
+    :return: The parameter values, encoded as PARAM_VALUE floats, by name.
+    :rtype: dict[str, float]
+    :raises ConnectionError: If the vehicle does not answer or some indices cannot be read.
+    """
+    received: Dict[int, Tuple[str, float]] = {}
+    count = None
+    # The list request is sent again while the vehicle did not answer it, the request or the
+    # beginning of the sweep may have been lost
+    for _ in range(max(1, max_retries)):
+        connection.mav.param_request_list_send(connection.target_system, connection.target_component)
+        while count is None or len(received) < count:
+            msg = connection.recv_match(type="PARAM_VALUE", blocking=True, timeout=timeout)
+            if msg is None:
+                break
+            if msg.param_id == HASH_CHECK_PARAM or msg.param_index >= msg.param_count:
+                continue
+            count = msg.param_count
+            received[msg.param_index] = (msg.param_id, msg.param_value)
+        if count is not None:
+            break
+
+    if count is None:
+        raise ConnectionError("No response to the parameter list request")
+
+    missing = deque(index for index in range(count) if index not in received)
+    if missing:
+        log(f"Requesting {len(missing)} missing parameters")
+    attempts: Dict[int, int] = {}
+    pending: Dict[int, float] = {}
+    while missing or pending:
+        while missing and len(pending) < max(1, window):
+            index = missing.popleft()
+            connection.mav.param_request_read_send(
+                connection.target_system, connection.target_component, b"", index)
+            attempts[index] = attempts.get(index, 0) + 1
+            pending[index] = time.monotonic()
+
+        wait = max(0.0, min(pending.values()) + timeout - time.monotonic())
+        msg = connection.recv_match(type="PARAM_VALUE", blocking=True, timeout=wait)
+        if msg is not None and msg.param_index in pending:
+            received[msg.param_index] = (msg.param_id, msg.param_value)
+            del pending[msg.param_index]
+
+        now = time.monotonic()
+        for index, sent in list(pending.items()):
+            if now - sent < timeout:
+                continue
+            del pending[index]
+            if attempts[index] >= max_retries:
+                raise ConnectionError(f"Failed to read parameter index {index}")
+            missing.append(index)
+
+    return {name: value for name, value in received.values()}
+
+
+def parameter_cache_path(cache_dir: str, sysid: int, firmware_version: int) -> str:
+    """
+    Returns the path of the cached parameter table of a vehicle.
+
+    :param cache_dir: Directory of the parameter table cache.
+    :type cache_dir: str
+    :param sysid: MAVLink system id of the vehicle.
+    :type sysid: int
+    :param firmware_version: Flight software version of the vehicle.
+    :type firmware_version: int
+    :return: The cache file path.
+    :rtype: str
+    """
+    return os.path.join(cache_dir, f"sysid{sysid}_fw{firmware_version:08x}.json")
+
+
+def load_parameter_cache(path: str) -> Tuple[Optional[int], Dict[str, float]]:
+    """
+    Loads a cached parameter table.
+
+    :param path: The cache file path.
+    :type path: str
+    :return: The parameter table hash and the parameter values by name, (None, {}) if there is no cache.
+    :rtype: tuple[int or None, dict[str, float]]
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return None, {}
+    # Values are stored as their float32 bit pattern to survive the JSON round trip exactly
+    table = {name: struct.unpack("f", struct.pack("I", bits))[0]
+             for name, bits in cache.get("params", {}).items()}
+    return cache.get("hash"), table
+
+
+def save_parameter_cache(path: str, param_hash: Optional[int], table: Dict[str, float]) -> None:
+    """
+    Saves a parameter table to the cache, replacing the previous file atomically.
+
+    :param path: The cache file path.
+    :type path: str
+    :param param_hash: The parameter table hash reported by the vehicle.
+    :type param_hash: int or None
+    :param table: The parameter values by name.
+    :type table: dict[str, float]
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cache = {
+        "hash": param_hash,
+        "params": {name: struct.unpack("I", struct.pack("f", value))[0]
+                   for name, value in sorted(table.items())},
+    }
+    # A unique temporary file keeps concurrent uploads from clobbering each other
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        json.dump(cache, file)
+    os.replace(tmp_path, path)
+
+
+def read_parameter_table(connection: mavutil.mavlink_connection, cache_dir: str = DEFAULT_CACHE_DIR,
+                         window: int = DEFAULT_WINDOW, timeout: float = DEFAULT_TIMEOUT,
+                         max_retries: int = DEFAULT_RETRIES) -> Tuple[str, Dict[str, float]]:
+    """
+    Returns the parameter table of the vehicle, from the cache when the vehicle hash matches.
+
+    :param connection: The MAVLink connection object.
+    :type connection: mavutil.mavlink_connection
+    :param cache_dir: Directory of the parameter table cache.
+    :type cache_dir: str
+    :param window: Maximum number of outstanding read requests.
+    :type window: int
+    :param timeout: Time in seconds to wait for an answer.
+    :type timeout: float
+    :param max_retries: Maximum number of requests for a single parameter.
+    :type max_retries: int
+    :return: The cache file path and the parameter values by name.
+    :rtype: tuple[str, dict[str, float]]
+    """
+    firmware_version = request_firmware_version(connection, timeout, max_retries)
+    path = parameter_cache_path(cache_dir, connection.target_system, firmware_version)
+    cached_hash, table = load_parameter_cache(path)
+    param_hash = request_parameter_hash(connection, timeout)
+    if table and param_hash is not None and param_hash == cached_hash:
+        log(f"Using cached parameter table {path}")
+        return path, table
+
+    log("Reading the parameter table...")
+    table = fetch_parameter_table(connection, window, timeout, max_retries)
+    log(f"Read {len(table)} parameters")
+    save_parameter_cache(path, param_hash, table)
+    return path, table
+
+
+def diff_parameters(parameters: List[Parameter], table: Dict[str, float]) -> List[Parameter]:
+    """
+    Returns the parameters whose value differs from the vehicle table.
+
+    :param parameters: The parameters to set.
+    :type parameters: list[Parameter]
+    :param table: The parameter values of the vehicle by name.
+    :type table: dict[str, float]
+    :return: The parameters to send, in file order.
+    :rtype: list[Parameter]
+    """
+    return [param for param in parameters
+            if param.name not in table or not same_param_value(table[param.name], param.value_f)]
+
+
+def sync_parameters(connection: mavutil.mavlink_connection, parameters: List[Parameter],
+                    cache_dir: str = DEFAULT_CACHE_DIR, window: int = DEFAULT_WINDOW,
+                    timeout: float = DEFAULT_TIMEOUT,
+                    max_retries: int = DEFAULT_RETRIES) -> Tuple[bool, List[ParameterUploadStats]]:
+    """
+    Sends only the parameters whose value differs from the vehicle parameter table.
+
+    :param connection: The MAVLink connection object.
+    :type connection: mavutil.mavlink_connection
+    :param parameters: The parameters to set.
+    :type parameters: list[Parameter]
+    :param cache_dir: Directory of the parameter table cache.
+    :type cache_dir: str
+    :param window: Maximum number of outstanding requests.
+    :type window: int
+    :param timeout: Time in seconds to wait for an answer before resending.
+    :type timeout: float
+    :param max_retries: Maximum number of resends for a single parameter.
+    :type max_retries: int
+    :return: True if all parameters are set successfully, and the statistics of the sent parameters.
+    :rtype: tuple[bool, list[ParameterUploadStats]]
+    """
+    path, table = read_parameter_table(connection, cache_dir, window, timeout, max_retries)
+    changed = diff_parameters(parameters, table)
+    log(f"{len(changed)}/{len(parameters)} parameters differ from the vehicle")
+    if not changed:
+        return True, []
+
+    success, stats = set_parameters_pipelined(connection, changed, window, timeout, max_retries)
+    for param, stat in zip(changed, stats):
+        if stat.latency is not None:
+            table[param.name] = param.value_f
+    save_parameter_cache(path, request_parameter_hash(connection, timeout), table)
+    return success, stats
+
+
+def encode_parameter_file(parameters: List[Parameter]) -> bytes:
+    """
+    Encodes parameters as a PX4 parameter file, the BSON document read by `param import`.
+
+    :param parameters: The parameters.
+    :type parameters: list[Parameter]
+    :return: The file content.
+    :rtype: bytes
+    """
+    elements = bytearray()
+    for param in parameters:
+        if param.param_type == mavutil.mavlink.MAV_PARAM_TYPE_REAL32:
+            elements += struct.pack("<B", BSON_DOUBLE) + param.name.encode("utf8") + b"\0"
+            elements += struct.pack("<d", param.value)
+        else:
+            elements += struct.pack("<B", BSON_INT32) + param.name.encode("utf8") + b"\0"
+            elements += struct.pack("<i", param.value)
+    return struct.pack("<i", len(elements) + 5) + bytes(elements) + b"\0"
+
+
+def ftp_crc32(data: bytes) -> int:
+    """
+    Computes the CRC32 of the MAVLink FTP CalcFileCRC32 command.
+
+    PX4 uses the CRC32 polynomial of zlib without its initial and final inversions.
+
+    :param data: The file content.
+    :type data: bytes
+    :return: The CRC32.
+    :rtype: int
+    """
+    return zlib.crc32(data, 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+
+class FtpClient:
+    """
+    Minimal MAVLink FTP client, writing files with a window of outstanding WriteFile requests.
+
+    Every request carries its own sequence number and the vehicle answers with the next one, so the
+    acknowledgements of the writes are matched back to their offsets and only the lost ones are resent.
+
+    :param connection: The MAVLink connection object.
+    :param timeout: Time in seconds to wait for an answer before resending.
+    :param max_retries: Maximum number of resends for a single request.
+    """
+
+    def __init__(self, connection: mavutil.mavlink_connection, timeout: float = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_RETRIES):
+        self.connection = connection
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.seq = 0
+        self.session = 0
+        self.retries = 0
+
+    def _send(self, seq: int, opcode: int, data: bytes = b"", offset: int = 0) -> None:
+        payload = FTP_HEADER.pack(seq, self.session, opcode, len(data), 0, 0, 0, offset) + data
+        self.connection.mav.file_transfer_protocol_send(
+            0, self.connection.target_system, self.connection.target_component,
+            list(payload.ljust(FTP_PAYLOAD_SIZE, b"\0")))
+
+    def _next_seq(self) -> int:
+        self.seq = (self.seq + 1) & 0xFFFF
+        return self.seq
+
+    def _receive(self, timeout: float) -> Optional[Tuple[int, int, int, int, bytes]]:
+        msg = self.connection.recv_match(type="FILE_TRANSFER_PROTOCOL", blocking=True, timeout=timeout)
+        if msg is None:
+            return None
+        payload = bytes(msg.payload)
+        seq, session, opcode, size, req_opcode, _, _, _ = FTP_HEADER.unpack_from(payload)
+        return seq, session, opcode, req_opcode, payload[FTP_HEADER.size:FTP_HEADER.size + size]
+
+    def request(self, opcode: int, data: bytes = b"", offset: int = 0) -> bytes:
+        """
+        Sends a request and waits for its answer, resending it on timeout.
+
+        :param opcode: The FTP opcode.
+        :type opcode: int
+        :param data: The request data.
+        :type data: bytes
+        :param offset: The request offset.
+        :type offset: int
+        :return: The data of the ACK.
+        :rtype: bytes
+        :raises ConnectionError: If the vehicle answers with a NAK or does not answer.
+        """
+        return self._request(opcode, data, offset)[4]
+
+    def _request(self, opcode: int, data: bytes = b"", offset: int = 0) -> Tuple[int, int, int, int, bytes]:
+        seq = self._next_seq()
+        for attempt in range(self.max_retries + 1):
+            self.retries += attempt > 0
+            self._send(seq, opcode, data, offset)
+            deadline = time.monotonic() + self.timeout
+            while time.monotonic() < deadline:
+                answer = self._receive(max(0.0, deadline - time.monotonic()))
+                if answer is None or answer[0] != (seq + 1) & 0xFFFF or answer[3] != opcode:
+                    continue
+                if answer[2] == FTP_NAK:
+                    raise ConnectionError(f"FTP request {opcode} refused with error {list(answer[4])}")
+                return answer
+        raise ConnectionError(f"No answer to the FTP request {opcode}")
+
+    def write_file(self, path: str, content: bytes, window: int = DEFAULT_WINDOW) -> None:
+        """
+        Creates a file and writes its content with up to `window` WriteFile requests in flight.
+
+        :param path: The path of the file on the vehicle.
+        :type path: str
+        :param content: The file content.
+        :type content: bytes
+        :param window: Maximum number of outstanding WriteFile requests.
+        :type window: int
+        :raises ConnectionError: If a request is refused or a chunk is never acknowledged.
+        """
+        self.request(FTP_RESET_SESSIONS)
+        # The session of the created file is in the header of the ACK, whose data is empty
+        self.session = self._request(FTP_CREATE_FILE, path.encode("utf8"))[1]
+        chunks = deque(range(0, len(content), FTP_DATA_SIZE))
+        # Expected answer seq -> (offset, time of the last send, number of sends)
+        pending: Dict[int, Tuple[int, float, int]] = OrderedDict()
+        try:
+            while chunks or pending:
+                while chunks and len(pending) < max(1, window):
+                    offset = chunks.popleft()
+                    seq = self._next_seq()
+                    self._send(seq, FTP_WRITE_FILE, content[offset:offset + FTP_DATA_SIZE], offset)
+                    pending[(seq + 1) & 0xFFFF] = (offset, time.monotonic(), 1)
+
+                wait = max(0.0, min(sent for _, sent, _ in pending.values()) + self.timeout - time.monotonic())
+                answer = self._receive(wait)
+                if answer is not None and answer[0] in pending and answer[3] == FTP_WRITE_FILE:
+                    if answer[2] == FTP_NAK:
+                        raise ConnectionError(f"FTP write refused with error {list(answer[4])}")
+                    del pending[answer[0]]
+
+                now = time.monotonic()
+                for expected, (offset, sent, sends) in list(pending.items()):
+                    if now - sent < self.timeout:
+                        continue
+                    if sends > self.max_retries:
+                        raise ConnectionError(f"FTP write at offset {offset} was never acknowledged")
+                    self.retries += 1
+                    self._send((expected - 1) & 0xFFFF, FTP_WRITE_FILE,
+                               content[offset:offset + FTP_DATA_SIZE], offset)
+                    pending[expected] = (offset, now, sends + 1)
+        finally:
+            try:
+                self.request(FTP_TERMINATE_SESSION)
+            except ConnectionError:
+                # The error of the transfer is the one reported, the sessions are reset by the next transfer
+                pass
+            self.session = 0
+
+    def file_crc32(self, path: str) -> int:
+        """
+        Asks the vehicle for the CRC32 of a file.
+
+        :param path: The path of the file on the vehicle.
+        :type path: str
+        :return: The CRC32, see ftp_crc32.
+        :rtype: int
+        """
+        return struct.unpack_from("<I", self.request(FTP_CALC_FILE_CRC32, path.encode("utf8")))[0]
+
+    def remove_file(self, path: str) -> None:
+        """
+        Removes a file of the vehicle.
+
+        :param path: The path of the file on the vehicle.
+        :type path: str
+        """
+        self.request(FTP_REMOVE_FILE, path.encode("utf8"))
+
+
+def run_shell_command(connection: mavutil.mavlink_connection, command: str,
+                      timeout: float = SHELL_TIMEOUT) -> str:
+    """
+    Runs a command in the NuttX shell of the vehicle through SERIAL_CONTROL messages.
+
+    :param connection: The MAVLink connection object.
+    :type connection: mavutil.mavlink_connection
+    :param command: The shell command.
+    :type command: str
+    :param timeout: Time in seconds to wait for the shell prompt after the command.
+    :type timeout: float
+    :return: The output of the command.
+    :rtype: str
+    :raises ConnectionError: If the shell prompt does not come back.
+    """
+    flags = mavutil.mavlink.SERIAL_CONTROL_FLAG_RESPOND | mavutil.mavlink.SERIAL_CONTROL_FLAG_EXCLUSIVE
+    data = (command + "\n").encode("utf8")
+    for start in range(0, len(data), 70):
+        chunk = data[start:start + 70]
+        connection.mav.serial_control_send(mavutil.mavlink.SERIAL_CONTROL_DEV_SHELL, flags, 0, 0,
+                                           len(chunk), list(chunk.ljust(70, b"\0")))
+    output = ""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        msg = connection.recv_match(type="SERIAL_CONTROL", blocking=True,
+                                    timeout=max(0.0, deadline - time.monotonic()))
+        if msg is None:
+            continue
+        output += bytes(msg.data[:msg.count]).decode("utf8", errors="replace")
+        # The shell echoes the command, its output ends with the next prompt
+        if output.rstrip(" ").endswith(SHELL_PROMPT.rstrip(" ")) and command in output:
+            return output[output.index(command) + len(command):output.rindex(SHELL_PROMPT.rstrip(" "))].strip()
+    raise ConnectionError(f"No shell prompt after `{command}`")
+
+
+def load_parameters_ftp(connection: mavutil.mavlink_connection, parameters: List[Parameter],
+                        remote_path: str = DEFAULT_FTP_PATH, cache_dir: str = DEFAULT_CACHE_DIR,
+                        window: int = DEFAULT_WINDOW, timeout: float = DEFAULT_TIMEOUT,
+                        max_retries: int = DEFAULT_RETRIES) -> Tuple[bool, int]:
+    """
+    Loads parameters as a whole file: the file is uploaded through MAVLink FTP, checked with its CRC32,
+    imported with `param import`, and the parameter table is read back once to verify the values.
+
+    :param connection: The MAVLink connection object.
+    :type connection: mavutil.mavlink_connection
+    :param parameters: The parameters to set.
+    :type parameters: list[Parameter]
+    :param remote_path: Path of the uploaded parameter file on the vehicle.
+    :type remote_path: str
+    :param cache_dir: Directory of the parameter table cache, updated with the read-back table.
+    :type cache_dir: str
+    :param window: Maximum number of outstanding FTP writes and read requests.
+    :type window: int
+    :param timeout: Time in seconds to wait for an answer before resending.
+    :type timeout: float
+    :param max_retries: Maximum number of resends for a single request.
+    :type max_retries: int
+    :return: True if all the parameters have their value on the vehicle, and the number of resends.
+    :rtype: tuple[bool, int]
+    :raises ConnectionError: If the transfer or the import fails.
+    """
+    content = encode_parameter_file(parameters)
+    ftp = FtpClient(connection, timeout, max_retries)
+    log(f"Uploading {len(parameters)} parameters ({len(content)} bytes) to {remote_path}")
+    ftp.write_file(remote_path, content, window)
+    if ftp.file_crc32(remote_path) != ftp_crc32(content):
+        raise ConnectionError(f"CRC32 mismatch of the uploaded {remote_path}")
+
+    output = run_shell_command(connection, f"param import {remote_path}")
+    if output:
+        log(output)
+    ftp.remove_file(remote_path)
+
+    firmware_version = request_firmware_version(connection, timeout, max_retries)
+    path = parameter_cache_path(cache_dir, connection.target_system, firmware_version)
+    table = fetch_parameter_table(connection, window, timeout, max_retries)
+    save_parameter_cache(path, request_parameter_hash(connection, timeout), table)
+    mismatched = diff_parameters(parameters, table)
+    for param in mismatched:
+        log(f"Failed to set {param.name} to {param.value}")
+    log(f"Loaded {len(parameters) - len(mismatched)}/{len(parameters)} parameters "
+          f"with {ftp.retries} FTP retries")
+    return not mismatched, ftp.retries
+
+
 def do_reboot(connection: mavutil.mavlink_connection) -> None:
     """
     Sends a command to reboot the PX4 device.
@@ -131,9 +1108,9 @@ def do_reboot(connection: mavutil.mavlink_connection) -> None:
     :param connection: The MAVLink connection object.
     :type connection: mavutil.mavlink_connection
     """
-    print("Rebooting the PX4 device...")
+    log("Rebooting the PX4 device...")
     connection.reboot_autopilot()
-    print("Reboot command sent.")
+    log("Reboot command sent.")
 
 
 def send_heartbeat(connection: mavutil.mavlink_connection) -> None:
@@ -152,6 +1129,143 @@ def send_heartbeat(connection: mavutil.mavlink_connection) -> None:
     )
 
 
+def upload_to_vehicle(port: Optional[str], filename: str, pipeline: bool = False, sync: bool = False,
+                      window: int = DEFAULT_WINDOW, timeout: float = DEFAULT_TIMEOUT,
+                      max_retries: int = DEFAULT_RETRIES, cache_dir: str = DEFAULT_CACHE_DIR,
+                      fast_probe: bool = False, ftp: bool = False, ftp_path: str = DEFAULT_FTP_PATH,
+                      prefix: Optional[str] = None) -> VehicleUploadResult:
+    """
+    Connects to a vehicle, sets the parameters from a file and reboots it.
+
+    :param port: The port or endpoint to connect to, auto-detected if None.
+    :type port: str or None
+    :param filename: The file containing parameters to set.
+    :type filename: str
+    :param pipeline: Use the pipelined upload.
+    :type pipeline: bool
+    :param sync: Send only the parameters that differ from the vehicle, skip the reboot if none does.
+    :type sync: bool
+    :param window: Maximum number of outstanding requests.
+    :type window: int
+    :param timeout: Time in seconds to wait for an answer before resending.
+    :type timeout: float
+    :param max_retries: Maximum number of resends for a single parameter.
+    :type max_retries: int
+    :param cache_dir: Directory of the parameter table and link caches.
+    :type cache_dir: str
+    :param fast_probe: Probe all candidate ports concurrently and cache the detected link.
+    :type fast_probe: bool
+    :param ftp: Load the parameters as a whole file through MAVLink FTP.
+    :type ftp: bool
+    :param ftp_path: Path of the uploaded parameter file on the vehicle.
+    :type ftp_path: str
+    :param prefix: Prefix of the progress lines, to tell concurrent uploads apart.
+    :type prefix: str or None
+    :return: The upload result.
+    :rtype: VehicleUploadResult
+    """
+    result = VehicleUploadResult(port or "auto", filename)
+    start = time.monotonic()
+    connection = None
+    _output.prefix = prefix
+    try:
+        connection = detect_px4_connection(port, fast_probe, cache_dir)
+        if ftp:
+            parameters = read_parameters_file(filename)
+            result.success, result.retries = load_parameters_ftp(
+                connection, parameters, ftp_path, cache_dir, window, timeout, max_retries)
+            result.sent = len(parameters)
+        elif sync or pipeline:
+            parameters = read_parameters_file(filename)
+            if sync:
+                result.success, stats = sync_parameters(
+                    connection, parameters, cache_dir=cache_dir,
+                    window=window, timeout=timeout, max_retries=max_retries)
+            else:
+                result.success, stats = set_parameters_pipelined(
+                    connection, parameters, window=window, timeout=timeout, max_retries=max_retries)
+            result.sent = len(stats)
+            result.retries = sum(stat.retries for stat in stats)
+            if stats:
+                print_upload_report(stats, time.monotonic() - start)
+            else:
+                log("Vehicle parameters already up to date, skipping reboot.")
+        else:
+            result.success = set_parameters_from_file(connection, filename)
+            result.sent = len(read_parameters_file(filename))
+        if result.sent or not sync:
+            do_reboot(connection)
+            result.rebooted = True
+    except Exception as e:
+        log(f"An error occurred: {e}")
+        result.success = False
+        result.error = str(e)
+    finally:
+        if connection is not None:
+            connection.close()
+        _output.prefix = None
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def read_manifest(filename: str) -> List[Tuple[str, str]]:
+    """
+    Reads a fleet manifest with one `port params_file` pair per line.
+
+    Empty lines and lines starting with `#` are ignored. Relative parameters file paths are
+    resolved from the manifest directory.
+
+    :param filename: The manifest file.
+    :type filename: str
+    :return: The (port, parameters file) pairs.
+    :rtype: list[tuple[str, str]]
+    """
+    jobs = []
+    base_dir = os.path.dirname(os.path.abspath(filename))
+    with open(filename, "r", encoding="utf-8") as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            port, params_file = line.split()
+            jobs.append((port, os.path.join(base_dir, params_file)))
+    return jobs
+
+
+def upload_fleet(jobs: List[Tuple[str, str]], **options) -> List[VehicleUploadResult]:
+    """
+    Uploads parameters to several vehicles concurrently, with one thread per link.
+
+    The progress printed by each upload is prefixed with its port.
+
+    :param jobs: The (port, parameters file) pairs.
+    :type jobs: list[tuple[str, str]]
+    :param options: Keyword arguments forwarded to upload_to_vehicle.
+    :return: The upload results, in the order of the jobs.
+    :rtype: list[VehicleUploadResult]
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as executor:
+        futures = [executor.submit(upload_to_vehicle, port, filename, prefix=port or f"vehicle {index}", **options)
+                   for index, (port, filename) in enumerate(jobs)]
+        return [future.result() for future in futures]
+
+
+def print_fleet_summary(results: List[VehicleUploadResult]) -> None:
+    """
+    Prints one summary line per vehicle of a fleet upload.
+
+    :param results: The upload results.
+    :type results: list[VehicleUploadResult]
+    """
+    print(f"{'Port':<28} {'File':<24} {'Status':<7} {'Sent':>5} {'Retries':>8} {'Reboot':>7} {'Time (s)':>9}")
+    for result in results:
+        status = "OK" if result.success else "FAILED"
+        print(f"{result.port:<28} {os.path.basename(result.filename):<24} {status:<7} {result.sent:>5} "
+              f"{result.retries:>8} {'yes' if result.rebooted else 'no':>7} {result.elapsed:>9.2f}")
+        if result.error:
+            print(f"    {result.error}")
+
+
 def main() -> None:
     """
     Main function to parse arguments, establish connection, set parameters, and reboot the device.
@@ -162,23 +1276,75 @@ def main() -> None:
     parser.add_argument(
         "--file", default="params.txt", help="File containing parameters to set"
     )
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        help="Keep several PARAM_SET requests in flight and retry only the ones that time out"
+    )
+    parser.add_argument(
+        "--window", type=int, default=DEFAULT_WINDOW,
+        help="Maximum number of outstanding PARAM_SET requests in pipelined mode"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT,
+        help="Time in seconds to wait for a PARAM_VALUE echo before resending"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=DEFAULT_RETRIES,
+        help="Maximum number of resends for a single parameter"
+    )
+    parser.add_argument(
+        "--sync", action="store_true",
+        help="Read the parameter table first, send only the parameters that differ and skip the reboot if none does"
+    )
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help="Directory of the parameter table cache used by --sync and of the link cache used by --fast-probe"
+    )
+    parser.add_argument(
+        "--fleet", nargs="+", metavar="PORT",
+        help="Upload the parameters file to all the given ports or UDP endpoints concurrently"
+    )
+    parser.add_argument(
+        "--manifest", help="Upload to several vehicles concurrently, one `port params_file` pair per line"
+    )
+    parser.add_argument(
+        "--fast-probe", action="store_true",
+        help="Probe all candidate ports concurrently with short timeouts and cache the detected link"
+    )
+    parser.add_argument(
+        "--ftp", action="store_true",
+        help="Upload the parameters as a file through MAVLink FTP, load it and verify it with a single read-back"
+    )
+    parser.add_argument(
+        "--ftp-path", default=DEFAULT_FTP_PATH, help="Path of the uploaded parameter file on the vehicle"
+    )
     args = parser.parse_args()
+    options = {
+        "pipeline": args.pipeline,
+        "sync": args.sync,
+        "window": args.window,
+        "timeout": args.timeout,
+        "max_retries": args.retries,
+        "cache_dir": args.cache_dir,
+        "fast_probe": args.fast_probe,
+        "ftp": args.ftp,
+        "ftp_path": args.ftp_path,
+    }
 
-    success = False
-    try:
-        connection = detect_px4_connection(args.port)
-        success = set_parameters_from_file(connection, args.file)
-        do_reboot(connection)
-    except Exception as e:
-        print(f"An error occurred: {e}")
-    finally:
-        connection.close()
-        if success:
-            print("All parameters set successfully.")
-            sys.exit(0)
-        else:
-            print("Failed to set all parameters.")
-            sys.exit(1)
+    if args.fleet or args.manifest:
+        jobs = read_manifest(args.manifest) if args.manifest else []
+        jobs += [(port, args.file) for port in args.fleet or []]
+        results = upload_fleet(jobs, **options)
+        print_fleet_summary(results)
+        sys.exit(0 if all(result.success for result in results) else 1)
+
+    result = upload_to_vehicle(args.port, args.file, **options)
+    if result.success:
+        print("All parameters set successfully.")
+        sys.exit(0)
+    else:
+        print("Failed to set all parameters.")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
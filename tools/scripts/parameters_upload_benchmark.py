@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Benchmark of parameters_upload.py against the local MAVLink vehicle stand-in.
+
+Each run starts a stand-in with a generated parameter table behind the selected link conditions,
+uploads a parameters file of the selected size with the selected mode, and measures the wall time,
+the number of retries seen by the vehicle and whether the vehicle table matches the file.
+
+Usage:
+    python parameters_upload_benchmark.py
+    or
+    python parameters_upload_benchmark.py --sizes 50 300 --modes pipelined sync --links telemetry lossy
+
+Options:
+    --sizes: Numbers of parameters in the uploaded file.
+    --modes: Upload modes among sequential, pipelined, sync and ftp.
+    --links: Link conditions among the presets of LINK_PRESETS.
+    --window: Window of the pipelined and sync modes.
+    --json: Write the results to a JSON file to track regressions.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import List
+
+import parameters_upload
+from mavlink_vehicle_standin import LinkConditions, UdpTransport, VehicleStandIn, generate_parameters
+
+LINK_PRESETS = {
+    "usb": LinkConditions(latency=0.001, seed=0),
+    "telemetry": LinkConditions(latency=0.02, jitter=0.005, baud=57600, seed=0),
+    "lossy": LinkConditions(latency=0.05, jitter=0.02, baud=57600, loss=0.1, duplicate=0.05, reorder=0.1, seed=0),
+}
+MODES = ["sequential", "pipelined", "sync", "ftp"]
+# Fraction of the parameters that differ from the vehicle in the sync mode
+SYNC_CHANGED_RATIO = 0.05
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Result of a single benchmark run.
+
+    :param mode: The upload mode.
+    :param link: The link conditions preset.
+    :param size: Number of parameters in the uploaded file.
+    :param wall_time: Upload time in seconds, connection excluded.
+    :param param_sets: PARAM_SET messages sent by the uploader.
+    :param retries: PARAM_SET messages beyond one per changed parameter, or FTP requests resent in the ftp mode.
+    :param success: True if the uploader reported success.
+    :param consistent: True if the vehicle table matches the uploaded file.
+    """
+    mode: str
+    link: str
+    size: int
+    wall_time: float
+    param_sets: int
+    retries: int
+    success: bool
+    consistent: bool
+
+
+def run_benchmark(mode: str, link: str, size: int, window: int = parameters_upload.DEFAULT_WINDOW,
+                  timeout: float = parameters_upload.DEFAULT_TIMEOUT) -> BenchmarkResult:
+    """
+    Uploads a generated parameters file to a fresh stand-in and measures the upload.
+
+    :param mode: The upload mode among MODES.
+    :type mode: str
+    :param link: The link conditions preset among LINK_PRESETS.
+    :type link: str
+    :param size: Number of parameters in the uploaded file.
+    :type size: int
+    :param window: Window of the pipelined and sync modes.
+    :type window: int
+    :param timeout: Time in seconds to wait for an answer before resending.
+    :type timeout: float
+    :return: The benchmark result.
+    :rtype: BenchmarkResult
+    """
+    table = generate_parameters(size)
+    changed = max(1, int(size * SYNC_CHANGED_RATIO)) if mode == "sync" else size
+    with tempfile.TemporaryDirectory() as work_dir:
+        params_file = os.path.join(work_dir, "params.txt")
+        with open(params_file, "w", encoding="utf-8") as file:
+            for index, name in enumerate(table):
+                offset = 1000 if index < changed else 0
+                file.write(f"{name} {index + offset}.5\n" if index % 2 else f"{name} {index + offset}\n")
+        parameters = parameters_upload.read_parameters_file(params_file)
+
+        with VehicleStandIn(UdpTransport(port=0), table, LINK_PRESETS[link]) as vehicle:
+            # The upload functions report every parameter, keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                connection = parameters_upload.detect_px4_connection(vehicle.device)
+                start = time.monotonic()
+                ftp_retries = 0
+                if mode == "sequential":
+                    success = parameters_upload.set_parameters_from_file(connection, params_file)
+                elif mode == "pipelined":
+                    success, _ = parameters_upload.set_parameters_pipelined(
+                        connection, parameters, window=window, timeout=timeout)
+                elif mode == "ftp":
+                    success, ftp_retries = parameters_upload.load_parameters_ftp(
+                        connection, parameters, cache_dir=os.path.join(work_dir, "cache"),
+                        window=window, timeout=timeout)
+                else:
+                    success, _ = parameters_upload.sync_parameters(
+                        connection, parameters, cache_dir=os.path.join(work_dir, "cache"),
+                        window=window, timeout=timeout)
+                wall_time = time.monotonic() - start
+                connection.close()
+            consistent = all(
+                parameters_upload.same_param_value(vehicle.parameters[param.name][0], param.value_f)
+                for param in parameters)
+            param_sets = vehicle.stats.param_sets
+
+    retries = ftp_retries if mode == "ftp" else param_sets - changed
+    return BenchmarkResult(mode, link, size, wall_time, param_sets, retries, success, consistent)
+
+
+def print_results(results: List[BenchmarkResult]) -> None:
+    """
+    Prints the benchmark results as a table.
+
+    :param results: The benchmark results.
+    :type results: list[BenchmarkResult]
+    """
+    print(f"{'Mode':<11} {'Link':<10} {'Size':>5} {'Time (s)':>9} {'Param/s':>8} {'Sets':>6} {'Retries':>8} {'Status':<8}")
+    for result in results:
+        status = "OK" if result.success and result.consistent else "FAILED"
+        print(f"{result.mode:<11} {result.link:<10} {result.size:>5} {result.wall_time:>9.2f} "
+              f"{result.size / result.wall_time:>8.1f} {result.param_sets:>6} {result.retries:>8} {status:<8}")
+
+
+def main() -> None:
+    """
+    Main function to parse arguments, run the benchmark matrix and report the results.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark parameters_upload.py against a vehicle stand-in")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 300], help="Numbers of parameters")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="Upload modes")
+    parser.add_argument("--links", nargs="+", choices=list(LINK_PRESETS), default=list(LINK_PRESETS),
+                        help="Link conditions")
+    parser.add_argument("--window", type=int, default=parameters_upload.DEFAULT_WINDOW,
+                        help="Window of the pipelined and sync modes")
+    parser.add_argument("--timeout", type=float, default=parameters_upload.DEFAULT_TIMEOUT,
+                        help="Time in seconds to wait for an answer before resending")
+    parser.add_argument("--json", help="File to write the results to")
+    args = parser.parse_args()
+
+    results = []
+    for link in args.links:
+        for size in args.sizes:
+            for mode in args.modes:
+                print(f"Uploading {size} parameters with the {mode} mode over the {link} link...")
+                results.append(run_benchmark(mode, link, size, args.window, args.timeout))
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump([asdict(result) for result in results], file, indent=2)
+
+    if not all(result.success and result.consistent for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Spawn planner of the simulation configuration, expanding fleets of vehicles into spawn poses.
+
+A fleet places `count` vehicles of one model as a grid, on a circle or at random in an area. All the
+vehicles, the listed models included, are checked against a minimum separation with a spatial hash
+whose cells are as large as the separation, so that each placement only looks at the vehicles of the
+neighbouring cells. The random placements are drawn until they respect the separation.
+
+The spawn of the PX4 SITL instances is staggered, so that a large swarm does not start all its
+instances, and spawn all its models in Gazebo, at the same time.
+
+YAML Configuration Structure:
+    min_separation: 1.0  # Optional, in meters, defaults to 1.0
+    spawn_interval: 2.0  # Optional, in seconds between two spawn batches, defaults to 0
+    spawn_batch: 4  # Optional, number of vehicles spawned together, defaults to 1
+    models:  # Optional, vehicles placed by hand
+      - name: gz_x500
+        pose: [0, 0, 0, 0, 0, 0]
+    fleets:
+      - name: gz_x500
+        layout: grid  # grid, circle or random
+        count: 20
+        spacing: 2.0  # grid only, defaults to twice the minimum separation
+        columns: 5  # grid only, defaults to a square grid
+        origin: [10, 0]  # grid only, position of the first vehicle
+      - name: gz_x500
+        layout: circle
+        count: 12
+        radius: 10.0
+        center: [0, 0]
+      - name: gz_x500
+        layout: random
+        count: 10
+        area: [-20, 20, -20, 20]  # x min, x max, y min, y max
+        seed: 1  # Optional, for reproducible placements
+    Each fleet also accepts an `altitude` and a `yaw`, defaulting to 0.
+"""
+
+import math
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MIN_SEPARATION = 1.0
+LAYOUTS = ('grid', 'circle', 'random')
+# Random candidates drawn per vehicle before the area is considered too crowded
+MAX_RANDOM_ATTEMPTS = 1000
+# Digits of the planned poses, the millimeter
+POSE_DIGITS = 3
+
+Pose = List[float]
+
+
+class SpatialHash:
+    """
+    Uniform grid of the 2D positions of the placed vehicles, with cells as large as the separation.
+
+    :param cell_size: The minimum separation between two vehicles, in meters.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[Tuple[float, float, str]]] = {}
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def conflict(self, x: float, y: float) -> Optional[str]:
+        """
+        Find a placed vehicle closer than the separation to a position.
+
+        :param x: The x position in meters.
+        :type x: float
+        :param y: The y position in meters.
+        :type y: float
+        :return: The label of the conflicting vehicle, None if the position is free.
+        :rtype: str or None
+        """
+        cell_x, cell_y = self._cell(x, y)
+        for neighbour_x in (cell_x - 1, cell_x, cell_x + 1):
+            for neighbour_y in (cell_y - 1, cell_y, cell_y + 1):
+                for other_x, other_y, label in self.cells.get((neighbour_x, neighbour_y), ()):
+                    if (other_x - x) ** 2 + (other_y - y) ** 2 < self.cell_size ** 2:
+                        return label
+        return None
+
+    def add(self, x: float, y: float, label: str) -> None:
+        """
+        Place a vehicle.
+
+        :param x: The x position in meters.
+        :type x: float
+        :param y: The y position in meters.
+        :type y: float
+        :param label: Label of the vehicle in the error messages.
+        :type label: str
+        """
+        self.cells.setdefault(self._cell(x, y), []).append((x, y, label))
+
+
+def grid_positions(count: int, spacing: float, columns: Optional[int] = None,
+                   origin: Sequence[float] = (0.0, 0.0)) -> List[Tuple[float, float]]:
+    """
+    Place vehicles row by row on a grid.
+
+    :param count: Number of vehicles.
+    :type count: int
+    :param spacing: Distance between two neighbouring vehicles in meters.
+    :type spacing: float
+    :param columns: Number of vehicles per row, defaults to a square grid.
+    :type columns: int, optional
+    :param origin: Position of the first vehicle.
+    :type origin: Sequence[float]
+    :return: The x and y positions.
+    :rtype: list[tuple[float, float]]
+    """
+    columns = columns or math.ceil(math.sqrt(count))
+    return [(origin[0] + (index // columns) * spacing, origin[1] + (index % columns) * spacing)
+            for index in range(count)]
+
+
+def circle_positions(count: int, radius: float, center: Sequence[float] = (0.0, 0.0)) -> List[Tuple[float, float]]:
+    """
+    Place vehicles evenly on a circle, the first one on the x axis of the center.
+
+    :param count: Number of vehicles.
+    :type count: int
+    :param radius: Radius of the circle in meters.
+    :type radius: float
+    :param center: Center of the circle.
+    :type center: Sequence[float]
+    :return: The x and y positions.
+    :rtype: list[tuple[float, float]]
+    """
+    return [(center[0] + radius * math.cos(2 * math.pi * index / count),
+             center[1] + radius * math.sin(2 * math.pi * index / count)) for index in range(count)]
+
+
+def random_positions(count: int, area: Sequence[float], placed: SpatialHash, rng: random.Random,
+                     label: str) -> List[Tuple[float, float]]:
+    """
+    Draw vehicle positions uniformly in an area, away from the placed vehicles and from each other.
+
+    :param count: Number of vehicles.
+    :type count: int
+    :param area: x min, x max, y min and y max of the area in meters.
+    :type area: Sequence[float]
+    :param placed: The placed vehicles, the drawn positions are added to it.
+    :type placed: SpatialHash
+    :param rng: The random generator.
+    :type rng: random.Random
+    :param label: Label of the fleet in the vehicle labels.
+    :type label: str
+    :return: The x and y positions.
+    :rtype: list[tuple[float, float]]
+    :raises ValueError: If the area is too crowded for the separation.
+    """
+    x_min, x_max, y_min, y_max = area
+    positions = []
+    for index in range(count):
+        for _ in range(MAX_RANDOM_ATTEMPTS):
+            x, y = rng.uniform(x_min, x_max), rng.uniform(y_min, y_max)
+            if placed.conflict(x, y) is None:
+                break
+        else:
+            raise ValueError(f"Cannot place {label} vehicle {index}: the area {list(area)} is too small for "
+                             f"{count} vehicles {placed.cell_size} m apart")
+        placed.add(x, y, f"{label} vehicle {index}")
+        positions.append((x, y))
+    return positions
+
+
+def is_number(value: Any) -> bool:
+    """
+    Check that a configuration value is a number, booleans excluded.
+
+    :param value: The configuration value.
+    :type value: Any
+    :return: True if the value is an int or a float.
+    :rtype: bool
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_point(value: Any, size: int) -> bool:
+    """
+    Check that a configuration value is a list of `size` numbers.
+
+    :param value: The configuration value.
+    :type value: Any
+    :param size: The expected number of coordinates.
+    :type size: int
+    :return: True if the value is a list or tuple of `size` numbers.
+    :rtype: bool
+    """
+    return isinstance(value, (list, tuple)) and len(value) == size and all(is_number(v) for v in value)
+
+
+def plan_fleet(fleet: Dict[str, Any], index: int, placed: SpatialHash) -> List[Tuple[str, Pose]]:
+    """
+    Expand a fleet into the name and pose of its vehicles, checked against the placed vehicles.
+
+    :param fleet: The fleet configuration.
+    :type fleet: dict
+    :param index: Index of the fleet in the configuration, for the error messages.
+    :type index: int
+    :param placed: The placed vehicles, the fleet vehicles are added to it.
+    :type placed: SpatialHash
+    :return: The name and pose [x, y, z, roll, pitch, yaw] of each vehicle.
+    :rtype: list[tuple[str, list[float]]]
+    :raises ValueError: If the fleet is malformed or its vehicles are too close to other vehicles.
+    """
+    name, layout, count = fleet.get('name'), fleet.get('layout'), fleet.get('count', 0)
+    label = f"fleet {index} ({name})"
+    if not name:
+        raise ValueError(f"Fleet {index} has no name")
+    if layout not in LAYOUTS:
+        raise ValueError(f"{label} has the layout {layout!r}, expected one of {', '.join(LAYOUTS)}")
+    if not isinstance(count, int) or count < 1:
+        raise ValueError(f"{label} needs a positive vehicle count")
+    if layout == 'random' and not is_point(fleet.get('area'), 4):
+        raise ValueError(f"{label} needs an area [x min, x max, y min, y max]")
+    if layout == 'grid' and 'spacing' in fleet and (not is_number(fleet['spacing']) or fleet['spacing'] <= 0):
+        raise ValueError(f"{label} needs a positive spacing in meters")
+    if layout == 'grid' and 'columns' in fleet and (not isinstance(fleet['columns'], int) or fleet['columns'] < 1):
+        raise ValueError(f"{label} needs a positive number of columns")
+    if layout == 'circle' and (not is_number(fleet.get('radius')) or fleet['radius'] < 0):
+        raise ValueError(f"{label} needs a radius in meters")
+    for key in ('origin', 'center'):
+        if key in fleet and not is_point(fleet[key], 2):
+            raise ValueError(f"{label} needs its {key} as [x, y]")
+    for key in ('altitude', 'yaw'):
+        if key in fleet and not is_number(fleet[key]):
+            raise ValueError(f"{label} needs its {key} as a number")
+
+    if layout == 'random':
+        rng = random.Random(fleet.get('seed'))
+        positions = random_positions(count, fleet['area'], placed, rng, label)
+    else:
+        if layout == 'grid':
+            positions = grid_positions(count, fleet.get('spacing', 2 * placed.cell_size), fleet.get('columns'),
+                                       fleet.get('origin', (0.0, 0.0)))
+        else:
+            positions = circle_positions(count, fleet['radius'], fleet.get('center', (0.0, 0.0)))
+        for vehicle, (x, y) in enumerate(positions):
+            other = placed.conflict(x, y)
+            if other is not None:
+                raise ValueError(f"{label} vehicle {vehicle} is closer than {placed.cell_size} m to {other}")
+            placed.add(x, y, f"{label} vehicle {vehicle}")
+
+    altitude, yaw = fleet.get('altitude', 0.0), fleet.get('yaw', 0.0)
+    # Adding 0.0 turns the -0.0 of the rounded zeros into 0.0
+    return [(str(name), [round(x, POSE_DIGITS) + 0.0, round(y, POSE_DIGITS) + 0.0, altitude, 0.0, 0.0, yaw])
+            for x, y in positions]
+
+
+def plan_spawns(models: Sequence[Tuple[str, Pose]], fleets: Sequence[Dict[str, Any]],
+                min_separation: float = DEFAULT_MIN_SEPARATION) -> List[Tuple[str, Pose]]:
+    """
+    Expand the fleets after the listed models, checking the separation of all the vehicles.
+
+    :param models: The name and pose of the vehicles placed by hand.
+    :type models: Sequence[tuple[str, list[float]]]
+    :param fleets: The fleet configurations.
+    :type fleets: Sequence[dict]
+    :param min_separation: Minimum horizontal distance between two vehicles in meters.
+    :type min_separation: float
+    :return: The name and pose of all the vehicles, the listed models first.
+    :rtype: list[tuple[str, list[float]]]
+    :raises ValueError: If a fleet is malformed or two vehicles are too close.
+    """
+    if min_separation <= 0:
+        raise ValueError("The minimum separation should be positive")
+    placed = SpatialHash(min_separation)
+    for index, (name, pose) in enumerate(models):
+        other = placed.conflict(pose[0], pose[1])
+        if other is not None:
+            raise ValueError(f"Model {index} ({name}) is closer than {min_separation} m to {other}")
+        placed.add(pose[0], pose[1], f"model {index} ({name})")
+    planned = list(models)
+    for index, fleet in enumerate(fleets):
+        planned += plan_fleet(fleet, index, placed)
+    return planned
+
+
+def spawn_delays(count: int, interval: float = 0.0, batch: int = 1) -> List[float]:
+    """
+    Compute the start delay of each vehicle, the vehicles starting by batches.
+
+    :param count: Number of vehicles.
+    :type count: int
+    :param interval: Time between two batches in seconds.
+    :type interval: float
+    :param batch: Number of vehicles per batch.
+    :type batch: int
+    :return: The delay of each vehicle in seconds.
+    :rtype: list[float]
+    """
+    return [(index // max(1, batch)) * interval for index in range(count)]
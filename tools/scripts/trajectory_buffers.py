@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Fixed-capacity sample storage for the UAV trajectory plotter.
+
+Samples are stored as rows of a preallocated NumPy array: the first column holds the sample time
+and the other columns hold one state each. Once the capacity is reached, the oldest rows are
+overwritten, so the memory use and the cost of each append stay constant over long missions.
+
+Each buffer has a single producer, a ROS callback, and the plot thread mirrors it without any lock:
+the producer announces the rows it starts writing, writes them and then increments the row count,
+and a reader validates its copy afterwards, dropping the rows the producer overwrote meanwhile and starting over if the buffer was
+cleared. The desired trajectories, replaced as a whole, are double-buffered so that the reader
+always finds a complete trajectory.
+"""
+
+import itertools
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Columns of the actual trajectory buffer, time first
+ACTUAL_COLUMNS: Tuple[str, ...] = ("time", "x", "y", "z", "vx", "vy", "vz", "heading")
+# States carried by each Coordinate message name, in derivative order
+DESIRED_AXES: Dict[str, Tuple[str, ...]] = {
+    "x": ("x", "vx"),
+    "y": ("y", "vy"),
+    "z": ("z", "vz"),
+    "heading": ("heading",),
+}
+STATES: Tuple[str, ...] = ACTUAL_COLUMNS[1:]
+# Generations are unique across the buffers, so that a mirror also notices when its source is swapped
+_generations = itertools.count(1)
+
+
+def desired_columns(orders: int) -> Tuple[str, ...]:
+    """
+    Returns the columns of a desired trajectory buffer.
+
+    All the derivative orders of the Coordinate messages are kept, the first ones being the states
+    of DESIRED_AXES.
+
+    :param orders: Number of derivative orders.
+    :type orders: int
+    :return: The time column followed by one column per derivative order.
+    :rtype: tuple[str, ...]
+    """
+    return ("time",) + tuple(f"derivative_{k}" for k in range(orders))
+
+
+def as_float_array(values: Sequence[float]) -> np.ndarray:
+    """
+    Returns the values of a message sequence as a float64 array.
+
+    rclpy stores float64 sequences as `array.array('d')`, which is viewed without copy. Other
+    sequences are converted once, without going through Python floats element by element.
+
+    :param values: The sequence.
+    :type values: Sequence[float]
+    :return: The float64 array, possibly sharing the memory of the sequence.
+    :rtype: np.ndarray
+    """
+    if getattr(values, "typecode", None) == "d":
+        return np.frombuffer(values, dtype=np.float64)
+    return np.asarray(values, dtype=np.float64)
+
+
+class RingBuffer:
+    """
+    Preallocated ring buffer of samples with a shared time column.
+
+    :param capacity: Maximum number of rows kept.
+    :param columns: Names of the columns, the first one being the time.
+    :param decimation: Keep one sample out of `decimation` appended ones.
+    """
+
+    def __init__(self, capacity: int, columns: Sequence[str] = ACTUAL_COLUMNS, decimation: int = 1):
+        if capacity < 1:
+            raise ValueError("The buffer capacity should be at least 1")
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        self.decimation = max(1, decimation)
+        self.data = np.full((capacity, len(self.columns)), np.nan)
+        # Number of rows written since the last clear, older rows included, and number of rows
+        # whose write has started, ahead of the count while rows are being written
+        self.count = 0
+        self.started = 0
+        # Changed on each clear, so that mirrors know they have to start over
+        self.generation = next(_generations)
+        self._calls = 0
+        self._source_generation: Optional[int] = None
+        self._source_count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def clear(self) -> None:
+        """
+        Drops all samples, the storage is kept.
+        """
+        self.count = 0
+        self.started = 0
+        self.generation = next(_generations)
+        self._calls = 0
+
+    def append(self, row: Sequence[float]) -> bool:
+        """
+        Appends a sample, subject to decimation.
+
+        :param row: The values of all columns, time first.
+        :type row: Sequence[float]
+        :return: True if the sample was stored.
+        :rtype: bool
+        """
+        self._calls += 1
+        if (self._calls - 1) % self.decimation:
+            return False
+        self.started = self.count + 1
+        self.data[self.count % self.capacity] = row
+        self.count += 1
+        return True
+
+    def extend(self, rows: np.ndarray) -> None:
+        """
+        Appends several samples at once, without decimation. Only the last `capacity` rows are kept.
+
+        :param rows: Array of shape (n, number of columns).
+        :type rows: np.ndarray
+        """
+        rows = rows[-self.capacity:]
+        n = len(rows)
+        start = self.count % self.capacity
+        first = min(n, self.capacity - start)
+        self.started = self.count + n
+        self.data[start:start + first] = rows[:first]
+        self.data[:n - first] = rows[first:]
+        self.count += n
+
+    def assign(self, columns: Sequence[np.ndarray]) -> None:
+        """
+        Replaces all the samples, writing the columns in place into the preallocated storage.
+
+        The columns not given are filled with NaN. Only the last `capacity` rows are kept.
+
+        :param columns: The values of the first columns, time first, all of the same length.
+        :type columns: Sequence[np.ndarray]
+        """
+        self.clear()
+        n = min(len(columns[0]), self.capacity)
+        for k, values in enumerate(columns):
+            self.data[:n, k] = values[len(values) - n:]
+        self.data[:n, len(columns):] = np.nan
+        self.started = n
+        self.count = n
+
+    def ordered(self) -> np.ndarray:
+        """
+        Returns a chronological copy of the stored samples.
+
+        :return: Array of shape (len(self), number of columns).
+        :rtype: np.ndarray
+        """
+        if self.count <= self.capacity:
+            return self.data[:self.count].copy()
+        start = self.count % self.capacity
+        return np.concatenate((self.data[start:], self.data[:start]))
+
+    def view(self) -> np.ndarray:
+        """
+        Returns the stored samples in chronological order, without copy until the buffer wraps around.
+
+        :return: Array of shape (len(self), number of columns).
+        :rtype: np.ndarray
+        """
+        if self.count <= self.capacity:
+            return self.data[:self.count]
+        return self.ordered()
+
+    def since(self, count: int, end: Optional[int] = None) -> np.ndarray:
+        """
+        Returns a copy of the rows written after the first `count` ones, at most `capacity` rows.
+
+        :param count: Number of rows already seen.
+        :type count: int
+        :param end: Number of rows written to copy up to, defaults to all of them.
+        :type end: int, optional
+        :return: Array of shape (n, number of columns).
+        :rtype: np.ndarray
+        """
+        end = self.count if end is None else end
+        new = min(end - count, self.capacity)
+        if new <= 0:
+            return self.data[:0].copy()
+        return self.data[np.arange(end - new, end) % self.capacity]
+
+    def pull(self, source: Union["RingBuffer", "SnapshotBuffer"]) -> Tuple[np.ndarray, bool]:
+        """
+        Mirrors the rows appended to another buffer since the last pull, without blocking its producer.
+
+        The cost is proportional to the number of new rows. The copy is validated once taken: the
+        rows the producer may have overwritten during the copy are dropped, and the copy starts over
+        if the source was cleared or swapped meanwhile.
+
+        :param source: The buffer to mirror, written by another thread. The columns follow those of the
+            source when it is cleared or swapped.
+        :type source: RingBuffer or SnapshotBuffer
+        :return: The new rows, and True if the source was cleared since the last pull.
+        :rtype: tuple[np.ndarray, bool]
+        """
+        snapshot = isinstance(source, SnapshotBuffer)
+        while True:
+            buffer = source.front if snapshot else source
+            # The generation is read before the count, a clear changes both in the other order
+            generation = buffer.generation
+            end = buffer.count
+            reset = generation != self._source_generation
+            seen = 0 if reset else self._source_count
+            rows = buffer.since(seen, end)
+            if buffer.generation != generation or (snapshot and source.front is not buffer):
+                continue
+            if not snapshot:
+                # The slots of the rows whose write started since the count was read held older rows
+                overwritten = buffer.started - buffer.capacity - (end - len(rows))
+                if overwritten > 0:
+                    rows = rows[overwritten:]
+            break
+        if reset:
+            if buffer.columns != self.columns:
+                # The source was widened, the storage follows
+                self.columns = buffer.columns
+                self.index = {name: i for i, name in enumerate(self.columns)}
+                self.data = np.full((self.capacity, len(self.columns)), np.nan)
+            self.clear()
+            self._source_generation = generation
+        self._source_count = end
+        self.extend(rows)
+        return rows, reset
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Returns a chronological copy of a single column.
+
+        :param name: The column name.
+        :type name: str
+        :return: The column values.
+        :rtype: np.ndarray
+        """
+        return self.ordered()[:, self.index[name]]
+
+
+class SnapshotBuffer:
+    """
+    Pair of ring buffers whose samples are replaced as a whole by a single producer.
+
+    The producer assigns the new samples to the back buffer and then publishes it as the front one,
+    so that readers of the front buffer never see a partially written trajectory. Once samples with
+    more derivative orders than the columns are assigned, both buffers are reallocated with the new
+    number of orders, each when it is next the back buffer.
+
+    :param capacity: Maximum number of rows kept.
+    :param orders: Number of derivative orders initially allocated.
+    """
+
+    def __init__(self, capacity: int, orders: int = 1):
+        self._buffers = [RingBuffer(capacity, desired_columns(orders)) for _ in range(2)]
+        self.front = self._buffers[0]
+        self.capacity = capacity
+        # Largest number of derivative orders assigned so far
+        self.orders = orders
+
+    def __len__(self) -> int:
+        return len(self.front)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """
+        The columns of the published samples.
+        """
+        return self.front.columns
+
+    def assign(self, columns: Sequence[np.ndarray]) -> None:
+        """
+        Replaces all the samples, see RingBuffer.assign, and publishes them.
+
+        :param columns: The values of the time and of each derivative order, all of the same length.
+        :type columns: Sequence[np.ndarray]
+        """
+        back = 1 if self.front is self._buffers[0] else 0
+        self.orders = max(self.orders, len(columns) - 1)
+        if len(self._buffers[back].columns) < 1 + self.orders:
+            # Readers still copying the front buffer are not affected by the new back buffer
+            self._buffers[back] = RingBuffer(self.capacity, desired_columns(self.orders))
+        self._buffers[back].assign(columns)
+        self.front = self._buffers[back]
+
+    def view(self) -> np.ndarray:
+        """
+        Returns the published samples, see RingBuffer.view.
+
+        :return: Array of shape (len(self), number of columns).
+        :rtype: np.ndarray
+        """
+        return self.front.view()
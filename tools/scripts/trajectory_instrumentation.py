@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Message rate, latency and callback duration instrumentation of the UAV trajectory plotter.
+
+Every duration is counted in a streaming histogram with logarithmic bins, so that the cost of a
+sample is a logarithm and an increment, the memory is fixed however long the plotter runs, and the
+percentiles are read from the bins within a few percent.
+
+The latency of a message is its receive time minus its PX4 timestamp. Unless the two clocks are
+synchronized, as in a simulation running on the simulation time, the offset between them is
+unknown and the latency is measured above the fastest delivery seen: the smallest receive minus
+PX4 time is taken as the clock offset, so transport and executor delays still show as latency.
+"""
+
+import math
+from typing import Dict, Optional, Sequence
+
+# Range of the histograms, in seconds, and their resolution
+HISTOGRAM_MIN = 1e-6
+HISTOGRAM_MAX = 100.0
+BINS_PER_DECADE = 20
+REPORTED_PERCENTILES = (50.0, 95.0, 99.0)
+
+
+class StreamingHistogram:
+    """
+    Histogram of positive durations with logarithmic bins, and exact count, sum, minimum and maximum.
+
+    Values below the range are counted in the first bin, values above it in the last one.
+
+    :param low: Lower bound of the bins, in seconds.
+    :param high: Upper bound of the bins, in seconds.
+    :param bins_per_decade: Number of bins per power of ten.
+    """
+
+    def __init__(self, low: float = HISTOGRAM_MIN, high: float = HISTOGRAM_MAX,
+                 bins_per_decade: int = BINS_PER_DECADE):
+        self.low = low
+        self.bins_per_decade = bins_per_decade
+        self.counts = [0] * (math.ceil(math.log10(high / low) * bins_per_decade) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        """
+        Counts a value.
+
+        :param value: The duration in seconds.
+        :type value: float
+        """
+        index = int(math.log10(value / self.low) * self.bins_per_decade) + 1 if value > self.low else 0
+        self.counts[min(index, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Estimates a percentile, as the geometric center of its bin, clipped to the exact extrema.
+
+        :param percentile: The percentile, between 0 and 100.
+        :type percentile: float
+        :return: The value in seconds, NaN if nothing was counted.
+        :rtype: float
+        """
+        if not self.count:
+            return math.nan
+        rank = percentile / 100.0 * self.count
+        cumulated = 0
+        for index, count in enumerate(self.counts):
+            cumulated += count
+            if cumulated >= rank and count:
+                break
+        # The values below the range are only bounded by the minimum
+        center = self.low * 10 ** ((index - 0.5) / self.bins_per_decade) if index else self.min
+        return min(max(center, self.min), self.max)
+
+    def summary(self, prefix: str) -> Dict[str, float]:
+        """
+        Returns the mean, maximum and reported percentiles.
+
+        :param prefix: Prefix of the keys.
+        :type prefix: str
+        :return: The values in seconds, by key.
+        :rtype: dict[str, float]
+        """
+        values = {f"{prefix}_mean": self.total / self.count if self.count else math.nan,
+                  f"{prefix}_max": self.max if self.count else math.nan}
+        for percentile in REPORTED_PERCENTILES:
+            values[f"{prefix}_p{percentile:g}"] = self.percentile(percentile)
+        return values
+
+
+class TopicStats:
+    """
+    Rate, latency and callback duration of the messages of a topic.
+
+    :param synchronized: The PX4 timestamps are on the receive clock, the latency is absolute.
+    """
+
+    def __init__(self, synchronized: bool = False):
+        self.synchronized = synchronized
+        self.count = 0
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+        # Messages and receive time at the previous report, for the recent rate
+        self._reported_count = 0
+        self._reported_time: Optional[float] = None
+        self.clock_offset = 0.0 if synchronized else math.inf
+        self.latency = StreamingHistogram()
+        self.duration = StreamingHistogram()
+
+    def received(self, receive_time: float, px4_time: Optional[float] = None) -> None:
+        """
+        Counts a message.
+
+        :param receive_time: The receive time (ROS clock, s).
+        :type receive_time: float
+        :param px4_time: The PX4 timestamp of the message in seconds, if it carries one.
+        :type px4_time: float or None
+        """
+        self.count += 1
+        if self.first_time is None:
+            self.first_time = self._reported_time = receive_time
+        self.last_time = receive_time
+        if px4_time is not None:
+            delay = receive_time - px4_time
+            if delay < self.clock_offset:
+                self.clock_offset = delay
+            self.latency.add(delay - self.clock_offset)
+
+    def to_receive_time(self, px4_time: float) -> float:
+        """
+        Converts a PX4 timestamp to the receive clock, with the estimated clock offset.
+
+        :param px4_time: The PX4 timestamp in seconds.
+        :type px4_time: float
+        :return: The time on the receive clock (ROS clock, s).
+        :rtype: float
+        """
+        return px4_time + (self.clock_offset if math.isfinite(self.clock_offset) else 0.0)
+
+    def handled(self, duration: float) -> None:
+        """
+        Counts the time a callback, or the copy of the samples of a plot frame, took.
+
+        :param duration: Duration of the callback, in seconds.
+        :type duration: float
+        """
+        self.duration.add(duration)
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, float]:
+        """
+        Returns the statistics, the recent rate being measured since the previous summary.
+
+        :param now: The current time (ROS clock, s), for the recent rate.
+        :type now: float or None
+        :return: The count, rates in Hz and durations in seconds, by key.
+        :rtype: dict[str, float]
+        """
+        values = {"count": float(self.count)}
+        elapsed = (self.last_time or 0.0) - (self.first_time or 0.0)
+        values["rate"] = (self.count - 1) / elapsed if elapsed > 0 else math.nan
+        if now is not None:
+            since = now - (self._reported_time if self._reported_time is not None else now)
+            values["recent_rate"] = (self.count - self._reported_count) / since if since > 0 else math.nan
+            self._reported_count, self._reported_time = self.count, now
+        if self.latency.count:
+            values.update(self.latency.summary("latency"))
+        values.update(self.duration.summary("callback"))
+        return values
+
+
+def format_summary(stats: Dict[str, TopicStats], columns: Sequence[str] = (
+        "rate", "latency_p50", "latency_p99", "latency_max", "callback_p50", "callback_p99",
+        "callback_max")) -> str:
+    """
+    Formats the statistics of several topics as a table, the durations in milliseconds.
+
+    :param stats: The statistics by topic label.
+    :type stats: dict[str, TopicStats]
+    :param columns: The summary keys to show.
+    :type columns: Sequence[str]
+    :return: The table.
+    :rtype: str
+    """
+    width = max([len(label) for label in stats] + [5])
+    lines = [f"{'topic':<{width}} {'count':>8} " + " ".join(f"{column:>13}" for column in columns)]
+    for label, topic_stats in stats.items():
+        summary = topic_stats.summary()
+        cells = []
+        for column in columns:
+            value = summary.get(column, math.nan)
+            cells.append(f"{value if column == 'rate' else value * 1e3:>13.3f}")
+        lines.append(f"{label:<{width}} {topic_stats.count:>8d} " + " ".join(cells))
+    return "\n".join(lines)
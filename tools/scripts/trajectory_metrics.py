@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Tracking-error metrics between the desired and actual UAV trajectories.
+
+The actual samples are resampled onto the desired timestamps with linear interpolation, then the
+RMS, maximum and percentile of the error, the time lag of the actual trajectory and its overshoot
+beyond the desired envelope are computed with vectorized NumPy operations. The live plotter
+updates the metrics incrementally: running sums and a streaming histogram of the error, and a lag
+searched over the recent part of the trajectory only. Recordings can be reported offline.
+
+Usage:
+    python trajectory_metrics.py <recording_dir>
+    or
+    python trajectory_metrics.py <recording_dir> --start 60 --end 120 --json report.json
+
+Options:
+    --start: Start of the analyzed window, in seconds from the first sample.
+    --end: End of the analyzed window, in seconds from the first sample.
+    --percentile: Percentile of the absolute error to report.
+    --max-lag: Largest time lag searched, in seconds.
+    --json: Write the report to a JSON file.
+"""
+
+import argparse
+import json
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from trajectory_buffers import ACTUAL_COLUMNS, DESIRED_AXES, STATES
+from trajectory_instrumentation import StreamingHistogram
+
+DEFAULT_PERCENTILE = 95.0
+DEFAULT_MAX_LAG = 1.0
+# Number of desired samples used to search the time lag, longer trajectories are subsampled
+LAG_SAMPLES = 2000
+LAG_STEPS = 101
+# Duration of the recent part of the trajectory the live lag is searched over, in seconds
+LAG_WINDOW = 10.0
+# Range of the live error histograms, in the state units, and their resolution
+ERROR_MIN = 1e-6
+ERROR_MAX = 1e3
+ERROR_BINS_PER_DECADE = 50
+
+
+@dataclass
+class AxisMetrics:
+    """
+    Tracking-error metrics of a single state.
+
+    :param samples: Number of desired samples with an actual value.
+    :param rms: Root mean square of the error.
+    :param max: Maximum absolute error.
+    :param percentile: Percentile of the absolute error.
+    :param lag: Time lag of the actual trajectory behind the desired one, in seconds.
+    :param overshoot: Largest excursion of the actual trajectory beyond the desired envelope.
+    """
+    samples: int = 0
+    rms: float = float("nan")
+    max: float = float("nan")
+    percentile: float = float("nan")
+    lag: float = float("nan")
+    overshoot: float = float("nan")
+
+
+def wrap_angle(angle: np.ndarray) -> np.ndarray:
+    """
+    Wraps angles to [-pi, pi).
+
+    :param angle: The angles in radians.
+    :type angle: np.ndarray
+    :return: The wrapped angles.
+    :rtype: np.ndarray
+    """
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+
+def resample(time: np.ndarray, actual_time: np.ndarray, actual_values: np.ndarray,
+             angular: bool = False) -> np.ndarray:
+    """
+    Resamples actual samples onto other timestamps, NaN outside the actual time range.
+
+    :param time: The timestamps to resample onto.
+    :type time: np.ndarray
+    :param actual_time: The actual sample times, increasing.
+    :type actual_time: np.ndarray
+    :param actual_values: The actual sample values.
+    :type actual_values: np.ndarray
+    :param angular: Unwrap the values before interpolating.
+    :type angular: bool
+    :return: The resampled values.
+    :rtype: np.ndarray
+    """
+    if len(actual_time) == 0:
+        return np.full(len(time), np.nan)
+    values = np.unwrap(actual_values) if angular else actual_values
+    resampled = np.interp(time, actual_time, values)
+    resampled[(time < actual_time[0]) | (time > actual_time[-1])] = np.nan
+    return resampled
+
+
+def estimate_lag(time: np.ndarray, desired: np.ndarray, actual: np.ndarray, angular: bool = False,
+                 max_lag: float = DEFAULT_MAX_LAG) -> float:
+    """
+    Estimates the delay L minimizing the RMS of actual(t + L) - desired(t), over a grid of delays.
+
+    :param time: The desired timestamps, increasing.
+    :type time: np.ndarray
+    :param desired: The desired values.
+    :type desired: np.ndarray
+    :param actual: The actual values resampled onto the desired timestamps, NaN where unknown.
+    :type actual: np.ndarray
+    :param angular: Wrap the error to [-pi, pi).
+    :type angular: bool
+    :param max_lag: Largest delay searched, in seconds.
+    :type max_lag: float
+    :return: The estimated delay in seconds, NaN if there is not enough data.
+    :rtype: float
+    """
+    valid = np.isfinite(actual) & np.isfinite(desired)
+    if valid.sum() < 2:
+        return float("nan")
+    t, d, a = time[valid], desired[valid], actual[valid]
+    step = max(1, len(t) // LAG_SAMPLES)
+    lags = np.linspace(0.0, max_lag, LAG_STEPS)
+    # One row per candidate lag, the actual trajectory is shifted back by the lag
+    shifted_time = t[None, ::step] + lags[:, None]
+    shifted = np.interp(shifted_time, t, a)
+    error = shifted - d[None, ::step]
+    if angular:
+        error = wrap_angle(error)
+    error[shifted_time > t[-1]] = np.nan
+    counts = np.isfinite(error).sum(axis=1)
+    with np.errstate(invalid="ignore"):
+        rms = np.sqrt(np.nansum(error ** 2, axis=1) / counts)
+    # Require enough overlap so that large lags are not favored by a short tail
+    rms[counts < max(2, counts[0] // 2)] = np.inf
+    return float(lags[np.argmin(rms)])
+
+
+def metrics_from_resampled(time: np.ndarray, desired: np.ndarray, actual: np.ndarray, angular: bool = False,
+                           percentile: float = DEFAULT_PERCENTILE,
+                           max_lag: float = DEFAULT_MAX_LAG) -> AxisMetrics:
+    """
+    Computes the metrics of a state from the actual values resampled onto the desired timestamps.
+
+    :param time: The desired timestamps, increasing.
+    :type time: np.ndarray
+    :param desired: The desired values.
+    :type desired: np.ndarray
+    :param actual: The resampled actual values, NaN where unknown.
+    :type actual: np.ndarray
+    :param angular: Wrap the error to [-pi, pi).
+    :type angular: bool
+    :param percentile: Percentile of the absolute error to compute.
+    :type percentile: float
+    :param max_lag: Largest time lag searched, in seconds.
+    :type max_lag: float
+    :return: The metrics.
+    :rtype: AxisMetrics
+    """
+    valid = np.isfinite(actual) & np.isfinite(desired)
+    if not valid.any():
+        return AxisMetrics()
+    error = actual[valid] - desired[valid]
+    if angular:
+        error = wrap_angle(error)
+    abs_error = np.abs(error)
+    if angular:
+        overshoot = float("nan")
+    else:
+        envelope_low, envelope_high = desired[valid].min(), desired[valid].max()
+        overshoot = float(max(0.0, actual[valid].max() - envelope_high, envelope_low - actual[valid].min()))
+    return AxisMetrics(
+        samples=int(valid.sum()),
+        rms=float(np.sqrt(np.mean(error ** 2))),
+        max=float(abs_error.max()),
+        percentile=float(np.percentile(abs_error, percentile)),
+        lag=estimate_lag(time, desired, actual, angular, max_lag),
+        overshoot=overshoot,
+    )
+
+
+class ErrorHistogram(StreamingHistogram):
+    """
+    Streaming histogram of absolute errors, filled from arrays.
+
+    The percentiles are read from the bins within about 2 %, and clipped to the exact extrema.
+    """
+
+    def __init__(self):
+        super().__init__(ERROR_MIN, ERROR_MAX, ERROR_BINS_PER_DECADE)
+        self.counts = np.array(self.counts)
+
+    def extend(self, values: np.ndarray) -> None:
+        """
+        Counts several values, see StreamingHistogram.add.
+
+        :param values: The absolute errors.
+        :type values: np.ndarray
+        """
+        if len(values) == 0:
+            return
+        index = np.zeros(len(values), dtype=int)
+        above = values > self.low
+        index[above] = (np.log10(values[above] / self.low) * self.bins_per_decade).astype(int) + 1
+        self.counts += np.bincount(np.minimum(index, len(self.counts) - 1), minlength=len(self.counts))
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+
+class AxisTracker:
+    """
+    Incremental tracking-error metrics of a single state.
+
+    The actual values are resampled onto the desired timestamps as soon as the actual samples
+    cover them, and their errors are accumulated, so each update only processes the new part of
+    the trajectory. The lag is searched over the last LAG_WINDOW seconds.
+
+    :param angular: The state is an angle, errors are wrapped to [-pi, pi).
+    """
+
+    def __init__(self, angular: bool = False):
+        self.angular = angular
+        self.desired_time = np.empty(0)
+        self.desired = np.empty(0)
+        self.actual = np.empty(0)
+        self._processed = 0
+        self._clear_sums()
+
+    def _clear_sums(self) -> None:
+        self._samples = 0
+        self._squared_error = 0.0
+        self._errors = ErrorHistogram()
+        # Extrema of the desired and actual values, for the overshoot
+        self._desired_range = (np.inf, -np.inf)
+        self._actual_range = (np.inf, -np.inf)
+
+    def reset(self, desired_time: np.ndarray, desired: np.ndarray) -> None:
+        """
+        Starts tracking a new desired trajectory.
+
+        :param desired_time: The desired timestamps, increasing.
+        :type desired_time: np.ndarray
+        :param desired: The desired values.
+        :type desired: np.ndarray
+        """
+        if len(self.desired) == len(desired):
+            # Same length as the previous trajectory, the arrays are reused
+            self.desired_time[:] = desired_time
+            self.desired[:] = desired
+            self.actual.fill(np.nan)
+        else:
+            self.desired_time = np.array(desired_time, dtype=float)
+            self.desired = np.array(desired, dtype=float)
+            self.actual = np.full(len(self.desired), np.nan)
+        self._processed = 0
+        self._clear_sums()
+
+    def update(self, actual_time: np.ndarray, actual_values: np.ndarray) -> None:
+        """
+        Resamples the actual samples onto the desired timestamps they newly cover.
+
+        :param actual_time: All the actual sample times of the current trajectory, increasing.
+        :type actual_time: np.ndarray
+        :param actual_values: The actual sample values.
+        :type actual_values: np.ndarray
+        """
+        if len(actual_time) == 0:
+            return
+        start = self._processed
+        end = int(np.searchsorted(self.desired_time, actual_time[-1], side="right"))
+        if end <= start:
+            return
+        # Only the actual samples around the new desired timestamps are interpolated
+        first = max(0, int(np.searchsorted(actual_time, self.desired_time[start], side="right")) - 1)
+        self.actual[start:end] = resample(
+            self.desired_time[start:end], actual_time[first:], actual_values[first:], self.angular)
+        self._processed = end
+
+        desired, actual = self.desired[start:end], self.actual[start:end]
+        valid = np.isfinite(actual) & np.isfinite(desired)
+        if not valid.any():
+            return
+        desired, actual = desired[valid], actual[valid]
+        error = actual - desired
+        if self.angular:
+            error = wrap_angle(error)
+        self._samples += len(error)
+        self._squared_error += float(np.dot(error, error))
+        self._errors.extend(np.abs(error))
+        self._desired_range = (min(self._desired_range[0], desired.min()), max(self._desired_range[1], desired.max()))
+        self._actual_range = (min(self._actual_range[0], actual.min()), max(self._actual_range[1], actual.max()))
+
+    def metrics(self, percentile: float = DEFAULT_PERCENTILE, max_lag: float = DEFAULT_MAX_LAG) -> AxisMetrics:
+        """
+        Returns the metrics over the part of the trajectory covered so far, the lag over its last
+        LAG_WINDOW seconds.
+
+        :param percentile: Percentile of the absolute error to compute.
+        :type percentile: float
+        :param max_lag: Largest time lag searched, in seconds.
+        :type max_lag: float
+        :return: The metrics.
+        :rtype: AxisMetrics
+        """
+        if not self._samples:
+            return AxisMetrics()
+        end = self._processed
+        start = int(np.searchsorted(self.desired_time[:end], self.desired_time[end - 1] - LAG_WINDOW - max_lag))
+        if self.angular:
+            overshoot = float("nan")
+        else:
+            overshoot = float(max(0.0, self._actual_range[1] - self._desired_range[1],
+                                  self._desired_range[0] - self._actual_range[0]))
+        return AxisMetrics(
+            samples=self._samples,
+            rms=float(np.sqrt(self._squared_error / self._samples)),
+            max=self._errors.max,
+            percentile=self._errors.percentile(percentile),
+            lag=estimate_lag(self.desired_time[start:end], self.desired[start:end], self.actual[start:end],
+                             self.angular, max_lag),
+            overshoot=overshoot,
+        )
+
+
+def report_recording(directory: str, start: Optional[float] = None, end: Optional[float] = None,
+                     percentile: float = DEFAULT_PERCENTILE,
+                     max_lag: float = DEFAULT_MAX_LAG) -> Dict[str, AxisMetrics]:
+    """
+    Computes the metrics of each state over a recording of the trajectory plotter.
+
+    :param directory: The recording directory.
+    :type directory: str
+    :param start: Start of the window, in seconds from the first sample.
+    :type start: float or None
+    :param end: End of the window, in seconds from the first sample.
+    :type end: float or None
+    :param percentile: Percentile of the absolute error to compute.
+    :type percentile: float
+    :param max_lag: Largest time lag searched, in seconds.
+    :type max_lag: float
+    :return: The metrics of each state.
+    :rtype: dict[str, AxisMetrics]
+    """
+    from trajectory_recording import Recording
+
+    recording = Recording(directory)
+    origin = recording.start_time()
+    window_start = origin + (start or 0.0)
+    window_end = origin + end if end is not None else np.inf
+    odometry = recording.odometry(window_start, window_end)
+    desired = recording.desired(window_start, window_end)
+
+    report = {}
+    for axis, states in DESIRED_AXES.items():
+        rows = desired[axis][np.isfinite(desired[axis][:, 0])]
+        for k, state in enumerate(states):
+            angular = state == "heading"
+            actual = resample(rows[:, 0], odometry[:, 0], odometry[:, 1 + ACTUAL_COLUMNS.index(state)], angular)
+            report[state] = metrics_from_resampled(rows[:, 0], rows[:, 1 + k], actual, angular, percentile, max_lag)
+    return {state: report[state] for state in STATES}
+
+
+def print_report(report: Dict[str, AxisMetrics], percentile: float = DEFAULT_PERCENTILE) -> None:
+    """
+    Prints the metrics of each state as a table.
+
+    :param report: The metrics of each state.
+    :type report: dict[str, AxisMetrics]
+    :param percentile: The computed percentile, for the column title.
+    :type percentile: float
+    """
+    print(f"{'State':<8} {'Samples':>8} {'RMS':>9} {'Max':>9} {'P' + format(percentile, 'g'):>9} "
+          f"{'Lag (s)':>8} {'Overshoot':>10}")
+    for state, metrics in report.items():
+        print(f"{state:<8} {metrics.samples:>8} {metrics.rms:>9.4f} {metrics.max:>9.4f} "
+              f"{metrics.percentile:>9.4f} {metrics.lag:>8.3f} {metrics.overshoot:>10.4f}")
+
+
+def main() -> None:
+    """
+    Main function to parse arguments and report the metrics of a recording.
+    """
+    parser = argparse.ArgumentParser(description="Tracking-error report of a trajectory plotter recording")
+    parser.add_argument("recording", help="Recording directory")
+    parser.add_argument("--start", type=float, help="Start of the window, in seconds from the first sample")
+    parser.add_argument("--end", type=float, help="End of the window, in seconds from the first sample")
+    parser.add_argument("--percentile", type=float, default=DEFAULT_PERCENTILE,
+                        help="Percentile of the absolute error to report")
+    parser.add_argument("--max-lag", type=float, default=DEFAULT_MAX_LAG, help="Largest time lag searched, in s")
+    parser.add_argument("--json", help="File to write the report to")
+    args = parser.parse_args()
+
+    report = report_recording(args.recording, args.start, args.end, args.percentile, args.max_lag)
+    print_report(report, args.percentile)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({state: asdict(metrics) for state, metrics in report.items()}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
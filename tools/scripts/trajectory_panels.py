@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+The seven desired vs actual trajectory panels of the UAV trajectory plotter.
+
+The axes and line artists are created once and updated with `set_data`. On interactive backends
+the lines are blitted over a cached background, and the axes are only rescaled, with a margin,
+when new samples leave the current limits.
+"""
+
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from matplotlib import pyplot as plt
+from matplotlib.lines import Line2D
+
+from trajectory_buffers import ACTUAL_COLUMNS, DESIRED_AXES, RingBuffer
+
+PANELS: Tuple[Tuple[str, str], ...] = (
+    ("x", "X Position"),
+    ("y", "Y Position"),
+    ("z", "Z Position"),
+    ("vx", "X Velocity"),
+    ("vy", "Y Velocity"),
+    ("vz", "Z Velocity"),
+    ("heading", "Heading"),
+)
+# Fraction of the data span added around the data when an axis is rescaled
+LIMIT_MARGIN = 0.1
+
+
+def desired_column(key: str) -> Tuple[str, int]:
+    """
+    Returns the desired axis buffer holding a state, and the column of the state in it.
+
+    :param key: The state name.
+    :type key: str
+    :return: The Coordinate name and the column index.
+    :rtype: tuple[str, int]
+    """
+    for axis, states in DESIRED_AXES.items():
+        if key in states:
+            return axis, 1 + states.index(key)
+    raise KeyError(key)
+
+
+def _span(lower: float, upper: float) -> Tuple[float, float]:
+    margin = max((upper - lower) * LIMIT_MARGIN, 1e-3)
+    return lower - margin, upper + margin
+
+
+class TrajectoryFigure:
+    """
+    Figure with one panel per state, each showing the desired and actual trajectories of the vehicles.
+
+    The vehicles are overlaid in the same panels, one color per vehicle, the desired trajectory
+    being dashed. A figure with a single unnamed vehicle keeps the two-color look of a single plot.
+
+    :param animated: Blit the lines over a cached background, for live plots.
+    :param vehicles: The names of the vehicles known when the figure is created.
+    """
+
+    def __init__(self, animated: bool = True, vehicles: Sequence[str] = ("",)):
+        self.animated = animated
+        self.fig, axes = plt.subplots(7, 1, figsize=(10, 15))
+        self.axes = dict(zip((key for key, _ in PANELS), axes))
+        # Lines of each vehicle, then of each state
+        self.desired_lines: Dict[str, Dict[str, Line2D]] = {}
+        self.actual_lines: Dict[str, Dict[str, Line2D]] = {}
+        for key, label in PANELS:
+            self.axes[key].set_title(label)
+        for vehicle in vehicles:
+            self.add_vehicle(vehicle)
+        self.fig.tight_layout()
+        self._background = None
+        if animated:
+            self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def add_vehicle(self, vehicle: str) -> None:
+        """
+        Adds the lines of a vehicle, the next update redraws the whole figure.
+
+        :param vehicle: The vehicle name, empty for a single unnamed vehicle.
+        :type vehicle: str
+        """
+        if vehicle in self.desired_lines:
+            return
+        if vehicle:
+            color = f"C{len(self.desired_lines) % 10}"
+            desired_style = {"color": color, "linestyle": "--", "label": "_nolegend_"}
+            actual_style = {"color": color, "label": vehicle}
+        else:
+            desired_style = {"label": "Desired"}
+            actual_style = {"label": "Actual"}
+        self.desired_lines[vehicle] = {}
+        self.actual_lines[vehicle] = {}
+        for key, _ in PANELS:
+            ax = self.axes[key]
+            (self.desired_lines[vehicle][key],) = ax.plot([], [], animated=self.animated, **desired_style)
+            (self.actual_lines[vehicle][key],) = ax.plot([], [], animated=self.animated, **actual_style)
+            if not vehicle:
+                ax.legend(loc="upper right")
+        if vehicle:
+            # A single legend of the vehicle colors, on the top panel
+            self.axes[PANELS[0][0]].legend(loc="upper right", fontsize="small", title="dashed: desired",
+                                           title_fontsize="small", ncol=-(-len(self.desired_lines) // 4))
+        self._background = None
+
+    def _on_draw(self, _) -> None:
+        # Recapture the background after every full draw (first show, resize, rescale)
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self) -> None:
+        for vehicle in self.desired_lines:
+            for key, _ in PANELS:
+                self.axes[key].draw_artist(self.desired_lines[vehicle][key])
+                self.axes[key].draw_artist(self.actual_lines[vehicle][key])
+
+    def _extend_limits(self, key: str, time: np.ndarray, values: np.ndarray, fit: bool) -> bool:
+        ax = self.axes[key]
+        valid = np.isfinite(values)
+        if not valid.any():
+            return False
+        t_min, t_max = time[valid].min(), time[valid].max()
+        v_min, v_max = values[valid].min(), values[valid].max()
+        changed = False
+        x_low, x_high = ax.get_xlim()
+        if fit or t_min < x_low or t_max > x_high:
+            lower, upper = (t_min, t_max) if fit else (min(t_min, x_low), max(t_max, x_high))
+            ax.set_xlim(*_span(lower, upper))
+            changed = True
+        y_low, y_high = ax.get_ylim()
+        if fit or v_min < y_low or v_max > y_high:
+            lower, upper = (v_min, v_max) if fit else (min(v_min, y_low), max(v_max, y_high))
+            ax.set_ylim(*_span(lower, upper))
+            changed = True
+        return changed
+
+    def _set_lines(self, vehicle: str, desired_data: Dict[str, np.ndarray], actual_data: np.ndarray) -> None:
+        for key, _ in PANELS:
+            axis, column = desired_column(key)
+            self.desired_lines[vehicle][key].set_data(desired_data[axis][:, 0], desired_data[axis][:, column])
+            self.actual_lines[vehicle][key].set_data(actual_data[:, 0], actual_data[:, ACTUAL_COLUMNS.index(key)])
+
+    def show_data(self, desired: Dict[str, Dict[str, np.ndarray]], actual: Dict[str, np.ndarray]) -> None:
+        """
+        Sets the whole data of a static figure and fits the limits to it.
+
+        :param desired: For each vehicle, the desired trajectory of each Coordinate name, time first.
+        :type desired: dict[str, dict[str, np.ndarray]]
+        :param actual: For each vehicle, the actual trajectory rows, in ACTUAL_COLUMNS order.
+        :type actual: dict[str, np.ndarray]
+        """
+        for vehicle in actual:
+            self.add_vehicle(vehicle)
+            self._set_lines(vehicle, desired[vehicle], actual[vehicle])
+        for ax in self.axes.values():
+            ax.relim()
+            ax.autoscale_view()
+
+    def update(self, desired: Dict[str, Dict[str, RingBuffer]], actual: Dict[str, RingBuffer],
+               new_actual: Dict[str, np.ndarray], refit: bool) -> None:
+        """
+        Updates the lines and redraws the figure, blitting when no rescale is needed.
+
+        :param desired: For each vehicle, the desired trajectory buffer of each Coordinate name.
+        :type desired: dict[str, dict[str, RingBuffer]]
+        :param actual: For each vehicle, the actual trajectory buffer.
+        :type actual: dict[str, RingBuffer]
+        :param new_actual: For each vehicle, the actual rows appended since the last update.
+        :type new_actual: dict[str, np.ndarray]
+        :param refit: Fit the limits to all the data, after a new trajectory or vehicle was received.
+        :type refit: bool
+        """
+        actual_data = {vehicle: buffer.view() for vehicle, buffer in actual.items()}
+        desired_data = {
+            vehicle: {axis: buffer.view() for axis, buffer in buffers.items()}
+            for vehicle, buffers in desired.items()
+        }
+        for vehicle in actual_data:
+            self._set_lines(vehicle, desired_data[vehicle], actual_data[vehicle])
+        rescale = False
+        for key, _ in PANELS:
+            axis, column = desired_column(key)
+            state = ACTUAL_COLUMNS.index(key)
+            if refit:
+                data = np.concatenate(
+                    [desired_data[vehicle][axis][:, [0, column]] for vehicle in actual_data]
+                    + [data[:, [0, state]] for data in actual_data.values()])
+                rescale |= self._extend_limits(key, data[:, 0], data[:, 1], True)
+            else:
+                for rows in new_actual.values():
+                    if len(rows):
+                        rescale |= self._extend_limits(key, rows[:, 0], rows[:, state], False)
+
+        canvas = self.fig.canvas
+        if rescale or self._background is None or not canvas.supports_blit:
+            # Full draw, the draw event recaptures the background and draws the lines
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            self._draw_lines()
+        if canvas.supports_blit:
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
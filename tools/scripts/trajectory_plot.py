@@ -1,195 +1,371 @@
 import rclpy
+from rclpy.callback_groups import MutuallyExclusiveCallbackGroup
+from rclpy.executors import ExternalShutdownException, MultiThreadedExecutor, SingleThreadedExecutor
 from rclpy.node import Node
 from ros2_uav_interfaces.msg import Coordinate
 from px4_msgs.msg import VehicleOdometry
+from diagnostic_msgs.msg import DiagnosticArray, DiagnosticStatus, KeyValue
 import matplotlib
 from matplotlib import pyplot as plt
 import math
+import os
+import re
 import threading
-from copy import deepcopy
-
-matplotlib.use("TkAgg")  # Ensure Matplotlib uses TkAgg backend, suitable for threading
+import time
+from dataclasses import asdict
+from trajectory_buffers import (
+    ACTUAL_COLUMNS,
+    DESIRED_AXES,
+    STATES,
+    RingBuffer,
+    SnapshotBuffer,
+    as_float_array,
+)
+from trajectory_instrumentation import TopicStats, format_summary
+from trajectory_metrics import AxisTracker
+from trajectory_panels import TrajectoryFigure
+from trajectory_recording import TrajectoryRecorder
 
 px4QosProfile = rclpy.qos.qos_profile_sensor_data
 px4QosProfile.reliability = rclpy.qos.QoSReliabilityPolicy.BEST_EFFORT
 
-lock = threading.Lock()
+# Odometry topic of the vehicles found by namespace discovery
+VEHICLE_TOPIC = re.compile(r"^/(uav\d+)/fmu/out/vehicle_odometry$")
+DISCOVERY_PERIOD = 2.0
 
 
-class UAVTrajectoryPlotter(Node):
-    def __init__(self):
-        super().__init__("uav_trajectory_plotter")
-        self.coordinates_subscriber = self.create_subscription(
-            Coordinate, "/uav0/debug/coordinates", self.coordinates_callback, 20
+class VehicleTrajectory:
+    """
+    Subscriptions, bounded sample buffers and tracking metrics of a single vehicle.
+
+    The callbacks of a vehicle are mutually exclusive, so that each buffer has a single producer,
+    and the plot thread mirrors the buffers without blocking them.
+
+    :param node: The plotter node.
+    :param namespace: The vehicle namespace, without slashes.
+    """
+
+    def __init__(self, node, namespace):
+        self.node = node
+        self.namespace = namespace
+        capacity = node.get_parameter("buffer_capacity").value
+        self.callback_group = MutuallyExclusiveCallbackGroup()
+        # All the derivative orders of each Coordinate name are kept, and replaced as a whole,
+        # the buffers are widened when messages carry more orders than the plotted states
+        self.desired_trajectory = {
+            name: SnapshotBuffer(capacity, len(states)) for name, states in DESIRED_AXES.items()
+        }
+        self.actual_trajectory = RingBuffer(
+            capacity, ACTUAL_COLUMNS, node.get_parameter("decimation").value
+        )
+        self.time_init = node.get_clock().now().nanoseconds / 1e9
+        self.final_time = 0
+        self.trackers = {state: AxisTracker(angular=state == "heading") for state in STATES}
+        # Rate, latency and duration of the callbacks of each topic
+        synchronized = node.get_parameter("px4_time_synchronized").value
+        self.stats = {"coordinates": TopicStats(), "odometry": TopicStats(synchronized)}
+        self.use_px4_time = node.get_parameter("time_source").value == "px4"
+
+        # One recording directory per vehicle
+        record_path = node.get_parameter("record_path").value
+        self.recorder = (
+            TrajectoryRecorder(os.path.join(record_path, namespace)) if record_path else None
+        )
+        self.metrics_publisher = None
+        metrics_rate = node.get_parameter("metrics_rate").value
+        if metrics_rate > 0:
+            self.metrics_publisher = node.create_publisher(
+                DiagnosticArray, f"/{namespace}/debug/tracking_metrics", 10
+            )
+            self.metrics_timer = node.create_timer(
+                1.0 / metrics_rate, self.publish_metrics, callback_group=self.callback_group
+            )
+        self.coordinates_subscriber = node.create_subscription(
+            Coordinate,
+            f"/{namespace}/debug/coordinates",
+            self.coordinates_callback,
+            20,
+            callback_group=self.callback_group,
         )
-        self.odometry_subscriber = self.create_subscription(
+        self.odometry_subscriber = node.create_subscription(
             VehicleOdometry,
-            "/uav0/fmu/out/vehicle_odometry",
+            f"/{namespace}/fmu/out/vehicle_odometry",
             self.odometry_callback,
             px4QosProfile,
+            callback_group=self.callback_group,
         )
-        self.fig, self.ax = plt.subplots(
-            7, 1, figsize=(10, 15)
-        )  # For x, y, z, vx, vy, vz, heading
-        self.desired_trajectory = {
-            "time_x": [],
-            "time_vx": [],
-            "time_y": [],
-            "time_vy": [],
-            "time_z": [],
-            "time_vz": [],
-            "time_heading": [],
-            "x": [],
-            "y": [],
-            "z": [],
-            "vx": [],
-            "vy": [],
-            "vz": [],
-            "heading": [],
-        }
-        self.actual_trajectory = {
-            "time_x": [],
-            "time_vx": [],
-            "time_y": [],
-            "time_vy": [],
-            "time_z": [],
-            "time_vz": [],
-            "time_heading": [],
-            "x": [],
-            "y": [],
-            "z": [],
-            "vx": [],
-            "vy": [],
-            "vz": [],
-            "heading": [],
-        }
-        self.time_init = self.get_clock().now().nanoseconds / 1e9
-        self.final_time = 0
 
     def coordinates_callback(self, msg):
-        with lock:
-            # Add new trajectory points
-            if msg.name == "x":
-                self.actual_trajectory["x"] = []
-                self.actual_trajectory["vx"] = []
-                self.actual_trajectory["time_x"] = []
-                self.actual_trajectory["time_vx"] = []
-                self.desired_trajectory["time_x"] = msg.timestamps
-                self.desired_trajectory["time_vx"] = msg.timestamps
-                self.desired_trajectory["x"] = msg.derivatives[0].data
-                self.desired_trajectory["vx"] = msg.derivatives[1].data
-            elif msg.name == "y":
-                self.actual_trajectory["y"] = []
-                self.actual_trajectory["vy"] = []
-                self.actual_trajectory["time_y"] = []
-                self.actual_trajectory["time_vy"] = []
-                self.desired_trajectory["time_y"] = msg.timestamps
-                self.desired_trajectory["time_vy"] = msg.timestamps
-                self.desired_trajectory["y"] = msg.derivatives[0].data
-                self.desired_trajectory["vy"] = msg.derivatives[1].data
-            elif msg.name == "z":
-                self.actual_trajectory["z"] = []
-                self.actual_trajectory["vz"] = []
-                self.actual_trajectory["time_z"] = []
-                self.actual_trajectory["time_vz"] = []
-                self.desired_trajectory["time_z"] = msg.timestamps
-                self.desired_trajectory["time_vz"] = msg.timestamps
-                self.desired_trajectory["z"] = msg.derivatives[0].data
-                self.desired_trajectory["vz"] = msg.derivatives[1].data
-            elif msg.name == "heading":
-                self.actual_trajectory["heading"] = []
-                self.actual_trajectory["time_heading"] = []
-                self.desired_trajectory["time_heading"] = msg.timestamps
-                self.desired_trajectory["heading"] = msg.derivatives[0].data
-
-            self.time_init = self.get_clock().now().nanoseconds / 1e9
-            self.final_time = msg.timestamps[-1]
+        entered = time.perf_counter()
+        self.stats["coordinates"].received(self.node.get_clock().now().nanoseconds / 1e9)
+        # The message sequences are viewed as float64 arrays, without per-element copies
+        timestamps = as_float_array(msg.timestamps)
+        derivatives = [as_float_array(derivative.data) for derivative in msg.derivatives]
+        if self.recorder is not None:
+            self.recorder.record_coordinates(
+                self.node.get_clock().now().nanoseconds / 1e9,
+                msg.name,
+                timestamps,
+                derivatives,
+            )
+
+        # Replace the desired trajectory of this axis, in the back buffer of its snapshot
+        if msg.name in self.desired_trajectory:
+            self.desired_trajectory[msg.name].assign([timestamps] + derivatives)
+
+        # The time origin is reset, samples of the previous trajectory are dropped
+        self.actual_trajectory.clear()
+        self.time_init = self.node.get_clock().now().nanoseconds / 1e9
+        self.final_time = timestamps[-1]
+
+        # All the trajectories share the new time origin, the metrics start over
+        for name, buffer in self.desired_trajectory.items():
+            desired = buffer.view()
+            for k, state in enumerate(DESIRED_AXES[name]):
+                self.trackers[state].reset(desired[:, 0], desired[:, 1 + k])
+        self.stats["coordinates"].handled(time.perf_counter() - entered)
 
     def odometry_callback(self, msg):
-        with lock:
-            # Orientation (quaternion to heading)
-            heading = self.quaternion_to_heading(
-                [msg.q[0], msg.q[1], -msg.q[2], -msg.q[3]]
-            )
+        entered = time.perf_counter()
+        # Orientation (quaternion to heading)
+        heading = quaternion_to_heading([msg.q[0], msg.q[1], -msg.q[2], -msg.q[3]])
 
-            # Update actual trajectory data
-            current_time = self.get_clock().now().nanoseconds / 1e9 - self.time_init
-
-            if current_time > self.final_time:
-                return
-            self.actual_trajectory["x"].append(msg.position[0])
-            self.actual_trajectory["y"].append(-msg.position[1])
-            self.actual_trajectory["z"].append(-msg.position[2])
-            self.actual_trajectory["vx"].append(msg.velocity[0])
-            self.actual_trajectory["vy"].append(-msg.velocity[1])
-            self.actual_trajectory["vz"].append(-msg.velocity[2])
-            self.actual_trajectory["heading"].append(heading)
-
-            self.actual_trajectory["time_x"].append(current_time)
-            self.actual_trajectory["time_vx"].append(current_time)
-            self.actual_trajectory["time_y"].append(current_time)
-            self.actual_trajectory["time_vy"].append(current_time)
-            self.actual_trajectory["time_z"].append(current_time)
-            self.actual_trajectory["time_vz"].append(current_time)
-            self.actual_trajectory["time_heading"].append(current_time)
-
-    def quaternion_to_heading(self, quaternion):
-        # Convert quaternion to heading
-        siny_cosp = 2 * (quaternion[3] * quaternion[2] + quaternion[0] * quaternion[1])
-        cosy_cosp = 1 - 2 * (quaternion[1] ** 2 + quaternion[2] ** 2)
-        return math.atan2(siny_cosp, cosy_cosp)
+        # Update actual trajectory data
+        receive_time = self.node.get_clock().now().nanoseconds / 1e9
+        stats = self.stats["odometry"]
+        stats.received(receive_time, msg.timestamp * 1e-6)
+        # The PX4 timestamp, moved to the receive clock, leaves the transport delays out
+        sample_time = stats.to_receive_time(msg.timestamp * 1e-6) if self.use_px4_time else receive_time
+        current_time = sample_time - self.time_init
+        states = (
+            msg.position[0],
+            -msg.position[1],
+            -msg.position[2],
+            msg.velocity[0],
+            -msg.velocity[1],
+            -msg.velocity[2],
+            heading,
+        )
+        if self.recorder is not None:
+            self.recorder.record_odometry((receive_time, msg.timestamp) + states)
 
+        if current_time <= self.final_time:
+            self.actual_trajectory.append((current_time,) + states)
+        stats.handled(time.perf_counter() - entered)
 
-def plot_trajectory(node):
-    # Function to update the plot with new data
-    while rclpy.ok():
-        plt.clf()
-        labels = [
-            "X Position",
-            "Y Position",
-            "Z Position",
-            "X Velocity",
-            "Y Velocity",
-            "Z Velocity",
-            "Heading",
+    def publish_metrics(self):
+        percentile = self.node.get_parameter("metrics_percentile").value
+        max_lag = self.node.get_parameter("metrics_max_lag").value
+        # Only the samples received since the last update are resampled
+        actual = self.actual_trajectory.view()
+        for state, tracker in self.trackers.items():
+            tracker.update(actual[:, 0], actual[:, ACTUAL_COLUMNS.index(state)])
+
+        array = DiagnosticArray()
+        array.header.stamp = self.node.get_clock().now().to_msg()
+        for state, tracker in self.trackers.items():
+            metrics = tracker.metrics(percentile, max_lag)
+            status = DiagnosticStatus(name=f"tracking/{state}", hardware_id=self.namespace)
+            status.level = DiagnosticStatus.OK
+            status.message = f"RMS {metrics.rms:.4f}"
+            status.values = [
+                KeyValue(key=key, value=str(value)) for key, value in asdict(metrics).items()
+            ]
+            array.status.append(status)
+        self.metrics_publisher.publish(array)
+
+    def stats_statuses(self, now):
+        statuses = []
+        for topic, stats in self.stats.items():
+            summary = stats.summary(now)
+            status = DiagnosticStatus(name=f"plotter/{topic}", hardware_id=self.namespace)
+            status.level = DiagnosticStatus.OK
+            status.message = f"{summary['recent_rate']:.1f} Hz"
+            status.values = [KeyValue(key=key, value=str(value)) for key, value in summary.items()]
+            statuses.append(status)
+        return statuses
+
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+
+class UAVTrajectoryPlotter(Node):
+    def __init__(self):
+        super().__init__("uav_trajectory_plotter")
+        # Vehicle namespaces, "auto" discovers the /uavN namespaces publishing odometry
+        self.declare_parameter("namespaces", ["auto"])
+        # Bounded sample storage, one shared time column per buffer
+        self.declare_parameter("buffer_capacity", 20000)
+        self.declare_parameter("decimation", 1)
+        self.declare_parameter("frame_rate", 20.0)
+        # Recording of the received samples, one subdirectory per vehicle,
+        # and headless mode without any window
+        self.declare_parameter("record_path", "")
+        self.declare_parameter("headless", False)
+        # Tracking-error metrics published on a topic, a rate of 0 disables them
+        self.declare_parameter("metrics_rate", 1.0)
+        self.declare_parameter("metrics_percentile", 95.0)
+        self.declare_parameter("metrics_max_lag", 1.0)
+        # Callback instrumentation published on ~/stats, a rate of 0 disables the topic,
+        # and time axis of the plots, "receive" or "px4" for the PX4 timestamps
+        self.declare_parameter("stats_rate", 1.0)
+        self.declare_parameter("px4_time_synchronized", False)
+        self.declare_parameter("time_source", "receive")
+        # Threads of the executor, more than 1 for a multi-threaded executor running the
+        # callbacks of several vehicles in parallel
+        self.declare_parameter("executor_threads", 1)
+
+        # Vehicles by namespace, replaced by a new dict when a vehicle is added, so that the
+        # plot thread iterates over a consistent one
+        self.vehicles = {}
+        # Duration of the sample copies of the plot frames, updated by the plot thread
+        self.plot_stats = TopicStats()
+        namespaces = [
+            namespace.strip("/") for namespace in self.get_parameter("namespaces").value
         ]
-        with lock:
-            desired_trajectory = deepcopy(node.desired_trajectory)
-            actual_trajectory = deepcopy(node.actual_trajectory)
-
-        for i, key in enumerate(["x", "y", "z", "vx", "vy", "vz", "heading"]):
-            ax = plt.subplot(7, 1, i + 1)
-            # Example data fetching; you would use actual data from node attributes
-            ax.plot(
-                desired_trajectory["time_" + key],
-                desired_trajectory[key],
-                label="Desired",
-            )
-            ax.plot(
-                actual_trajectory["time_" + key],
-                actual_trajectory[key],
-                label="Actual",
-            )
-            ax.set_title(labels[i])
-            ax.legend()
-        plt.pause(0.01)  # Adjust the pause to manage update frequency
+        for namespace in namespaces:
+            if namespace != "auto":
+                self.add_vehicle(namespace)
+        if "auto" in namespaces:
+            self.discover_vehicles()
+            self.discovery_timer = self.create_timer(DISCOVERY_PERIOD, self.discover_vehicles)
+
+        stats_rate = self.get_parameter("stats_rate").value
+        if stats_rate > 0:
+            self.stats_publisher = self.create_publisher(DiagnosticArray, "~/stats", 10)
+            self.stats_timer = self.create_timer(1.0 / stats_rate, self.publish_stats)
+
+    def add_vehicle(self, namespace):
+        if namespace in self.vehicles:
+            return
+        vehicle = VehicleTrajectory(self, namespace)
+        self.vehicles = {**self.vehicles, namespace: vehicle}
+        self.get_logger().info(f"Plotting the trajectory of /{namespace}")
+
+    def discover_vehicles(self):
+        for topic, _ in self.get_topic_names_and_types():
+            match = VEHICLE_TOPIC.match(topic)
+            if match:
+                self.add_vehicle(match.group(1))
+
+    def publish_stats(self):
+        now = self.get_clock().now()
+        array = DiagnosticArray()
+        array.header.stamp = now.to_msg()
+        for vehicle in self.vehicles.values():
+            array.status += vehicle.stats_statuses(now.nanoseconds / 1e9)
+        status = DiagnosticStatus(name="plotter/plot", level=DiagnosticStatus.OK)
+        status.values = [
+            KeyValue(key=key, value=str(value))
+            for key, value in self.plot_stats.summary(now.nanoseconds / 1e9).items()
+        ]
+        array.status.append(status)
+        self.stats_publisher.publish(array)
+
+    def stats_summary(self):
+        stats = {
+            f"/{namespace}/{topic}": topic_stats
+            for namespace, vehicle in self.vehicles.items()
+            for topic, topic_stats in vehicle.stats.items()
+        }
+        stats["plot"] = self.plot_stats
+        return format_summary(stats)
+
+    def create_executor(self):
+        threads = self.get_parameter("executor_threads").value
+        if threads > 1:
+            return MultiThreadedExecutor(num_threads=threads)
+        return SingleThreadedExecutor()
+
+    def close(self):
+        # Called once the executor is shut down, no callback writes to the recorders anymore
+        for vehicle in self.vehicles.values():
+            vehicle.close()
+        # Rates in Hz, durations in ms
+        print(self.stats_summary())
+
+
+def quaternion_to_heading(quaternion):
+    # Convert quaternion to heading
+    siny_cosp = 2 * (quaternion[3] * quaternion[2] + quaternion[0] * quaternion[1])
+    cosy_cosp = 1 - 2 * (quaternion[1] ** 2 + quaternion[2] ** 2)
+    return math.atan2(siny_cosp, cosy_cosp)
+
+
+def plot_trajectory(node):
+    # Function to update the plot with new data, only the new samples are copied from the
+    # buffers, without blocking the callbacks writing them
+    figure = TrajectoryFigure(vehicles=())
+    actual = {}
+    desired = {}
+    frame_period = 1.0 / node.get_parameter("frame_rate").value
+    plt.show(block=False)
+    while rclpy.ok() and plt.fignum_exists(figure.fig.number):
+        frame_start = time.monotonic()
+        refit = False
+        new_actual = {}
+        entered = time.perf_counter()
+        for namespace, vehicle in node.vehicles.items():
+            if namespace not in actual:
+                # New vehicle, its mirror buffers and lines are created once
+                actual[namespace] = RingBuffer(vehicle.actual_trajectory.capacity, ACTUAL_COLUMNS)
+                desired[namespace] = {
+                    name: RingBuffer(buffer.capacity, buffer.columns)
+                    for name, buffer in vehicle.desired_trajectory.items()
+                }
+                figure.add_vehicle(namespace)
+            new_actual[namespace], actual_reset = actual[namespace].pull(vehicle.actual_trajectory)
+            desired_reset = [
+                mirror.pull(vehicle.desired_trajectory[name])[1]
+                for name, mirror in desired[namespace].items()
+            ]
+            refit |= actual_reset or any(desired_reset)
+        node.plot_stats.received(node.get_clock().now().nanoseconds / 1e9)
+        node.plot_stats.handled(time.perf_counter() - entered)
+        figure.update(desired, actual, new_actual, refit)
+        time.sleep(max(0.0, frame_period - (time.monotonic() - frame_start)))
+
+
+def spin(executor):
+    try:
+        executor.spin()
+    except ExternalShutdownException:
+        # The context was shut down by a signal
+        pass
 
 
 def main(args=None):
     rclpy.init(args=args)
     node = UAVTrajectoryPlotter()
+    executor = node.create_executor()
+    executor.add_node(node)
+    ros_thread = None
 
-    # Start the ROS node in a separate thread
-    ros_thread = threading.Thread(target=lambda: rclpy.spin(node), daemon=True)
-    ros_thread.start()
-
-    # Run the plot updates in the main thread
     try:
-        plot_trajectory(node)
+        if node.get_parameter("headless").value:
+            # Record only, the ROS node runs in the main thread
+            spin(executor)
+        else:
+            matplotlib.use("TkAgg")  # Ensure Matplotlib uses TkAgg backend, suitable for threading
+
+            # Start the ROS node in a separate thread
+            ros_thread = threading.Thread(target=spin, args=(executor,))
+            ros_thread.start()
+
+            # Run the plot updates in the main thread
+            plot_trajectory(node)
     except KeyboardInterrupt:
         pass
     finally:
-        ros_thread.join()
+        # The callbacks in progress complete and the spin thread returns before the recorders close
+        executor.shutdown()
+        if ros_thread is not None:
+            ros_thread.join()
+        node.close()
+        node.destroy_node()
+        rclpy.try_shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Record and replay of the samples received by the UAV trajectory plotter.
+
+A recording is a directory holding one append-only binary file per stream, with float64 rows of
+a fixed number of columns, and a `meta.json` file describing the columns. The callbacks only copy
+a row into a preallocated chunk, full chunks are written by a background thread. The files are
+read back lazily with memory maps, so hour-long recordings can be rendered without loading them.
+
+Usage:
+    python trajectory_recording.py <recording_dir> --output trajectory.png
+    or
+    python trajectory_recording.py <recording_dir> --output trajectory.pdf --start 60 --end 120
+
+Options:
+    --output: Image or PDF file to render the seven panels to.
+    --start: Start of the rendered window, in seconds from the first sample.
+    --end: End of the rendered window, in seconds from the first sample.
+    --max-points: Maximum number of points drawn per line.
+"""
+
+import argparse
+import bisect
+import json
+import os
+import queue
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from trajectory_buffers import ACTUAL_COLUMNS, DESIRED_AXES
+
+# Columns of each recorded stream
+STREAMS: Dict[str, Tuple[str, ...]] = {
+    # Receive time (ROS clock, s), PX4 timestamp (us) and the states in the plotted frame
+    "odometry": ("receive_time", "px4_timestamp") + ACTUAL_COLUMNS[1:],
+    # The timestamps and then the values of each derivative order of the Coordinate messages,
+    # one message after the other, so that all the orders are kept whatever their number
+    "coordinates": ("value",),
+    # One row per Coordinate message, pointing to its values in the coordinates stream
+    "coordinate_messages": ("receive_time", "axis", "first_row", "num_points", "num_derivatives"),
+}
+AXES: Tuple[str, ...] = tuple(DESIRED_AXES)
+CHUNK_ROWS = 4096
+META_FILE = "meta.json"
+
+
+class RecordingStream:
+    """
+    Append-only stream of float64 rows, buffered in preallocated chunks.
+
+    Rows are appended after those already in the file, a partially written last row is dropped.
+
+    :param path: The binary file of the stream.
+    :param columns: The column names.
+    :param writer: The queue of the writer thread.
+    :param chunk_rows: Number of rows per chunk.
+    """
+
+    def __init__(self, path: str, columns: Sequence[str], writer: queue.Queue, chunk_rows: int = CHUNK_ROWS):
+        self.file = open(path, "ab")
+        self.columns = tuple(columns)
+        self.rows = os.path.getsize(path) // (8 * len(self.columns))
+        self.file.truncate(8 * len(self.columns) * self.rows)
+        self._writer = writer
+        self._chunk = np.empty((chunk_rows, len(self.columns)))
+        self._filled = 0
+
+    def append(self, row: Sequence[float]) -> None:
+        """
+        Appends a row.
+
+        :param row: The values of all columns.
+        :type row: Sequence[float]
+        """
+        self._chunk[self._filled] = row
+        self._filled += 1
+        self.rows += 1
+        if self._filled == len(self._chunk):
+            self.flush()
+
+    def extend(self, rows: np.ndarray) -> None:
+        """
+        Appends several rows.
+
+        :param rows: Array of shape (n, number of columns).
+        :type rows: np.ndarray
+        """
+        while len(rows):
+            count = min(len(rows), len(self._chunk) - self._filled)
+            self._chunk[self._filled:self._filled + count] = rows[:count]
+            self._filled += count
+            self.rows += count
+            rows = rows[count:]
+            if self._filled == len(self._chunk):
+                self.flush()
+
+    def flush(self) -> None:
+        """
+        Hands the filled part of the chunk to the writer thread.
+        """
+        if self._filled:
+            self._writer.put((self.file, self._chunk[:self._filled]))
+            self._chunk = np.empty_like(self._chunk)
+            self._filled = 0
+
+
+class TrajectoryRecorder:
+    """
+    Writes the plotter samples to a recording directory.
+
+    The samples of an existing recording are kept, the new ones are appended to them.
+
+    :param directory: The recording directory, created if needed.
+    :param chunk_rows: Number of rows buffered per stream before a write.
+    :raises ValueError: If the directory holds a recording with other columns.
+    """
+
+    def __init__(self, directory: str, chunk_rows: int = CHUNK_ROWS):
+        os.makedirs(directory, exist_ok=True)
+        meta = {"streams": {name: list(columns) for name, columns in STREAMS.items()}}
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as file:
+                if json.load(file) != meta:
+                    raise ValueError(f"{directory} holds a recording with other columns")
+        with open(meta_path, "w", encoding="utf-8") as file:
+            json.dump(meta, file, indent=2)
+        self._queue: queue.Queue = queue.Queue()
+        self.streams = {
+            name: RecordingStream(os.path.join(directory, f"{name}.bin"), columns, self._queue, chunk_rows)
+            for name, columns in STREAMS.items()
+        }
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            file, chunk = item
+            file.write(chunk.astype("<f8", copy=False).tobytes())
+            file.flush()
+
+    def record_odometry(self, row: Sequence[float]) -> None:
+        """
+        Records an odometry sample.
+
+        :param row: Receive time, PX4 timestamp and the states in ACTUAL_COLUMNS order.
+        :type row: Sequence[float]
+        """
+        self.streams["odometry"].append(row)
+
+    def record_coordinates(self, receive_time: float, name: str, timestamps: Sequence[float],
+                           derivatives: Sequence[Sequence[float]]) -> None:
+        """
+        Records a Coordinate message.
+
+        :param receive_time: The receive time (ROS clock, s).
+        :type receive_time: float
+        :param name: The Coordinate name.
+        :type name: str
+        :param timestamps: The trajectory timestamps.
+        :type timestamps: Sequence[float]
+        :param derivatives: The trajectory values of each derivative order.
+        :type derivatives: Sequence[Sequence[float]]
+        """
+        if name not in AXES:
+            return
+        coordinates = self.streams["coordinates"]
+        values = np.concatenate([timestamps] + list(derivatives)) if derivatives else np.asarray(timestamps)
+        self.streams["coordinate_messages"].append(
+            (receive_time, AXES.index(name), coordinates.rows, len(timestamps), len(derivatives)))
+        coordinates.extend(values.reshape(-1, 1))
+
+    def close(self) -> None:
+        """
+        Writes the remaining rows and closes the files.
+        """
+        for stream in self.streams.values():
+            stream.flush()
+        self._queue.put(None)
+        self._writer.join()
+        for stream in self.streams.values():
+            stream.file.close()
+
+
+class Recording:
+    """
+    Lazy reader of a recording directory.
+
+    :param directory: The recording directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as file:
+            self.columns = {name: tuple(columns) for name, columns in json.load(file)["streams"].items()}
+
+    def stream(self, name: str) -> np.ndarray:
+        """
+        Memory-maps a stream, a partially written last row is ignored.
+
+        :param name: The stream name.
+        :type name: str
+        :return: Read-only array of shape (rows, number of columns).
+        :rtype: np.ndarray
+        """
+        path = os.path.join(self.directory, f"{name}.bin")
+        num_columns = len(self.columns[name])
+        rows = os.path.getsize(path) // (8 * num_columns)
+        if rows == 0:
+            return np.empty((0, num_columns))
+        return np.memmap(path, dtype="<f8", mode="r", shape=(rows, num_columns))
+
+    def column(self, name: str, column: str) -> int:
+        """
+        Returns the index of a column in a stream.
+
+        :param name: The stream name.
+        :type name: str
+        :param column: The column name.
+        :type column: str
+        :return: The column index.
+        :rtype: int
+        """
+        return self.columns[name].index(column)
+
+    def start_time(self) -> float:
+        """
+        Returns the receive time of the first recorded message.
+
+        :return: The time (ROS clock, s), 0 for an empty recording.
+        :rtype: float
+        """
+        starts = [self.stream(name)[0, 0] for name in ("odometry", "coordinate_messages")
+                  if len(self.stream(name))]
+        return float(min(starts)) if starts else 0.0
+
+    def odometry(self, start: float, end: float, max_points: Optional[int] = None) -> np.ndarray:
+        """
+        Returns the odometry rows received in a time window, decimated to at most `max_points` rows.
+
+        :param start: Start of the window (ROS clock, s).
+        :type start: float
+        :param end: End of the window (ROS clock, s).
+        :type end: float
+        :param max_points: Maximum number of rows returned.
+        :type max_points: int or None
+        :return: Array with the odometry columns.
+        :rtype: np.ndarray
+        """
+        odometry = self.stream("odometry")
+        # Receive times are increasing, the window is found by a bisection of the memory map
+        # that only reads the rows it probes
+        times = odometry[:, 0]
+        first, last = bisect.bisect_left(times, start), bisect.bisect_left(times, end)
+        step = 1 if not max_points else max(1, -(-(last - first) // max_points))
+        return np.array(odometry[first:last:step])
+
+    def desired(self, start: float, end: float, max_points: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Returns, for each Coordinate name, the desired trajectory that was active in a time window.
+
+        Each message is only kept until the next message of the same name replaced it, and the
+        messages are separated by NaN rows so that they are drawn as separate segments.
+
+        :param start: Start of the window (ROS clock, s).
+        :type start: float
+        :param end: End of the window (ROS clock, s).
+        :type end: float
+        :param max_points: Maximum number of rows returned per name.
+        :type max_points: int or None
+        :return: Arrays with the absolute time (ROS clock, s) and the states of each Coordinate name.
+        :rtype: dict[str, np.ndarray]
+        """
+        messages = np.array(self.stream("coordinate_messages"))
+        coordinates = self.stream("coordinates")
+        desired = {}
+        for axis_index, axis in enumerate(AXES):
+            num_states = len(DESIRED_AXES[axis])
+            axis_messages = messages[messages[:, 1] == axis_index]
+            active_until = np.append(axis_messages[1:, 0], np.inf)
+            in_window = (active_until > start) & (axis_messages[:, 0] < end)
+            segments: List[np.ndarray] = []
+            for (receive_time, _, first_row, num_points, num_derivatives), until in zip(
+                    axis_messages[in_window], active_until[in_window]):
+                # The orders the message does not carry are NaN
+                first_row, num_points = int(first_row), int(num_points)
+                num_columns = 1 + min(int(num_derivatives), num_states)
+                rows = np.full((num_points, 1 + num_states), np.nan)
+                rows[:, :num_columns] = coordinates[first_row:first_row + num_columns * num_points, 0].reshape(
+                    num_columns, num_points).T
+                rows[:, 0] += receive_time
+                rows = rows[(rows[:, 0] < min(until, end)) & (rows[:, 0] >= start)]
+                if len(rows):
+                    segments.append(rows)
+                    segments.append(np.full((1, 1 + num_states), np.nan))
+            data = np.concatenate(segments) if segments else np.empty((0, 1 + num_states))
+            if max_points and len(data) > max_points:
+                data = data[::-(-len(data) // max_points)]
+            desired[axis] = data
+        return desired
+
+
+def render_recording(directory: str, output: str, start: Optional[float] = None, end: Optional[float] = None,
+                     max_points: int = 20000) -> None:
+    """
+    Renders the seven trajectory panels of a recording with a non-interactive backend.
+
+    :param directory: The recording directory.
+    :type directory: str
+    :param output: The image or PDF file to write, the format follows the extension.
+    :type output: str
+    :param start: Start of the window, in seconds from the first sample.
+    :type start: float or None
+    :param end: End of the window, in seconds from the first sample.
+    :type end: float or None
+    :param max_points: Maximum number of points drawn per line.
+    :type max_points: int
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from trajectory_panels import TrajectoryFigure
+
+    recording = Recording(directory)
+    origin = recording.start_time()
+    window_start = origin + (start or 0.0)
+    window_end = origin + end if end is not None else np.inf
+
+    odometry = recording.odometry(window_start, window_end, max_points)
+    actual = np.column_stack((odometry[:, 0] - origin, odometry[:, 2:]))
+    desired = recording.desired(window_start, window_end, max_points)
+    for data in desired.values():
+        data[:, 0] -= origin
+
+    figure = TrajectoryFigure(animated=False)
+    figure.show_data({"": desired}, {"": actual})
+    figure.fig.savefig(output)
+
+
+def main() -> None:
+    """
+    Main function to parse arguments and render a recording.
+    """
+    parser = argparse.ArgumentParser(description="Render a trajectory plotter recording")
+    parser.add_argument("recording", help="Recording directory")
+    parser.add_argument("--output", default="trajectory.png", help="Image or PDF file to write")
+    parser.add_argument("--start", type=float, help="Start of the window, in seconds from the first sample")
+    parser.add_argument("--end", type=float, help="End of the window, in seconds from the first sample")
+    parser.add_argument("--max-points", type=int, default=20000, help="Maximum number of points per line")
+    args = parser.parse_args()
+    render_recording(args.recording, args.output, args.start, args.end, args.max_points)
+
+
+if __name__ == "__main__":
+    main()
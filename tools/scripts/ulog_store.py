@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Indexed store of the collected ULog flight logs, for fast time-range queries of their topics.
+
+Each ULog file is parsed once, with pyulog, into one `.npy` file per topic field, and an index
+records the vehicle, the time range and the topics of every flight. A query memory-maps the fields
+it needs and finds its time window with a binary search on the timestamps, so a few seconds of a
+topic are read without touching the rest of the flight. The ingestion is incremental: a log whose
+path, size and modification time are in the index is not opened again, and a copy of an ingested
+log is recognized by its SHA-256 digest. The logs are parsed in parallel worker processes.
+
+The vehicle of a log is the first directory of its path under the ingested directory, which is the
+UAV name directory of collect_logs.py, and a flight is identified by the beginning of its digest.
+
+Store Structure:
+    index.json
+    <vehicle>/<flight>/parameters.json
+    <vehicle>/<flight>/<topic>.<multi_id>/<field>.npy
+
+Usage:
+    python ulog_store.py ingest [<log_dir_or_file> ...] [--store DIR] [--vehicle NAME] [--jobs N]
+    python ulog_store.py list [--store DIR] [--vehicle NAME] [--since DATE] [--until DATE]
+    python ulog_store.py query <flight> <topic> [--start S] [--end S] [--fields F ...] [--output FILE.npz]
+    python ulog_store.py render <flight> [<flight> ...] [--output trajectory.png] [--start S] [--end S]
+
+Options:
+    --store: Directory of the store, defaults to log/.ulog_store.
+    --vehicle: Vehicle of the ingested logs, or of the listed flights.
+    --jobs: Number of logs parsed in parallel, defaults to the number of CPUs.
+    --since, --until: Only list the flights started in this UTC window, as ISO dates.
+    --start, --end: Time window, in seconds from the start of the flight.
+    --fields: Fields of the queried topic, defaults to all of them.
+    --multi-id: Instance of the queried topic.
+    --output: The .npz file of the query, or the image or PDF file of the rendered panels.
+    --max-points: Maximum number of points drawn per line.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from os.path import abspath, dirname
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from generate_airframe import file_digest, write_atomically
+from trajectory_buffers import ACTUAL_COLUMNS, DESIRED_AXES
+
+LOG_DIR = os.path.join(dirname(abspath(__file__)), "..", "..", "log")
+STORE_DIR = os.path.join(LOG_DIR, ".ulog_store")
+INDEX_FILE = "index.json"
+INDEX_VERSION = 1
+PARAMETERS_FILE = "parameters.json"
+LOG_EXTENSION = ".ulg"
+# Hexadecimal digits of the digest identifying a flight
+FLIGHT_ID_DIGITS = 16
+# Topics carrying the UTC time, used to date the flights
+GPS_TOPICS = ("vehicle_gps_position", "sensor_gps")
+# Logged topics standing for the actual and the desired trajectories of the plotter
+ACTUAL_TOPIC = "vehicle_local_position"
+DESIRED_TOPIC = "trajectory_setpoint"
+
+
+@dataclass
+class FlightInfo:
+    """
+    Index entry of an ingested flight.
+
+    :param id: The flight identifier, the beginning of the digest of the log.
+    :param vehicle: The vehicle that logged the flight.
+    :param source: Absolute path of the ingested log.
+    :param digest: SHA-256 digest of the log.
+    :param size: Size of the log in bytes.
+    :param mtime_ns: Modification time of the log when it was ingested.
+    :param start_us: Timestamp of the start of the log (PX4 clock, us).
+    :param end_us: Timestamp of the last logged message (PX4 clock, us).
+    :param start_time: UTC time of the start of the log (s since the epoch).
+    :param start_time_source: Where the UTC time comes from, "gps" or "mtime".
+    :param sys_name: The system name of the log info.
+    :param ver_sw: The software version of the log info.
+    :param topics: For each `<topic>.<multi_id>`, its name, instance, number of rows, first and
+        last timestamps and field data types.
+    """
+    id: str
+    vehicle: str
+    source: str
+    digest: str
+    size: int
+    mtime_ns: int
+    start_us: int
+    end_us: int
+    start_time: float
+    start_time_source: str
+    sys_name: str = ""
+    ver_sw: str = ""
+    topics: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        """
+        Length of the flight in seconds.
+        """
+        return (self.end_us - self.start_us) * 1e-6
+
+
+def topic_key(topic: str, multi_id: int = 0) -> str:
+    """
+    Returns the key of a topic instance, also the name of its directory.
+
+    :param topic: The topic name.
+    :type topic: str
+    :param multi_id: The instance of the topic.
+    :type multi_id: int
+    :return: The `<topic>.<multi_id>` key.
+    :rtype: str
+    """
+    return f"{topic}.{multi_id}"
+
+
+def utc_start_time(ulog: Any) -> Optional[float]:
+    """
+    Dates the start of a log with its first GPS sample carrying the UTC time.
+
+    :param ulog: The parsed log.
+    :type ulog: pyulog.ULog
+    :return: The UTC time of the start of the log (s since the epoch), None without GPS time.
+    :rtype: float or None
+    """
+    for data in ulog.data_list:
+        if data.name in GPS_TOPICS and "time_utc_usec" in data.data:
+            valid = np.flatnonzero(data.data["time_utc_usec"])
+            if len(valid):
+                first = valid[0]
+                utc_us = int(data.data["time_utc_usec"][first])
+                return (utc_us - (int(data.data["timestamp"][first]) - ulog.start_timestamp)) * 1e-6
+    return None
+
+
+def ingest_log(path: str, vehicle: str, store_dir: str, digest: str) -> FlightInfo:
+    """
+    Parses a log into one column file per topic field, in a flight directory of the store.
+
+    The columns are written to a temporary directory renamed once complete, so that an interrupted
+    ingestion never leaves a partial flight. The rows of each topic are sorted by timestamp.
+
+    :param path: Path to the ULog file.
+    :type path: str
+    :param vehicle: The vehicle that logged the flight.
+    :type vehicle: str
+    :param store_dir: Directory of the store.
+    :type store_dir: str
+    :param digest: SHA-256 digest of the log.
+    :type digest: str
+    :return: The flight.
+    :rtype: FlightInfo
+    """
+    from pyulog import ULog
+
+    stat = os.stat(path)
+    ulog = ULog(path)
+    utc_start = utc_start_time(ulog)
+    flight = FlightInfo(id=digest[:FLIGHT_ID_DIGITS], vehicle=vehicle, source=abspath(path), digest=digest,
+                        size=stat.st_size, mtime_ns=stat.st_mtime_ns, start_us=ulog.start_timestamp,
+                        end_us=ulog.last_timestamp,
+                        start_time=utc_start if utc_start is not None else stat.st_mtime,
+                        start_time_source="gps" if utc_start is not None else "mtime",
+                        sys_name=str(ulog.msg_info_dict.get("sys_name", "")),
+                        ver_sw=str(ulog.msg_info_dict.get("ver_sw", "")))
+
+    vehicle_dir = os.path.join(store_dir, vehicle)
+    os.makedirs(vehicle_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=vehicle_dir, prefix=f".{flight.id}_")
+    try:
+        with open(os.path.join(tmp_dir, PARAMETERS_FILE), "w", encoding="utf-8") as file:
+            json.dump(ulog.initial_parameters, file, indent=2, sort_keys=True)
+        for data in ulog.data_list:
+            timestamps = data.data["timestamp"]
+            # Out of order samples would break the binary search of the queries
+            order = np.argsort(timestamps, kind="stable") if np.any(timestamps[1:] < timestamps[:-1]) else slice(None)
+            key = topic_key(data.name, data.multi_id)
+            os.mkdir(os.path.join(tmp_dir, key))
+            for name, values in data.data.items():
+                np.save(os.path.join(tmp_dir, key, f"{name}.npy"), np.ascontiguousarray(values[order]))
+            flight.topics[key] = {
+                "name": data.name,
+                "multi_id": data.multi_id,
+                "rows": len(timestamps),
+                "first_us": int(timestamps[order][0]) if len(timestamps) else 0,
+                "last_us": int(timestamps[order][-1]) if len(timestamps) else 0,
+                "fields": {name: values.dtype.str for name, values in data.data.items()},
+            }
+        flight_dir = os.path.join(vehicle_dir, flight.id)
+        # Left by an ingestion whose index was not written
+        shutil.rmtree(flight_dir, ignore_errors=True)
+        os.rename(tmp_dir, flight_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return flight
+
+
+def find_logs(paths: Sequence[str], vehicle: Optional[str] = None) -> List[Tuple[str, str]]:
+    """
+    Lists the ULog files of files and directories, with their vehicle.
+
+    The hidden directories, the store among them, are not searched.
+
+    :param paths: The log files and directories.
+    :type paths: Sequence[str]
+    :param vehicle: The vehicle of all the logs, defaults to the first directory of each log under
+        its ingested directory, or to the name of the ingested directory.
+    :type vehicle: str, optional
+    :return: The path and vehicle of each log.
+    :rtype: list[tuple[str, str]]
+    """
+    logs = []
+    for path in paths:
+        path = abspath(path)
+        if os.path.isfile(path):
+            logs.append((path, vehicle or os.path.basename(dirname(path))))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+            for name in sorted(files):
+                if name.endswith(LOG_EXTENSION):
+                    relative = os.path.relpath(root, path)
+                    logs.append((os.path.join(root, name),
+                                 vehicle or (relative.split(os.sep)[0] if relative != "." else
+                                             os.path.basename(path))))
+    return logs
+
+
+class UlogStore:
+    """
+    Store of the ingested flights, queried by vehicle, flight and time.
+
+    :param directory: Directory of the store, created on the first ingestion.
+    """
+
+    def __init__(self, directory: str = STORE_DIR):
+        self.directory = directory
+        self.flights_by_id: Dict[str, FlightInfo] = {}
+        try:
+            with open(os.path.join(directory, INDEX_FILE), "r", encoding="utf-8") as file:
+                index = json.load(file)
+        except FileNotFoundError:
+            return
+        if index.get("version") == INDEX_VERSION:
+            self.flights_by_id = {flight_id: FlightInfo(**entry) for flight_id, entry in index["flights"].items()}
+
+    def _write_index(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        index = {"version": INDEX_VERSION,
+                 "flights": {flight_id: asdict(flight) for flight_id, flight in sorted(self.flights_by_id.items())}}
+        write_atomically(os.path.join(self.directory, INDEX_FILE), json.dumps(index, indent=1).encode("utf-8"))
+
+    def ingest(self, paths: Sequence[str], vehicle: Optional[str] = None,
+               jobs: Optional[int] = None) -> List[Tuple[str, str]]:
+        """
+        Ingests the logs of files and directories that are not in the store yet.
+
+        :param paths: The log files and directories.
+        :type paths: Sequence[str]
+        :param vehicle: The vehicle of all the logs, see find_logs.
+        :type vehicle: str, optional
+        :param jobs: Number of logs parsed in parallel, defaults to the number of CPUs.
+        :type jobs: int, optional
+        :return: The path of each log and what was done: "ingested", "up to date", "duplicate of
+            <flight>" or "failed: <error>".
+        :rtype: list[tuple[str, str]]
+        """
+        by_source = {flight.source: flight for flight in self.flights_by_id.values()}
+        results = []
+        pending = []
+        for path, log_vehicle in find_logs(paths, vehicle):
+            stat = os.stat(path)
+            known = by_source.get(path)
+            if known and (known.size, known.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                results.append((path, "up to date"))
+            else:
+                pending.append((path, log_vehicle))
+        if not pending:
+            return results
+
+        by_digest = {flight.digest: flight for flight in self.flights_by_id.values()}
+        workers = min(jobs or os.cpu_count() or 1, len(pending))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # The logs are hashed first, so that copies of a log are recognized within a batch too
+            digests = list(executor.map(file_digest, [path for path, _ in pending]))
+            futures = {}
+            for (path, log_vehicle), digest in zip(pending, digests):
+                if digest in by_digest:
+                    results.append((path, f"duplicate of {by_digest[digest].id}"))
+                elif digest in futures:
+                    results.append((path, f"duplicate of {digest[:FLIGHT_ID_DIGITS]}"))
+                else:
+                    futures[digest] = (path, executor.submit(ingest_log, path, log_vehicle, self.directory, digest))
+            for path, future in futures.values():
+                try:
+                    flight = future.result()
+                except Exception as error:  # pylint: disable=broad-except
+                    results.append((path, f"failed: {error}"))
+                    continue
+                # A log of the index that changed on disk replaces its previous flight
+                previous = by_source.get(path)
+                if previous and previous.id != flight.id:
+                    self.flights_by_id.pop(previous.id, None)
+                    shutil.rmtree(os.path.join(self.directory, previous.vehicle, previous.id), ignore_errors=True)
+                self.flights_by_id[flight.id] = flight
+                results.append((path, "ingested"))
+        self._write_index()
+        return sorted(results)
+
+    def flights(self, vehicle: Optional[str] = None, since: Optional[float] = None,
+                until: Optional[float] = None) -> List[FlightInfo]:
+        """
+        Lists the flights, in start time order.
+
+        :param vehicle: Only list the flights of this vehicle.
+        :type vehicle: str, optional
+        :param since: Only list the flights started after this UTC time (s since the epoch).
+        :type since: float, optional
+        :param until: Only list the flights started before this UTC time (s since the epoch).
+        :type until: float, optional
+        :return: The flights.
+        :rtype: list[FlightInfo]
+        """
+        return sorted((flight for flight in self.flights_by_id.values()
+                       if (vehicle is None or flight.vehicle == vehicle)
+                       and (since is None or flight.start_time >= since)
+                       and (until is None or flight.start_time < until)),
+                      key=lambda flight: (flight.start_time, flight.vehicle))
+
+    def flight(self, reference: str) -> FlightInfo:
+        """
+        Finds a flight by its identifier, or by the beginning of it.
+
+        :param reference: The flight identifier or a unique prefix.
+        :type reference: str
+        :return: The flight.
+        :rtype: FlightInfo
+        :raises KeyError: If no flight, or several flights, match the reference.
+        """
+        matches = [flight for flight_id, flight in self.flights_by_id.items() if flight_id.startswith(reference)]
+        if len(matches) != 1:
+            raise KeyError(f"{len(matches)} flights match {reference!r}")
+        return matches[0]
+
+    def query(self, flight: str, topic: str, start: Optional[float] = None, end: Optional[float] = None,
+              fields: Optional[Sequence[str]] = None, multi_id: int = 0) -> Dict[str, np.ndarray]:
+        """
+        Returns the samples of a topic in a time window.
+
+        Only the window of the requested fields is read from the memory-mapped columns.
+
+        :param flight: The flight identifier or a unique prefix.
+        :type flight: str
+        :param topic: The topic name.
+        :type topic: str
+        :param start: Start of the window, in seconds from the start of the flight.
+        :type start: float, optional
+        :param end: End of the window, in seconds from the start of the flight.
+        :type end: float, optional
+        :param fields: The fields to return, defaults to all the fields of the topic.
+        :type fields: Sequence[str], optional
+        :param multi_id: The instance of the topic.
+        :type multi_id: int
+        :return: The values of each field, always with the "timestamp" field (PX4 clock, us).
+        :rtype: dict[str, np.ndarray]
+        :raises KeyError: If the flight, the topic or a field is not in the store.
+        """
+        info = self.flight(flight)
+        key = topic_key(topic, multi_id)
+        if key not in info.topics:
+            raise KeyError(f"Flight {info.id} has no topic {key}")
+        topic_fields = info.topics[key]["fields"]
+        names = ["timestamp"] + [name for name in (fields or topic_fields) if name != "timestamp"]
+        missing = [name for name in names if name not in topic_fields]
+        if missing:
+            raise KeyError(f"Topic {key} has no field {', '.join(missing)}")
+
+        topic_dir = os.path.join(self.directory, info.vehicle, info.id, key)
+        timestamps = np.load(os.path.join(topic_dir, "timestamp.npy"), mmap_mode="r")
+        bounds = [info.start_us + (0 if start is None else start * 1e6),
+                  info.start_us + end * 1e6 if end is not None else np.inf]
+        first, last = np.searchsorted(timestamps, bounds)
+        return {name: np.array(np.load(os.path.join(topic_dir, f"{name}.npy"), mmap_mode="r")[first:last])
+                for name in names}
+
+    def trajectory(self, flight: str, start: Optional[float] = None, end: Optional[float] = None,
+                   max_points: Optional[int] = None) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Returns the desired and actual trajectories of a flight in the columns of the plotter panels.
+
+        The actual trajectory is the local position estimate and the desired trajectory the
+        trajectory setpoints, both converted to the plotted frame of trajectory_plot.py.
+
+        :param flight: The flight identifier or a unique prefix.
+        :type flight: str
+        :param start: Start of the window, in seconds from the start of the flight.
+        :type start: float, optional
+        :param end: End of the window, in seconds from the start of the flight.
+        :type end: float, optional
+        :param max_points: Maximum number of rows returned per array.
+        :type max_points: int, optional
+        :return: The desired arrays of each Coordinate name (DESIRED_AXES columns after the time), and
+            the actual array (ACTUAL_COLUMNS), times in seconds from the start of the flight.
+        :rtype: tuple[dict[str, np.ndarray], np.ndarray]
+        """
+        info = self.flight(flight)
+
+        def decimated(data: np.ndarray) -> np.ndarray:
+            if max_points and len(data) > max_points:
+                return data[::-(-len(data) // max_points)]
+            return data
+
+        # The plotted frame flips the y and z axes, and so the heading, of the NED estimates
+        signs = {"x": 1.0, "y": -1.0, "z": -1.0, "heading": -1.0}
+        actual = np.empty((0, len(ACTUAL_COLUMNS)))
+        if topic_key(ACTUAL_TOPIC) in info.topics:
+            position = self.query(info.id, ACTUAL_TOPIC, start, end, ("x", "y", "z", "vx", "vy", "vz", "heading"))
+            actual = np.column_stack([(position["timestamp"] - info.start_us) * 1e-6]
+                                     + [signs[column.lstrip("v")] * position[column].astype(np.float64)
+                                        for column in ACTUAL_COLUMNS[1:]])
+        desired = {axis: np.empty((0, 1 + len(states))) for axis, states in DESIRED_AXES.items()}
+        if topic_key(DESIRED_TOPIC) in info.topics:
+            setpoints = self.query(info.id, DESIRED_TOPIC, start, end)
+            time = (setpoints["timestamp"] - info.start_us) * 1e-6
+            for index, axis in enumerate(("x", "y", "z")):
+                desired[axis] = np.column_stack((time, signs[axis] * setpoints[f"position[{index}]"],
+                                                 signs[axis] * setpoints[f"velocity[{index}]"]))
+            desired["heading"] = np.column_stack((time, signs["heading"] * setpoints["yaw"]))
+        return {axis: decimated(data) for axis, data in desired.items()}, decimated(actual)
+
+
+def render_flights(store: UlogStore, flights: Sequence[str], output: str, start: Optional[float] = None,
+                   end: Optional[float] = None, max_points: int = 20000) -> None:
+    """
+    Renders the seven trajectory panels of flights with a non-interactive backend.
+
+    A single flight is drawn as desired vs actual, several flights are overlaid with one color per
+    flight, labelled with their vehicle and identifier.
+
+    :param store: The store.
+    :type store: UlogStore
+    :param flights: The flight identifiers or unique prefixes.
+    :type flights: Sequence[str]
+    :param output: The image or PDF file to write, the format follows the extension.
+    :type output: str
+    :param start: Start of the window, in seconds from the start of each flight.
+    :type start: float, optional
+    :param end: End of the window, in seconds from the start of each flight.
+    :type end: float, optional
+    :param max_points: Maximum number of points drawn per line.
+    :type max_points: int
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from trajectory_panels import TrajectoryFigure
+
+    desired, actual = {}, {}
+    for reference in flights:
+        info = store.flight(reference)
+        label = "" if len(flights) == 1 else f"{info.vehicle} {info.id[:8]}"
+        desired[label], actual[label] = store.trajectory(info.id, start, end, max_points)
+
+    figure = TrajectoryFigure(animated=False, vehicles=tuple(desired))
+    figure.show_data(desired, actual)
+    figure.fig.savefig(output)
+
+
+def parse_date(value: str) -> float:
+    """
+    Parses an ISO date, in UTC unless it has a time zone.
+
+    :param value: The date, e.g. 2024-06-01 or 2024-06-01T14:00.
+    :type value: str
+    :return: The time in seconds since the epoch.
+    :rtype: float
+    """
+    date = datetime.fromisoformat(value)
+    return (date if date.tzinfo else date.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def print_flights(flights: Sequence[FlightInfo]) -> None:
+    """
+    Prints one line per flight.
+
+    :param flights: The flights.
+    :type flights: Sequence[FlightInfo]
+    """
+    for flight in flights:
+        start = datetime.fromtimestamp(flight.start_time, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"{flight.id}  {flight.vehicle:<12} {start} ({flight.start_time_source})  "
+              f"{flight.duration:8.1f} s  {len(flight.topics):4d} topics  {flight.source}")
+
+
+def main() -> None:
+    """
+    Main function to parse arguments and run a store command.
+    """
+    parser = argparse.ArgumentParser(description="Ingest, query and render collected ULog flight logs")
+    parser.add_argument("--store", default=STORE_DIR, help="Directory of the store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Ingest the logs that are not in the store yet")
+    ingest.add_argument("paths", nargs="*", default=[LOG_DIR], help="Log files and directories")
+    ingest.add_argument("--vehicle", help="Vehicle of the logs, defaults to their UAV name directory")
+    ingest.add_argument("--jobs", type=int, help="Number of logs parsed in parallel")
+
+    listing = commands.add_parser("list", help="List the flights")
+    listing.add_argument("--vehicle", help="Only list the flights of this vehicle")
+    listing.add_argument("--since", type=parse_date, help="Only list the flights started after this date")
+    listing.add_argument("--until", type=parse_date, help="Only list the flights started before this date")
+
+    query = commands.add_parser("query", help="Extract a topic in a time window")
+    query.add_argument("flight", help="Flight identifier or unique prefix")
+    query.add_argument("topic", help="Topic name")
+    query.add_argument("--multi-id", type=int, default=0, help="Instance of the topic")
+    query.add_argument("--fields", nargs="+", help="Fields to extract, defaults to all of them")
+    query.add_argument("--output", help=".npz file to write, prints a summary otherwise")
+
+    render = commands.add_parser("render", help="Render the desired vs actual trajectory panels")
+    render.add_argument("flights", nargs="+", help="Flight identifiers or unique prefixes")
+    render.add_argument("--output", default="trajectory.png", help="Image or PDF file to write")
+    render.add_argument("--max-points", type=int, default=20000, help="Maximum number of points per line")
+
+    for command in (query, render):
+        command.add_argument("--start", type=float, help="Start of the window, in seconds from the flight start")
+        command.add_argument("--end", type=float, help="End of the window, in seconds from the flight start")
+    args = parser.parse_args()
+
+    store = UlogStore(args.store)
+    try:
+        if args.command == "ingest":
+            results = store.ingest(args.paths, args.vehicle, args.jobs)
+            for path, status in results:
+                print(f"{path}: {status}")
+            if any(status.startswith("failed") for _, status in results):
+                raise SystemExit(1)
+        elif args.command == "list":
+            print_flights(store.flights(args.vehicle, args.since, args.until))
+        elif args.command == "query":
+            data = store.query(args.flight, args.topic, args.start, args.end, args.fields, args.multi_id)
+            if args.output:
+                np.savez(args.output, **data)
+            else:
+                for name, values in data.items():
+                    summary = f"{values.min()} .. {values.max()}" if len(values) else "-"
+                    print(f"{name:<32} {values.dtype.str:<4} {len(values):8d} rows  {summary}")
+        else:
+            render_flights(store, args.flights, args.output, args.start, args.end, args.max_points)
+    except KeyError as error:
+        print(f"Error: {error.args[0]}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
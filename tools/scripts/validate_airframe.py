@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+
+"""
+Copyright 2024 Damien Six (six.damien@robotsix.net)
+SPDX-License-Identifier: Apache-2.0
+
+Script to validate airframe models before they are handed to Gazebo.
+
+The `model.sdf` files are read in a single streaming pass with the expat parser, which only keeps a
+summary of the links, joints, motor plugins and mesh URIs. The physics sanity checks then run on that
+summary:
+- the links have a positive mass and a positive-definite inertia satisfying the triangle inequality,
+- the joints and the motor plugins reference links and joints of the model,
+- the mesh URIs resolve to existing files,
+- the motors lift the model with a thrust-to-weight ratio above 1, with a warning below the minimum.
+
+Only the standard library is used, so that a whole directory of models is checked in milliseconds.
+
+Usage:
+    python validate_airframe.py [<model_dir_or_sdf_file> ...] [--models-dir DIR]
+                                [--min-thrust-to-weight RATIO]
+
+Without arguments, all the models of gz_sim/custom_airframes are validated. The exit status is 1 if a
+model has errors.
+"""
+
+import argparse
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from os.path import abspath, dirname
+from typing import Dict, List, Optional, Sequence, Tuple
+from xml.parsers import expat
+
+AIRFRAMES_DIR = os.path.join(dirname(abspath(__file__)), '..', '..', 'gz_sim', 'custom_airframes')
+G = 9.81
+# Below this ratio the vehicle hovers, but with little thrust left for the attitude control
+DEFAULT_MIN_THRUST_TO_WEIGHT = 1.5
+MOTOR_PLUGIN = 'gz::sim::systems::MulticopterMotorModel'
+INERTIA_ELEMENTS = ('ixx', 'ixy', 'ixz', 'iyy', 'iyz', 'izz')
+# SDFormat values of a link without an inertial element or of its missing children
+DEFAULT_MASS = 1.0
+DEFAULT_INERTIA = dict(ixx=1.0, ixy=0.0, ixz=0.0, iyy=1.0, iyz=0.0, izz=1.0)
+# Joint parents that are not links of the model
+WORLD_FRAMES = ('world', '__model__')
+
+
+@dataclass
+class LinkSummary:
+    """
+    Inertial and pose of a link, as raw element texts.
+    """
+    line: int
+    pose: str = ''
+    mass: Optional[str] = None
+    inertia: Dict[str, str] = field(default_factory=dict)
+    has_inertial: bool = False
+
+
+@dataclass
+class ModelSummary:
+    """
+    The parts of a model that are checked, with the line of their element.
+    """
+    name: str = ''
+    links: Dict[str, LinkSummary] = field(default_factory=dict)
+    # Name, type, parent and child of each joint
+    joints: List[Tuple[int, str, str, str, str]] = field(default_factory=list)
+    # Child element texts of each motor plugin
+    motors: List[Tuple[int, Dict[str, str]]] = field(default_factory=list)
+    mesh_uris: List[Tuple[int, str]] = field(default_factory=list)
+    duplicates: List[Tuple[int, str]] = field(default_factory=list)
+
+
+@dataclass
+class ValidationReport:
+    """
+    Problems found in a model.
+
+    :param path: The validated SDF file.
+    :param errors: Problems that would make the simulation fail or misbehave.
+    :param warnings: Suspicious values the simulation accepts.
+    :param thrust_to_weight: Vertical thrust of all the motors at full speed over the weight, None
+        without motors.
+    """
+    path: str
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    thrust_to_weight: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+class SdfScanner:
+    """
+    Streaming expat handlers building the summary of the first model of an SDF file.
+    """
+
+    def __init__(self, parser: expat.XMLParserType):
+        self.parser = parser
+        self.summary = ModelSummary()
+        self._path: List[str] = []
+        self._text: List[str] = []
+        self._line = 0
+        self._link: Optional[LinkSummary] = None
+        self._joint: Optional[Dict[str, str]] = None
+        self._motor: Optional[Dict[str, str]] = None
+        # Line of the joint or motor plugin element being read
+        self._element_line = 0
+        self._models = 0
+
+    def start(self, tag: str, attributes: Dict[str, str]) -> None:
+        parent = self._path[-1] if self._path else None
+        self._path.append(tag)
+        self._text = []
+        self._line = self.parser.CurrentLineNumber
+        if tag == 'model' and parent == 'sdf':
+            self._models += 1
+            if self._models == 1:
+                self.summary.name = attributes.get('name', '')
+        if self._models != 1 or parent != 'model':
+            return
+        name = attributes.get('name', '')
+        if tag == 'link':
+            if name in self.summary.links:
+                self.summary.duplicates.append((self._line, f"link '{name}'"))
+            self._link = self.summary.links[name] = LinkSummary(self._line)
+        elif tag == 'joint':
+            if any(joint[1] == name for joint in self.summary.joints):
+                self.summary.duplicates.append((self._line, f"joint '{name}'"))
+            self._joint = dict(name=name, type=attributes.get('type', ''))
+            self._element_line = self._line
+        elif tag == 'plugin' and attributes.get('name') == MOTOR_PLUGIN:
+            self._motor = {}
+            self._element_line = self._line
+
+    def end(self, tag: str) -> None:
+        self._path.pop()
+        text = ''.join(self._text).strip()
+        self._text = []
+        parent = self._path[-1] if self._path else None
+        if tag == 'uri' and parent == 'mesh':
+            self.summary.mesh_uris.append((self.parser.CurrentLineNumber, text))
+        elif self._link is not None:
+            if tag == 'link' and parent == 'model':
+                self._link = None
+            elif tag == 'pose' and parent == 'link':
+                self._link.pose = text
+            elif tag == 'inertial' and parent == 'link':
+                self._link.has_inertial = True
+            elif tag == 'mass' and parent == 'inertial':
+                self._link.mass = text
+            elif tag in INERTIA_ELEMENTS and parent == 'inertia':
+                self._link.inertia[tag] = text
+        elif self._joint is not None:
+            if tag == 'joint' and parent == 'model':
+                joint = self._joint
+                self.summary.joints.append((self._element_line, joint['name'], joint['type'],
+                                            joint.get('parent', ''), joint.get('child', '')))
+                self._joint = None
+            elif tag in ('parent', 'child') and parent == 'joint':
+                self._joint[tag] = text
+        elif self._motor is not None:
+            if tag == 'plugin' and parent == 'model':
+                self.summary.motors.append((self._element_line, self._motor))
+                self._motor = None
+            elif parent == 'plugin':
+                self._motor[tag] = text
+
+    def data(self, text: str) -> None:
+        self._text.append(text)
+
+
+def scan_sdf(path: str) -> ModelSummary:
+    """
+    Read the summary of the model of an SDF file in a single streaming pass.
+
+    :param path: Path to the SDF file.
+    :type path: str
+    :return: The model summary.
+    :rtype: ModelSummary
+    :raises expat.ExpatError: If the file is not well-formed XML.
+    """
+    parser = expat.ParserCreate()
+    scanner = SdfScanner(parser)
+    parser.StartElementHandler = scanner.start
+    parser.EndElementHandler = scanner.end
+    parser.CharacterDataHandler = scanner.data
+    parser.buffer_text = True
+    with open(path, 'rb') as file:
+        parser.ParseFile(file)
+    return scanner.summary
+
+
+def parse_number(text: str) -> float:
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(text)
+    return value
+
+
+def principal_moments(ixx: float, iyy: float, izz: float, ixy: float, ixz: float, iyz: float) -> List[float]:
+    """
+    Compute the eigenvalues of a symmetric inertia matrix, in increasing order.
+    """
+    off_diagonal = ixy ** 2 + ixz ** 2 + iyz ** 2
+    if off_diagonal == 0.0:
+        return sorted((ixx, iyy, izz))
+    # Closed form of the eigenvalues of a symmetric 3x3 matrix
+    mean = (ixx + iyy + izz) / 3
+    scale = math.sqrt(((ixx - mean) ** 2 + (iyy - mean) ** 2 + (izz - mean) ** 2 + 2 * off_diagonal) / 6)
+    a, b, c = (ixx - mean) / scale, (iyy - mean) / scale, (izz - mean) / scale
+    d, e, f = ixy / scale, ixz / scale, iyz / scale
+    half_det = (a * (b * c - f * f) - d * (d * c - f * e) + e * (d * f - b * e)) / 2
+    phi = math.acos(max(-1.0, min(1.0, half_det))) / 3
+    largest = mean + 2 * scale * math.cos(phi)
+    smallest = mean + 2 * scale * math.cos(phi + 2 * math.pi / 3)
+    return [smallest, 3 * mean - largest - smallest, largest]
+
+
+def check_inertial(name: str, link: LinkSummary, report: ValidationReport) -> float:
+    """
+    Check the mass and inertia of a link.
+
+    :return: The mass of the link, 0 if it is invalid.
+    :rtype: float
+    """
+    where = f"line {link.line}: link '{name}'"
+    if not link.has_inertial:
+        report.warnings.append(f"{where} has no inertial, SDFormat gives it a mass of {DEFAULT_MASS} kg")
+        return DEFAULT_MASS
+    try:
+        mass = parse_number(link.mass) if link.mass is not None else DEFAULT_MASS
+        inertia = {key: parse_number(link.inertia[key]) if key in link.inertia else default
+                   for key, default in DEFAULT_INERTIA.items()}
+    except ValueError as error:
+        report.errors.append(f"{where} has a non-numeric or infinite inertial value {error}")
+        return 0.0
+    if mass <= 0:
+        report.errors.append(f"{where} has a non-positive mass {mass}")
+        mass = 0.0
+    ixx, iyy, izz = inertia['ixx'], inertia['iyy'], inertia['izz']
+    ixy, ixz, iyz = inertia['ixy'], inertia['ixz'], inertia['iyz']
+    # Sylvester's criterion on the leading principal minors
+    determinant = ixx * (iyy * izz - iyz ** 2) - ixy * (ixy * izz - iyz * ixz) + ixz * (ixy * iyz - iyy * ixz)
+    if ixx <= 0 or ixx * iyy - ixy ** 2 <= 0 or determinant <= 0:
+        report.errors.append(f"{where} has an inertia matrix that is not positive definite")
+        return mass
+    moments = principal_moments(ixx, iyy, izz, ixy, ixz, iyz)
+    if moments[0] + moments[1] < moments[2] * (1 - 1e-9):
+        report.errors.append(f"{where} has principal moments of inertia {moments} violating the triangle "
+                             "inequality")
+    return mass
+
+
+def vertical_axis(pose: str) -> float:
+    """
+    Compute the vertical component of the z axis of a frame from its SDF pose.
+    """
+    values = [parse_number(value) for value in pose.split()] or [0.0] * 6
+    if len(values) != 6:
+        raise ValueError(pose)
+    roll, pitch = values[3], values[4]
+    return math.cos(roll) * math.cos(pitch)
+
+
+def resolve_uri(uri: str, sdf_dir: str, models_dirs: Sequence[str]) -> Optional[List[str]]:
+    """
+    List the candidate paths of a mesh URI, the way Gazebo resolves them.
+
+    :return: The candidate paths, None for a remote URI that is not checked.
+    :rtype: list[str] or None
+    """
+    if uri.startswith('model://'):
+        return [os.path.join(models_dir, uri[len('model://'):]) for models_dir in models_dirs]
+    if uri.startswith('file://'):
+        uri = uri[len('file://'):]
+    elif '://' in uri:
+        return None
+    return [uri if os.path.isabs(uri) else os.path.join(sdf_dir, uri)]
+
+
+def validate_sdf(path: str, models_dirs: Optional[Sequence[str]] = None,
+                 min_thrust_to_weight: float = DEFAULT_MIN_THRUST_TO_WEIGHT) -> ValidationReport:
+    """
+    Validate the model of an SDF file.
+
+    :param path: Path to the SDF file.
+    :type path: str
+    :param models_dirs: Directories the `model://` URIs are resolved against, defaults to the parent
+        of the model directory and the GZ_SIM_RESOURCE_PATH directories.
+    :type models_dirs: Sequence[str], optional
+    :param min_thrust_to_weight: Thrust-to-weight ratio below which a warning is reported.
+    :type min_thrust_to_weight: float
+    :return: The validation report.
+    :rtype: ValidationReport
+    """
+    report = ValidationReport(path)
+    try:
+        summary = scan_sdf(path)
+    except OSError as error:
+        report.errors.append(f"cannot read the file: {error.strerror}")
+        return report
+    except expat.ExpatError as error:
+        report.errors.append(f"line {error.lineno}: malformed XML, {expat.ErrorString(error.code)}")
+        return report
+    if not summary.name:
+        report.errors.append("no <model> element")
+        return report
+    if models_dirs is None:
+        models_dirs = [dirname(dirname(abspath(path)))]
+        models_dirs += [path for path in os.environ.get('GZ_SIM_RESOURCE_PATH', '').split(os.pathsep) if path]
+
+    for line, element in summary.duplicates:
+        report.errors.append(f"line {line}: duplicate {element}")
+
+    total_mass = 0.0
+    for name, link in summary.links.items():
+        total_mass += check_inertial(name, link, report)
+
+    joint_names = set()
+    for line, name, joint_type, parent, child in summary.joints:
+        joint_names.add(name)
+        if child not in summary.links:
+            report.errors.append(f"line {line}: joint '{name}' has an unknown child link '{child}'")
+        if parent not in summary.links and parent not in WORLD_FRAMES:
+            report.errors.append(f"line {line}: joint '{name}' has an unknown parent link '{parent}'")
+        if parent == child:
+            report.errors.append(f"line {line}: joint '{name}' has the same parent and child '{child}'")
+
+    thrust = 0.0
+    motor_numbers: Dict[str, int] = {}
+    for line, motor in summary.motors:
+        where = f"line {line}: motor plugin"
+        link_name, joint_name = motor.get('linkName'), motor.get('jointName')
+        if joint_name not in joint_names:
+            report.errors.append(f"{where} references an unknown joint '{joint_name}'")
+        if link_name not in summary.links:
+            report.errors.append(f"{where} references an unknown link '{link_name}'")
+        number = motor.get('motorNumber', '')
+        if number in motor_numbers:
+            report.errors.append(f"{where} reuses the motor number {number} of line {motor_numbers[number]}")
+        motor_numbers[number] = line
+        try:
+            motor_constant = parse_number(motor.get('motorConstant', ''))
+            max_velocity = parse_number(motor.get('maxRotVelocity', ''))
+        except ValueError:
+            report.errors.append(f"{where} needs numeric motorConstant and maxRotVelocity values")
+            continue
+        if motor_constant <= 0 or max_velocity <= 0:
+            report.errors.append(f"{where} has a non-positive motorConstant or maxRotVelocity")
+            continue
+        try:
+            # The motor model pushes the rotor link along its z axis
+            axis = vertical_axis(summary.links[link_name].pose) if link_name in summary.links else 1.0
+        except ValueError:
+            report.errors.append(f"line {summary.links[link_name].line}: link '{link_name}' has a malformed pose")
+            continue
+        thrust += motor_constant * max_velocity ** 2 * axis
+
+    if summary.motors and total_mass > 0:
+        report.thrust_to_weight = thrust / (total_mass * G)
+        if report.thrust_to_weight <= 1.0:
+            report.errors.append(f"the motors cannot lift the model: thrust-to-weight ratio "
+                                 f"{report.thrust_to_weight:.2f} for {total_mass:.3f} kg")
+        elif report.thrust_to_weight < min_thrust_to_weight:
+            report.warnings.append(f"low thrust-to-weight ratio {report.thrust_to_weight:.2f}, below "
+                                   f"{min_thrust_to_weight}")
+
+    sdf_dir = dirname(abspath(path))
+    checked: Dict[str, bool] = {}
+    for line, uri in summary.mesh_uris:
+        if uri not in checked:
+            candidates = resolve_uri(uri, sdf_dir, models_dirs)
+            checked[uri] = candidates is None or any(os.path.isfile(candidate) for candidate in candidates)
+        if not checked[uri]:
+            report.errors.append(f"line {line}: mesh '{uri}' not found")
+    return report
+
+
+def model_files(paths: Sequence[str]) -> List[str]:
+    """
+    Find the SDF files to validate.
+
+    :param paths: Model directories, SDF files, or directories of model directories.
+    :type paths: Sequence[str]
+    :return: The SDF files.
+    :rtype: list[str]
+    """
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+        elif os.path.isfile(os.path.join(path, 'model.sdf')):
+            files.append(os.path.join(path, 'model.sdf'))
+        else:
+            files += sorted(os.path.join(path, name, 'model.sdf') for name in os.listdir(path)
+                            if os.path.isfile(os.path.join(path, name, 'model.sdf')))
+    return files
+
+
+def print_report(report: ValidationReport, name: str) -> None:
+    """
+    Print the problems of a model, or a single line if it is valid.
+
+    :param report: The validation report.
+    :type report: ValidationReport
+    :param name: Name of the model in the messages.
+    :type name: str
+    """
+    for error in report.errors:
+        print(f"{name}: error: {error}")
+    for warning in report.warnings:
+        print(f"{name}: warning: {warning}")
+    if report.ok:
+        ratio = f", thrust-to-weight {report.thrust_to_weight:.2f}" if report.thrust_to_weight is not None else ""
+        print(f"{name}: valid{ratio}")
+
+
+def main(paths: Sequence[str], models_dirs: Optional[Sequence[str]] = None,
+         min_thrust_to_weight: float = DEFAULT_MIN_THRUST_TO_WEIGHT) -> None:
+    """
+    Main function to validate models and report their problems.
+
+    :param paths: Model directories, SDF files, or directories of model directories.
+    :type paths: Sequence[str]
+    :param models_dirs: Directories the `model://` URIs are resolved against.
+    :type models_dirs: Sequence[str], optional
+    :param min_thrust_to_weight: Thrust-to-weight ratio below which a warning is reported.
+    :type min_thrust_to_weight: float
+    :return: None
+    :rtype: None
+    """
+    start = time.perf_counter()
+    files = model_files(paths)
+    invalid = []
+    for path in files:
+        name = os.path.basename(dirname(abspath(path)))
+        report = validate_sdf(path, models_dirs, min_thrust_to_weight)
+        print_report(report, name)
+        if not report.ok:
+            invalid.append(name)
+    print(f"Validated {len(files)} models in {(time.perf_counter() - start) * 1000:.0f} ms")
+    if invalid:
+        print(f"Invalid models: {', '.join(invalid)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate airframe models before launching a simulation")
+    parser.add_argument('paths', nargs='*', default=[AIRFRAMES_DIR],
+                        help="Model directories, SDF files or directories of models, defaults to the custom airframes")
+    parser.add_argument('--models-dir', action='append', dest='models_dirs',
+                        help="Directory the model:// URIs are resolved against, can be repeated")
+    parser.add_argument('--min-thrust-to-weight', type=float, default=DEFAULT_MIN_THRUST_TO_WEIGHT,
+                        help="Thrust-to-weight ratio below which a warning is reported")
+    args = parser.parse_args()
+    main(args.paths, args.models_dirs, args.min_thrust_to_weight)